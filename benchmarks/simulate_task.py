@@ -0,0 +1,24 @@
+import cProfile
+import sys
+import time
+
+from vstt.experiment import Experiment
+from vstt.headless import HeadlessMotorTask
+
+n_trials = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+experiment = Experiment()
+experiment.trial_list[0]["weight"] = n_trials
+experiment.trial_list[0]["play_sound"] = False
+experiment.trial_list[0]["post_block_display_results"] = False
+task = HeadlessMotorTask(experiment, seed=0)
+t0 = time.perf_counter()
+with cProfile.Profile() as pr:
+    task.run()
+wall_time = time.perf_counter() - t0
+pr.dump_stats("simulate_task.prof")
+print(f"{n_trials} trials, {task.win.nFrames} frames")
+print(f"simulated time: {task.win.time:.1f}s, wall clock time: {wall_time:.1f}s")
+print(
+    f"{n_trials / wall_time:.1f} trials/s, {task.win.time / wall_time:.1f}x real time"
+)
@@ -1,4 +1,11 @@
-from vstt.experiment import Experiment
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+from typing import Any
+
+if TYPE_CHECKING:
+    from vstt.experiment import Experiment
 
 __all__ = [
     "Experiment",
@@ -6,3 +13,18 @@ __all__ = [
 ]
 
 __version__ = "1.5.0"
+
+
+def __getattr__(name: str) -> Any:
+    # Experiment and the submodules are imported on first use,
+    # so that e.g. `vstt --help` doesn't import psychopy, pandas or Qt.
+    # Modules that are used by the task process refer to the stats as `vstt.stats`,
+    # so that they are only imported by this function after the trials are done.
+    if name == "Experiment":
+        return importlib.import_module("vstt.experiment").Experiment
+    try:
+        return importlib.import_module(f"vstt.{name}")
+    except ModuleNotFoundError as e:
+        if e.name != f"vstt.{name}":
+            raise
+        raise AttributeError(f"module 'vstt' has no attribute '{name}'") from None
@@ -1,27 +1,92 @@
 from __future__ import annotations
 
 import logging
+import pathlib
 
 import click
-from psychopy.gui.qtgui import ensureQtApp
-from qtpy import QtWidgets
 
-from vstt.gui import Gui
 
+class _DefaultToGui(click.Group):
+    """Run the gui subcommand unless another subcommand is given"""
 
-@click.command()
-@click.argument("filename", required=False)
-def main(filename: str | None) -> None:
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if not args or (args[0] not in self.commands and not args[0].startswith("-")):
+            args = ["gui", *args]
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=_DefaultToGui)
+def main() -> None:
     logging.basicConfig(
         format="%(levelname)s %(module)s.%(funcName)s.%(lineno)d :: %(message)s"
     )
+
+
+@main.command()
+@click.argument("filename", required=False)
+def gui(filename: str | None) -> None:
+    """Open the experiment FILENAME in the gui"""
+    from psychopy.gui.qtgui import ensureQtApp
+    from qtpy import QtWidgets
+
+    from vstt.gui import Gui
+
     ensureQtApp()
     app = QtWidgets.QApplication.instance()
     assert app is not None
-    gui = Gui(filename=filename)
-    gui.showMaximized()
+    window = Gui(filename=filename)
+    window.showMaximized()
     app.exec()
 
 
+@main.command()
+@click.argument("filename", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--per",
+    type=click.Choice(["trial", "condition", "all"]),
+    default="all",
+    show_default=True,
+    help="Render an image for each trial, each condition, or both",
+)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of worker processes",
+)
+@click.option(
+    "--output",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Output folder [default: FILENAME without suffix + _images]",
+)
+@click.option(
+    "--size",
+    type=(int, int),
+    default=(1920, 1080),
+    show_default=True,
+    help="Width and height of the images in pixels",
+)
+def render(
+    filename: str, per: str, jobs: int, output: str | None, size: tuple[int, int]
+) -> None:
+    """Render the results images of the experiment FILENAME to a folder"""
+    from vstt.experiment import Experiment
+    from vstt.render import render_images
+
+    path = pathlib.Path(filename)
+    if output is None:
+        output = str(path.with_name(f"{path.stem}_images"))
+    experiment = Experiment(filename)
+    try:
+        filenames, seconds = render_images(experiment, output, per, jobs, size)
+    except RuntimeError as e:
+        raise click.ClickException(f"{e}") from e
+    click.echo(
+        f"Rendered {len(filenames)} images to '{output}' in {seconds:.2f}s ({len(filenames) / seconds:.1f} images/s)"
+    )
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,238 @@
+"""
+Compressed blocks of cursor trajectories in saved files
+
+Most of the size of a psydat file with results is the timestamps and mouse positions of each movement.
+With the "Compress cursor trajectories" metadata option, these are saved as a single compressed block per trial.
+Before compression the samples are delta encoded, i.e. replaced with the differences (dt, dx, dy)
+between consecutive samples, which are small and repetitive and so compress well.
+The differences are taken between the integers with the same bits as the stored values,
+so the encoding is lossless for any of the trajectory storage options.
+
+The blocks are kept when a file is opened, and a block is only decompressed when the movements of its trial are used,
+see :meth:`vstt.session.SessionData.movement` and :func:`trial_trajectories`.
+The statistics use every movement, so they decompress all the blocks once when they are calculated.
+"""
+
+from __future__ import annotations
+
+import copy
+import lzma
+import pickle
+import zlib
+from collections.abc import Iterable
+from typing import Any
+
+import numpy as np
+from psychopy.data import TrialHandlerExt
+
+# the keys of the trial handler data that are stored in the compressed blocks
+trajectory_keys: list[str] = [
+    "to_target_timestamps",
+    "to_target_mouse_positions",
+    "to_center_timestamps",
+    "to_center_mouse_positions",
+]
+# the key of the trial handler data that contains the compressed block of each trial
+block_key: str = "trajectory_block"
+
+_unsigned_dtypes = {1: np.uint8, 2: np.uint16, 4: np.uint32, 8: np.uint64}
+
+
+def _contains_mixed_length_numpy_arrays(items: Iterable) -> bool:
+    return (
+        len(set([item.shape if isinstance(item, np.ndarray) else 1 for item in items]))
+        > 1
+    )
+
+
+def delta_encode(values: np.ndarray) -> np.ndarray:
+    """
+    The differences between consecutive rows of an array
+
+    The differences are calculated (with wrap-around) between unsigned integers with the same bits as the values,
+    so :func:`delta_decode` recovers the values exactly, including floating point values.
+
+    :param values: The array, e.g. timestamps or (x, y) positions
+    :return: The first row followed by the differences between consecutive rows
+    """
+    values = np.ascontiguousarray(values)
+    bits = values.view(_unsigned_dtypes[values.dtype.itemsize])
+    deltas = bits.copy()
+    deltas[1:] -= bits[:-1]
+    return deltas
+
+
+def delta_decode(deltas: np.ndarray, dtype: Any) -> np.ndarray:
+    """
+    Recover the values from the output of :func:`delta_encode`
+
+    :param deltas: The delta encoded array
+    :param dtype: The dtype of the values
+    :return: The values
+    """
+    return np.cumsum(deltas, axis=0, dtype=deltas.dtype).view(dtype)
+
+
+def _compress(data: bytes, codec: str, level: int) -> bytes:
+    level = min(max(int(level), 0), 9)
+    if codec == "lzma":
+        return lzma.compress(data, preset=level)
+    if codec == "zlib":
+        return zlib.compress(data, level)
+    raise ValueError(f"Unknown trajectory compression codec '{codec}'")
+
+
+def _decompress(block: bytes, codec: str) -> bytes:
+    if codec == "lzma":
+        return lzma.decompress(block)
+    if codec == "zlib":
+        return zlib.decompress(block)
+    raise ValueError(f"Unknown trajectory compression codec '{codec}'")
+
+
+def encode_block(values: dict[str, Any], codec: str, level: int = 6) -> bytes:
+    """
+    Delta encode and compress the movements of a trial
+
+    Each movement keeps its own dtype, as positions that are too large for int16 storage are stored as float32.
+
+    :param values: The list of timestamps or mouse positions of each target, for each kind of data
+    :param codec: The compression codec, "zlib" or "lzma"
+    :param level: The compression level, from 0 (fastest) to 9 (smallest)
+    :return: The compressed block
+    """
+    encoded = {
+        key: [
+            (np.asarray(movement).dtype.str, delta_encode(np.asarray(movement)))
+            for movement in movements
+        ]
+        for key, movements in values.items()
+    }
+    return _compress(pickle.dumps(encoded), codec, level)
+
+
+def decode_block(block: bytes, codec: str) -> dict[str, list[np.ndarray]]:
+    """
+    Decompress and decode a block created by :func:`encode_block`
+
+    :param block: The compressed block
+    :param codec: The compression codec used to create the block
+    :return: The list of timestamps or mouse positions of each target, for each kind of data
+    """
+    return {
+        key: [delta_decode(deltas, dtype) for dtype, deltas in movements]
+        for key, movements in pickle.loads(_decompress(block, codec)).items()
+    }
+
+
+def compress_trajectories(
+    trial_handler: TrialHandlerExt, codec: str, level: int = 6
+) -> TrialHandlerExt:
+    """
+    A copy of a trial handler with the trajectories of each trial stored in a compressed block
+
+    If the trial handler already has blocks compressed with this codec, e.g. if it was loaded from a compressed file,
+    they are used as they are.
+
+    :param trial_handler: The trial handler with the results, which is not modified
+    :param codec: The compression codec, "zlib" or "lzma"
+    :param level: The compression level, from 0 (fastest) to 9 (smallest)
+    :return: The trial handler with compressed trajectories, which shares all other data with the original
+    """
+    if block_key in trial_handler.data:
+        if trial_handler.extraInfo["trajectory_compression"] == codec:
+            return trial_handler
+        trial_handler = with_expanded_trajectories(trial_handler)
+    compressed = _copy_data(trial_handler)
+    compressed.extraInfo["trajectory_compression"] = codec
+    data = compressed.data
+    keys = [key for key in trajectory_keys if key in data]
+    if not keys:
+        return compressed
+    for index in np.ndindex(data[keys[0]].shape):
+        # trials that have not yet happened have a default string instead of an array in their data
+        values = {
+            key: data[key][index]
+            for key in keys
+            if isinstance(data[key][index], np.ndarray)
+        }
+        if values:
+            data.add(block_key, encode_block(values, codec, level), position=index)
+    for key in keys:
+        del data[key]
+        data.dataTypes.remove(key)
+        data.isNumeric.pop(key, None)
+    return compressed
+
+
+def _copy_data(trial_handler: TrialHandlerExt) -> TrialHandlerExt:
+    # a shallow copy of a trial handler with its own extraInfo and data dicts, which can be modified
+    trial_handler_copy = copy.copy(trial_handler)
+    trial_handler_copy.extraInfo = dict(trial_handler.extraInfo or {})
+    data = copy.copy(trial_handler.data)
+    data.dataTypes = list(data.dataTypes)
+    data.isNumeric = dict(data.isNumeric)
+    data.trials = trial_handler_copy
+    trial_handler_copy.data = data
+    return trial_handler_copy
+
+
+def with_expanded_trajectories(trial_handler: TrialHandlerExt) -> TrialHandlerExt:
+    """
+    A copy of a trial handler with the compressed blocks replaced by the trajectories they contain
+
+    :param trial_handler: The trial handler, which is not modified
+    :return: The trial handler with the trajectories, which is the trial handler itself if it has no compressed blocks
+    """
+    if block_key not in trial_handler.data:
+        return trial_handler
+    expanded = _copy_data(trial_handler)
+    expand_trajectories(expanded)
+    return expanded
+
+
+def expand_trajectories(trial_handler: TrialHandlerExt) -> None:
+    """
+    Replace the compressed blocks of a trial handler with the trajectories they contain
+
+    Trial handlers without compressed blocks are not modified.
+    This decompresses every block: to use the movements of a single trial, see :func:`trial_trajectories`.
+
+    :param trial_handler: The trial handler, which is modified in place
+    """
+    data = trial_handler.data
+    if block_key not in data:
+        return
+    codec = trial_handler.extraInfo["trajectory_compression"]
+    blocks = data[block_key]
+    for index in np.ndindex(blocks.shape):
+        if isinstance(blocks[index], bytes):
+            for key, value in decode_block(blocks[index], codec).items():
+                dtype = object if _contains_mixed_length_numpy_arrays(value) else None
+                data.add(key, np.array(value, dtype=dtype), position=index)
+    del data[block_key]
+    data.dataTypes.remove(block_key)
+    data.isNumeric.pop(block_key, None)
+    trial_handler.extraInfo.pop("trajectory_compression")
+
+
+def trial_trajectories(
+    trial_handler: TrialHandlerExt, i_trial: int, i_rep: int = 0
+) -> dict[str, list[np.ndarray]]:
+    """
+    The trajectories of a single trial, decompressing only the block of this trial if they are compressed
+
+    :param trial_handler: The trial handler with the results
+    :param i_trial: The index of the trial
+    :param i_rep: The index of the repetition
+    :return: The list of timestamps or mouse positions of each target, for each kind of data
+    """
+    data = trial_handler.data
+    if block_key in data:
+        return decode_block(
+            data[block_key][i_trial, i_rep],
+            trial_handler.extraInfo["trajectory_compression"],
+        )
+    return {
+        key: list(data[key][i_trial, i_rep]) for key in trajectory_keys if key in data
+    }
@@ -1,22 +1,34 @@
 from __future__ import annotations
 
+import copy
 import json
 import pathlib
 import pickle
+from concurrent.futures import Future
 from typing import Any
 
 import pandas as pd
 from psychopy.data import TrialHandlerExt
-from psychopy.misc import fromFile
 
+import vstt
+from vstt.compression import compress_trajectories
+from vstt.compression import with_expanded_trajectories
 from vstt.display import default_display_options
 from vstt.display import import_display_options
 from vstt.meta import default_metadata
 from vstt.meta import import_metadata
-from vstt.stats import append_stats_data_to_excel
-from vstt.stats import stats_dataframe
+from vstt.schedule import Schedule
+from vstt.session import SessionData
 from vstt.trial import default_trial
-from vstt.trial import import_and_validate_trial
+from vstt.trial import expand_sweep
+from vstt.trial import find_sweep
+from vstt.trial import import_and_validate_sweep
+from vstt.trial import import_and_validate_trials
+from vstt.vtypes import Trial
+
+# trial conditions that were not created from a sweep are only saved as one
+# if they are a sweep of more than one factor with at least this many conditions
+min_trial_sweep_size: int = 16
 
 
 class Experiment:
@@ -25,16 +37,123 @@ class Experiment:
         self.has_unsaved_changes = False
         self.metadata = default_metadata()
         self.display_options = default_display_options()
-        self.trial_list = [default_trial()]
-        self.trial_handler_with_results: TrialHandlerExt | None = None
-        self.stats: pd.DataFrame | None = None
+        # the sweep that the trial conditions were created from, if any
+        self._trial_sweep: dict[str, Any] | None = None
+        self._trial_list: list[Trial] | None = [default_trial()]
+        self._trial_handler_with_results: TrialHandlerExt | None = None
+        self._session_data: SessionData | None = None
+        self._stats: pd.DataFrame | Future[pd.DataFrame] | None = None
         if filename is not None:
             self.load_file(filename)
 
-    def create_trialhandler(self) -> TrialHandlerExt:
-        for index, trial in enumerate(self.trial_list):
-            self.trial_list[index] = import_and_validate_trial(trial)
-        return TrialHandlerExt(
+    @property
+    def trial_list(self) -> list[Trial]:
+        """
+        The list of trial conditions
+
+        If the trial conditions were created from a sweep, they are expanded the first time they are used.
+        """
+        if self._trial_list is None:
+            assert self._trial_sweep is not None
+            self._trial_list = expand_sweep(self._trial_sweep)
+        return self._trial_list
+
+    @trial_list.setter
+    def trial_list(self, trial_list: list[Trial]) -> None:
+        self._trial_list = trial_list
+
+    @property
+    def trial_sweep(self) -> dict[str, Any] | None:
+        """
+        The trial conditions as a sweep, see :func:`vstt.trial.expand_sweep`
+
+        This compact form is saved in json and psydat files instead of the list of trial conditions.
+        It is None if the trial conditions are not a sweep, or if they were not created from a sweep
+        and are a sweep of a single factor or of less than :data:`min_trial_sweep_size` conditions.
+        """
+        if self._trial_list is None:
+            return self._trial_sweep
+        trial_sweep = find_sweep(self._trial_list)
+        if trial_sweep is None or self._trial_sweep is not None:
+            return trial_sweep
+        if (
+            len(trial_sweep["factors"]) > 1
+            and len(self._trial_list) >= min_trial_sweep_size
+        ):
+            return trial_sweep
+        return None
+
+    @trial_sweep.setter
+    def trial_sweep(self, trial_sweep: dict[str, Any] | None) -> None:
+        # the sweep is validated, and only expanded when the trial conditions are first used
+        if trial_sweep is None:
+            # keep the trial conditions, but no longer treat them as created from a sweep
+            self._trial_list = self.trial_list
+            self._trial_sweep = None
+            return
+        self._trial_sweep = import_and_validate_sweep(trial_sweep)
+        self._trial_list = None
+
+    @property
+    def trial_handler_with_results(self) -> TrialHandlerExt | None:
+        """The psychopy trial handler with the results, which is stored in the psydat file"""
+        return self._trial_handler_with_results
+
+    @trial_handler_with_results.setter
+    def trial_handler_with_results(self, trial_handler: TrialHandlerExt | None) -> None:
+        self._trial_handler_with_results = trial_handler
+        self._session_data = None
+        self._stats = None
+
+    @property
+    def session_data(self) -> SessionData | None:
+        """
+        The results as typed columns
+
+        This is constructed from the trial handler with the results the first time it is used.
+        """
+        if self._session_data is None and self._trial_handler_with_results is not None:
+            self._session_data = SessionData.from_trial_handler(
+                self._trial_handler_with_results
+            )
+        return self._session_data
+
+    @property
+    def stats(self) -> pd.DataFrame | None:
+        """
+        The stats dataframe of the results
+
+        If the stats are still being calculated in the background, this waits until they are ready.
+        Otherwise they are calculated the first time they are used,
+        which decompresses all the trajectories if they were loaded from a compressed file.
+        """
+        if self._stats is None and self.session_data is not None:
+            self._stats = vstt.stats.stats_dataframe(self.session_data)
+        if isinstance(self._stats, Future):
+            self._stats = self._stats.result()
+        return self._stats
+
+    @stats.setter
+    def stats(self, stats: pd.DataFrame | Future[pd.DataFrame] | None) -> None:
+        self._stats = stats
+
+    @property
+    def stats_ready(self) -> bool:
+        """False if the stats are still being calculated in the background"""
+        return not isinstance(self._stats, Future) or self._stats.done()
+
+    def create_trialhandler(self, seed: int | None = None) -> TrialHandlerExt:
+        """
+        Create a trial handler for running the experiment
+
+        If there are trials, the schedule of their targets is generated and stored in the
+        ``"schedule"`` entry of the extraInfo, see :class:`vstt.schedule.Schedule`.
+
+        :param seed: The seed for the random target orders, if None a new seed is generated
+        :return: The trial handler
+        """
+        self.trial_list[:] = import_and_validate_trials(self.trial_list)
+        trial_handler = TrialHandlerExt(
             self.trial_list,
             nReps=1,
             method="sequential",
@@ -44,6 +163,11 @@ class Experiment:
                 "metadata": self.metadata,
             },
         )
+        if self.trial_list:
+            trial_handler.extraInfo["schedule"] = Schedule.from_trial_handler(
+                trial_handler, seed
+            ).as_dict()
+        return trial_handler
 
     def clear_results(self) -> None:
         self.trial_handler_with_results = None
@@ -71,16 +195,30 @@ class Experiment:
 
         if self.trial_handler_with_results is not None:
             # save existing trial handler with results, only update its extraInfo dict
-            self.trial_handler_with_results.extraInfo = {
-                "display_options": self.display_options,
-                "metadata": self.metadata,
-            }
-            self.trial_handler_with_results.saveAsPickle(
-                filename, fileCollisionMethod="overwrite"
+            self.trial_handler_with_results.extraInfo.update(
+                {
+                    "display_options": self.display_options,
+                    "metadata": self.metadata,
+                }
             )
+            trial_handler = self.trial_handler_with_results
+            if self.metadata["trajectory_compression"] != "none":
+                trial_handler = compress_trajectories(
+                    trial_handler,
+                    self.metadata["trajectory_compression"],
+                    self.metadata["trajectory_compression_level"],
+                )
+            else:
+                # results that were loaded from a compressed file are saved without compression
+                trial_handler = with_expanded_trajectories(trial_handler)
+            # the results keep their trial list, so they can be read without the sweep
+            _with_trial_sweep(
+                trial_handler, self.trial_sweep, keep_trial_list=True
+            ).saveAsPickle(filename, fileCollisionMethod="overwrite")
         else:
             # create a new trial handler to save this experiment
-            trial_handler = self.create_trialhandler()
+            trial_sweep = self.trial_sweep
+            trial_handler = _with_trial_sweep(self.create_trialhandler(), trial_sweep)
             # temporary hack as the psyschopy function only saves if there are results!
             with open(filename, "wb") as f:
                 pickle.dump(trial_handler, f)
@@ -88,6 +226,9 @@ class Experiment:
         self.has_unsaved_changes = False
 
     def load_psydat(self, filename: str) -> None:
+        # psychopy.misc imports most of psychopy, so only import it when needed
+        from psychopy.misc import fromFile
+
         self.import_and_validate_trial_handler(fromFile(filename))
         self.filename = filename
         self.has_unsaved_changes = False
@@ -111,7 +252,7 @@ class Experiment:
                 writer, sheet_name="trial_list", index=False
             )
             if self.stats is not None:
-                append_stats_data_to_excel(self.stats, writer, data_format)
+                vstt.stats.append_stats_data_to_excel(self.stats, writer, data_format)
 
     def load_excel(self, filename: str) -> None:
         dfs = pd.read_excel(filename, ["metadata", "display_options", "trial_list"])
@@ -119,20 +260,29 @@ class Experiment:
             filename,
             dfs["metadata"].to_dict("records")[0],
             dfs["display_options"].to_dict("records")[0],
-            dfs["trial_list"].to_dict("records"),
+            dfs["trial_list"],
         )
 
     def save_json(self, filename: str) -> None:
         if not filename.endswith(".json"):
             filename += ".json"
+        experiment_dict = self._as_dict()
+        trial_sweep = self.trial_sweep
+        if trial_sweep is not None:
+            del experiment_dict["trial_list"]
+            experiment_dict["trial_sweep"] = trial_sweep
         with open(filename, "w") as f:
-            json.dump(self._as_dict(), f)
+            json.dump(experiment_dict, f)
 
     def load_json(self, filename: str) -> None:
         with open(filename) as f:
             d = json.load(f)
         self.import_and_validate_dicts(
-            filename, d["metadata"], d["display_options"], d["trial_list"]
+            filename,
+            d["metadata"],
+            d["display_options"],
+            d.get("trial_list", []),
+            d.get("trial_sweep"),
         )
 
     def import_and_validate_dicts(
@@ -140,36 +290,65 @@ class Experiment:
         filename: str,
         metadata_dict: dict,
         display_options_dict: dict,
-        trial_dict_list: list[dict],
+        trial_dict_list: list[dict] | pd.DataFrame,
+        trial_sweep: dict[str, Any] | None = None,
     ) -> None:
         self.metadata = import_metadata(metadata_dict)
         self.display_options = import_display_options(display_options_dict)
-        self.trial_list = [
-            import_and_validate_trial(trial_dict) for trial_dict in trial_dict_list
-        ]
+        self.trial_sweep = trial_sweep
+        if trial_sweep is None:
+            self.trial_list = import_and_validate_trials(trial_dict_list)
         self.trial_handler_with_results = None
         self.stats = None
         self.has_unsaved_changes = True
         self.filename = str(pathlib.Path(filename).with_suffix(".psydat"))
 
     def import_and_validate_trial_handler(self, trial_handler: TrialHandlerExt) -> None:
+        # compressed trajectories are kept, and only decompressed when they are used
         # psychopy trial handler converts empty trial list [] -> [None]
         if trial_handler.trialList == [None]:
             trial_handler.trialList = []
-        for index, trial in enumerate(trial_handler.trialList):
-            trial_handler.trialList[index] = import_and_validate_trial(trial)
-        self.trial_list = trial_handler.trialList
         if not trial_handler.extraInfo:
             trial_handler.extraInfo = {}
+        self.trial_sweep = trial_handler.extraInfo.pop("trial_sweep", None)
+        if self.trial_sweep is None or trial_handler.trialList:
+            trial_handler.trialList = import_and_validate_trials(
+                trial_handler.trialList
+            )
+            self.trial_list = trial_handler.trialList
+        elif trial_handler.finished:
+            # the results need their trial list
+            trial_handler.trialList = self.trial_list
         self.metadata = import_metadata(
             trial_handler.extraInfo.get("metadata", default_metadata())
         )
         self.display_options = import_display_options(
             trial_handler.extraInfo.get("display_options", default_display_options())
         )
+        # the session data and the stats are created when first used
         if trial_handler.finished:
             self.trial_handler_with_results = trial_handler
-            self.stats = stats_dataframe(trial_handler)
         else:
             self.trial_handler_with_results = None
-            self.stats = None
+
+
+def _with_trial_sweep(
+    trial_handler: TrialHandlerExt,
+    trial_sweep: dict[str, Any] | None,
+    keep_trial_list: bool = False,
+) -> TrialHandlerExt:
+    # if there is a sweep, return a copy of the trial handler that stores the sweep in the extraInfo,
+    # and unless keep_trial_list is set, doesn't store the list of trial conditions
+    if trial_sweep is None:
+        return trial_handler
+    with_sweep = copy.copy(trial_handler)
+    if not keep_trial_list:
+        with_sweep.trialList = []
+    with_sweep.extraInfo = {
+        **(trial_handler.extraInfo or {}),
+        "trial_sweep": trial_sweep,
+    }
+    # the data refers back to the trial handler, so it needs a copy that refers to the new one
+    with_sweep.data = copy.copy(trial_handler.data)
+    with_sweep.data.trials = with_sweep
+    return with_sweep
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Any
+
 import numpy as np
 
 
@@ -105,6 +107,15 @@ class JoystickPointUpdater:
         )
 
 
+def xydist(p1: Any, p2: Any) -> float:
+    """
+    The distance between two points
+
+    This is the same as ``psychopy.event.xydist``, without importing psychopy.event which creates a pyglet window.
+    """
+    return np.sqrt(pow(p1[0] - p2[0], 2) + pow(p1[1] - p2[1], 2))
+
+
 def to_target_dists(
     pos: np.ndarray, target_xys: np.ndarray, target_index: int, has_central_target: bool
 ) -> tuple[float, float]:
@@ -115,3 +126,41 @@ def to_target_dists(
         n_targets_excluding_central = n_targets_excluding_central - 1
     # dist to correct target, min distance to any target (excluding center target)
     return rms_dists[target_index], np.min(rms_dists[:n_targets_excluding_central])
+
+
+def simplify_path(vertices: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Simplify a path with the Ramer-Douglas-Peucker algorithm
+
+    Vertices are removed if they lie within `tolerance` of the line segment between the remaining vertices.
+    The first and last vertices are always kept.
+
+    :param vertices: The x,y coordinates of the path
+    :param tolerance: The maximum distance between the original path and the simplified path
+    :return: The x,y coordinates of the simplified path
+    """
+    points = np.asarray(vertices, dtype=float)
+    n_points = points.shape[0]
+    if points.ndim != 2 or n_points < 3 or tolerance <= 0.0:
+        return points
+    keep = np.zeros(n_points, dtype=bool)
+    keep[[0, -1]] = True
+    segments = [(0, n_points - 1)]
+    while segments:
+        start, end = segments.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        relative = points[start + 1 : end] - points[start]
+        # distance to the line segment, not the infinite line, so overshoots are kept
+        length_squared = np.dot(segment, segment)
+        t = np.zeros(relative.shape[0])
+        if length_squared > 0.0:
+            t = np.clip(relative @ segment / length_squared, 0.0, 1.0)
+        distances = np.linalg.norm(relative - np.outer(t, segment), axis=1)
+        i_max = int(np.argmax(distances))
+        if distances[i_max] > tolerance:
+            middle = start + 1 + i_max
+            keep[middle] = True
+            segments += [(start, middle), (middle, end)]
+    return points[keep]
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import logging
+import os
 import pathlib
+import sys
 from typing import Callable
 
 from psychopy.visual.window import Window
@@ -14,11 +16,15 @@ import vstt
 from vstt.display_widget import DisplayOptionsWidget
 from vstt.experiment import Experiment
 from vstt.meta_widget import MetadataWidget
+from vstt.monitor import ExperimentMonitor
+from vstt.render import render_images
 from vstt.results_widget import ResultsWidget
 from vstt.task import MotorTask
+from vstt.task_process import run_task_in_subprocess
 from vstt.trials_widget import TrialsWidget
 from vstt.update import check_for_new_version
 from vstt.update import do_pip_upgrade
+from vstt.vis import preload_fonts_in_background
 
 
 class Gui(QtWidgets.QMainWindow):
@@ -26,6 +32,10 @@ class Gui(QtWidgets.QMainWindow):
         super().__init__()
         self.experiment = Experiment()
         self._win = win
+        self.run_task_in_subprocess = False
+        self.show_monitor = False
+        # the live monitor is started on the first run that shows it, and re-used for later runs
+        self.monitor: ExperimentMonitor | None = None
 
         grid_layout = QtWidgets.QVBoxLayout()
         split_top_bottom = QtWidgets.QSplitter(Qt.Vertical)
@@ -46,6 +56,9 @@ class Gui(QtWidgets.QMainWindow):
         self.trials_widget.experiment_modified.connect(self.reload_results)
         split_trial_results.addWidget(self.trials_widget)
         self.results_widget = ResultsWidget(self, win=self._win)
+        self.display_options_widget.experiment_modified.connect(
+            self.results_widget.update_viewer
+        )
         split_trial_results.addWidget(self.results_widget)
 
         split_top_bottom.addWidget(split_metadata_display)
@@ -67,6 +80,8 @@ class Gui(QtWidgets.QMainWindow):
 
     def closeEvent(self, event: QtGui.QCloseEvent) -> None:
         if self.save_changes_check_continue():
+            if self.monitor is not None:
+                self.monitor.close()
             event.accept()
         else:
             event.ignore()
@@ -163,6 +178,43 @@ class Gui(QtWidgets.QMainWindow):
         self.reload_experiment()
         return True
 
+    def btn_export_images_clicked(self) -> bool:
+        if self.experiment.trial_handler_with_results is None:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "No results",
+                "Please run the experiment or open a file with results before exporting images.",
+            )
+            return False
+        folder = QtWidgets.QFileDialog.getExistingDirectory(
+            self,
+            "Export images to folder",
+            str(pathlib.Path(self.experiment.filename).parent),
+        )
+        if folder == "":
+            return False
+        QtWidgets.QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            filenames, seconds = render_images(
+                self.experiment, folder, jobs=os.cpu_count() or 1
+            )
+        except Exception as e:
+            logging.exception(e)
+            QtWidgets.QMessageBox.critical(
+                self,
+                "Image export error",
+                f"Could not export images to '{folder}'",
+            )
+            return False
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+        QtWidgets.QMessageBox.information(
+            self,
+            "Images exported",
+            f"Exported {len(filenames)} images to '{folder}' in {seconds:.1f}s ({len(filenames) / seconds:.1f} images/s)",
+        )
+        return True
+
     def btn_run_clicked(self) -> None:
         if not self.experiment.trial_list:
             QtWidgets.QMessageBox.warning(
@@ -180,8 +232,13 @@ class Gui(QtWidgets.QMainWindow):
             if yes_no != QtWidgets.QMessageBox.Yes:
                 return
         try:
-            task = MotorTask(self.experiment, win=self._win)
-            if task.run():
+            monitor = self._start_monitor() if self.show_monitor else None
+            if self.run_task_in_subprocess:
+                success = run_task_in_subprocess(self.experiment, monitor=monitor)
+            else:
+                task = MotorTask(self.experiment, win=self._win, monitor=monitor)
+                success = task.run()
+            if success:
                 self.reload_results()
         except Exception as e:
             QtWidgets.QMessageBox.warning(
@@ -190,6 +247,24 @@ class Gui(QtWidgets.QMainWindow):
                 f"Error running task: {e}",
             )
 
+    def _start_monitor(self) -> ExperimentMonitor:
+        if self.monitor is None:
+            self.monitor = ExperimentMonitor()
+        # restarts the monitor window if it was closed
+        self.monitor.start()
+        self.monitor.reset()
+        return self.monitor
+
+    def set_run_task_in_subprocess(self, checked: bool) -> None:
+        self.run_task_in_subprocess = checked
+
+    def set_show_monitor(self, checked: bool) -> None:
+        self.show_monitor = checked
+
+    def set_save_thumbnails(self, checked: bool) -> None:
+        self.results_widget.save_thumbnails = checked
+        self.reload_results()
+
     def save_changes_check_continue(self) -> bool:
         if self.experiment.has_unsaved_changes:
             yes_no = QtWidgets.QMessageBox.question(
@@ -220,6 +295,24 @@ class Gui(QtWidgets.QMainWindow):
         self.results_widget.experiment = self.experiment
         self.trials_widget.experiment = self.experiment
         self.update_window_title()
+        if not self.run_task_in_subprocess:
+            # prepare the fonts of the task while the user is looking at the gui,
+            # so that they are not created when the participant is waiting
+            preload_fonts_in_background(
+                self.experiment.trial_list,
+                self.experiment.metadata,
+                self._task_window_height(),
+            )
+
+    def _task_window_height(self) -> float:
+        # the height in pixels of the window that the task is displayed in
+        if self._win is not None:
+            return float(self._win.size[1])
+        screen = QtGui.QGuiApplication.primaryScreen()
+        if sys.platform == "darwin":
+            # a psychopy retina window on macOS uses logical pixels
+            return float(screen.size().height())
+        return screen.size().height() * screen.devicePixelRatio()
 
     def about(self) -> None:
         QtWidgets.QMessageBox.about(
@@ -257,7 +350,7 @@ def _add_action(
     toolbar: QtWidgets.QToolBar | None = None,
     shortcut: str | None = None,
     icon_pixmap: QtWidgets.QStyle.StandardPixmap | None = None,
-) -> None:
+) -> QtWidgets.QAction:
     action = QtWidgets.QAction(name, menu)
     action.triggered.connect(callback)
     if icon_pixmap is not None:
@@ -267,6 +360,7 @@ def _add_action(
     menu.addAction(action)
     if toolbar is not None:
         toolbar.addAction(action)
+    return action
 
 
 def _create_menu_and_toolbar(gui: vstt.gui.Gui) -> QtWidgets.QToolBar:
@@ -305,6 +399,7 @@ def _create_menu_and_toolbar(gui: vstt.gui.Gui) -> QtWidgets.QToolBar:
         None,
         QtWidgets.QStyle.SP_DriveFDIcon,
     )
+    _add_action("Export &images", gui.btn_export_images_clicked, file_menu)
     _add_action(
         "E&xit",
         gui.btn_exit_clicked,
@@ -322,6 +417,20 @@ def _create_menu_and_toolbar(gui: vstt.gui.Gui) -> QtWidgets.QToolBar:
         "Ctrl+R",
         QtWidgets.QStyle.SP_DialogYesButton,
     )
+    run_in_subprocess_action = _add_action(
+        "Run in separate &process",
+        gui.set_run_task_in_subprocess,
+        experiment_menu,
+    )
+    run_in_subprocess_action.setCheckable(True)
+    show_monitor_action = _add_action(
+        "Show live &monitor", gui.set_show_monitor, experiment_menu
+    )
+    show_monitor_action.setCheckable(True)
+    save_thumbnails_action = _add_action(
+        "Save result &thumbnails", gui.set_save_thumbnails, experiment_menu
+    )
+    save_thumbnails_action.setCheckable(True)
     help_menu = menu.addMenu("&Help")
     _add_action("&About", gui.about, help_menu)
     _add_action("&Check for updates", gui.check_for_updates, help_menu)
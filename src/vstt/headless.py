@@ -0,0 +1,295 @@
+"""
+Headless backend for running the MotorTask with a simulated participant
+
+This runs the real trial logic of :class:`vstt.task.MotorTask` without a display or a human participant:
+
+- :class:`HeadlessWindow` replaces the psychopy Window: nothing is drawn, and each flip advances a simulated time by one frame
+- :class:`VirtualClock` replaces the psychopy Clock, and uses the simulated time of the window
+- :class:`SimulatedMouse` replaces the mouse: it watches which target is active and reaches towards it
+  with a noisy minimum-jerk trajectory
+
+Since no time is spent waiting for the screen to refresh, trials run much faster than real time,
+and the results are stored in a normal psychopy trial handler.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+from typing import Callable
+
+import numpy as np
+
+import vstt.vtypes
+from vstt.experiment import Experiment
+from vstt.geom import points_on_circle
+from vstt.monitor import ExperimentMonitor
+from vstt.task import MotorTask
+from vstt.task import TrialManager
+
+
+class HeadlessWindow:
+    """Stand-in for a psychopy Window where each flip advances a simulated time by one frame"""
+
+    def __init__(self, frame_rate: float = 60.0, size: tuple[int, int] = (1920, 1080)):
+        self.time = 0.0
+        self.frame_period = 1.0 / frame_rate
+        self.size = np.array(size)
+        self.units = "height"
+        self.recordFrameIntervals = False
+        self.nDroppedFrames = 0
+        self.nFrames = 0
+        self.drawn_stimuli: list[NullStim] = []
+        self._to_draw: list[NullStim] = []
+        self._to_call_on_flip: list[tuple[Callable, tuple, dict]] = []
+
+    def draw(self, stim: NullStim) -> None:
+        self._to_draw.append(stim)
+
+    def callOnFlip(self, function: Callable, *args: Any, **kwargs: Any) -> None:
+        self._to_call_on_flip.append((function, args, kwargs))
+
+    def _next_flip_time(self) -> float:
+        return self.time + self.frame_period
+
+    def flip(self) -> float:
+        self.time = self._next_flip_time()
+        self.nFrames += 1
+        self.drawn_stimuli, self._to_draw = self._to_draw, []
+        to_call_on_flip, self._to_call_on_flip = self._to_call_on_flip, []
+        for function, args, kwargs in to_call_on_flip:
+            function(*args, **kwargs)
+        return self.time
+
+    def wait(self, seconds: float) -> None:
+        """Advance the simulated time without drawing anything"""
+        self.time += max(seconds, 0.0)
+
+    def setMouseVisible(self, visible: bool) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class VirtualClock:
+    """Stand-in for a psychopy Clock that uses the simulated time of a HeadlessWindow"""
+
+    def __init__(self, win: HeadlessWindow):
+        self._win = win
+        self._t0 = win.time
+
+    def getTime(self) -> float:
+        return self._win.time - self._t0
+
+    def reset(self, newT: float = 0.0) -> None:
+        self._t0 = self._win.time + newT
+
+
+class NullStim:
+    """Stand-in for a psychopy stimulus which stores its state but doesn't draw anything"""
+
+    def __init__(self, win: HeadlessWindow, pos: tuple[float, float] = (0.0, 0.0)):
+        self.win = win
+        self.pos = np.array(pos, dtype=float)
+        self.vertices: list[tuple[float, float]] = []
+        self.color: Any = None
+
+    def setPos(self, pos: Any) -> None:
+        self.pos = np.array(pos, dtype=float)
+
+    def draw(self) -> None:
+        self.win.draw(self)
+
+
+class NullTargets(NullStim):
+    """Stand-in for the ElementArrayStim of targets, which keeps track of the target colors"""
+
+    def __init__(self, win: HeadlessWindow, xys: np.ndarray, sizes: np.ndarray):
+        super().__init__(win)
+        self.xys = np.array(xys)
+        self.sizes = np.array(sizes)
+        self.nElements = self.xys.shape[0]
+        self.colors = np.zeros((self.nElements, 3))
+
+    def setColors(self, colors: Any, colorSpace: str = "rgb") -> None:
+        self.colors = np.array(colors)
+
+    def active_index(self) -> int | None:
+        """The index of the currently active (red) target, if any"""
+        active = np.flatnonzero(np.all(self.colors == [1, -1, -1], axis=1))
+        return int(active[0]) if active.shape[0] > 0 else None
+
+
+class HeadlessTrialManager(TrialManager):
+    """TrialManager which uses null stimuli and doesn't play any sounds"""
+
+    def _make_stimuli(  # type: ignore[override]
+        self, win: HeadlessWindow, trial: vstt.vtypes.Trial
+    ) -> tuple[NullTargets, list[NullStim] | None, NullStim, NullStim]:
+        sizes = [[2.0 * trial["target_size"]] * 2] * trial["num_targets"]
+        if trial["add_central_target"]:
+            sizes.append([2.0 * trial["central_target_size"]] * 2)
+        targets = NullTargets(
+            win,
+            points_on_circle(
+                trial["num_targets"],
+                trial["target_distance"],
+                include_centre=trial["add_central_target"],
+            ),
+            np.array(sizes),
+        )
+        target_labels = None
+        if trial["show_target_labels"]:
+            target_labels = [
+                NullStim(win, pos)
+                for pos in points_on_circle(
+                    trial["num_targets"], trial["target_distance"]
+                )
+            ]
+        return targets, target_labels, NullStim(win), NullStim(win)
+
+    def _make_sound(self, trial: vstt.vtypes.Trial) -> None:
+        return None
+
+
+def minimum_jerk(
+    start: np.ndarray, end: np.ndarray, fraction: float | np.ndarray
+) -> np.ndarray:
+    """
+    Position along a minimum-jerk trajectory from `start` to `end`
+
+    :param start: The x,y coordinates of the start of the movement
+    :param end: The x,y coordinates of the end of the movement
+    :param fraction: The fraction of the movement time that has elapsed
+    :return: The x,y coordinates at this point of the movement
+    """
+    s = np.clip(fraction, 0.0, 1.0)
+    return start + np.multiply.outer(s**3 * (10.0 - 15.0 * s + 6.0 * s**2), end - start)
+
+
+class SimulatedMouse:
+    """
+    Stand-in for the psychopy Mouse which simulates a participant
+
+    The participant watches the targets drawn on the HeadlessWindow.
+    When a target becomes active, after a reaction time they reach towards it with a minimum-jerk trajectory,
+    with some noise in the end point and in the reaction and movement times.
+    If the reach ends outside the target, a corrective reach is made.
+    The participant does not adapt to any cursor rotation.
+    """
+
+    def __init__(
+        self,
+        win: HeadlessWindow,
+        rng: np.random.Generator | None = None,
+        reaction_time: float = 0.25,
+        movement_time: float = 0.4,
+        endpoint_noise: float = 0.005,
+        timing_noise: float = 0.1,
+    ):
+        self.win = win
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.reaction_time = reaction_time
+        self.movement_time = movement_time
+        self.endpoint_noise = endpoint_noise
+        self.timing_noise = timing_noise
+        self._pos = np.array([0.0, 0.0])
+        self._active_index: int | None = None
+        self._reach: tuple[float, float, np.ndarray, np.ndarray] | None = None
+
+    def setPos(self, pos: Any) -> None:
+        self._pos = np.array(pos, dtype=float)
+        if self._reach is not None:
+            # continue the current reach from the new position
+            t_start, duration, _, end = self._reach
+            t = max(self.win.time, t_start)
+            self._reach = t, duration - (t - t_start), self._pos, end
+
+    def getPos(self) -> np.ndarray:
+        targets = self._drawn_targets()
+        active_index = targets.active_index() if targets is not None else None
+        t = self.win.time
+        if active_index != self._active_index:
+            self._active_index = active_index
+            self._reach = None
+            if targets is not None and active_index is not None:
+                self._plan_reach(
+                    targets, active_index, t + self._noisy(self.reaction_time)
+                )
+        if self._reach is not None:
+            t_start, duration, start, end = self._reach
+            self._pos = minimum_jerk(start, end, (t - t_start) / duration)
+            if t >= t_start + duration and targets is not None:
+                self._reach = None
+                if active_index is not None:
+                    self._plan_corrective_reach(targets, active_index, t)
+        return np.array(self._pos)
+
+    def _noisy(self, value: float) -> float:
+        return value * max(1.0 + self.timing_noise * self.rng.standard_normal(), 0.1)
+
+    def _drawn_targets(self) -> NullTargets | None:
+        for stim in self.win.drawn_stimuli:
+            if isinstance(stim, NullTargets):
+                return stim
+        return None
+
+    def _plan_reach(self, targets: NullTargets, index: int, t_start: float) -> None:
+        end = targets.xys[index] + self.rng.normal(0.0, self.endpoint_noise, 2)
+        self._reach = t_start, self._noisy(self.movement_time), self._pos, end
+
+    def _plan_corrective_reach(
+        self, targets: NullTargets, index: int, t: float
+    ) -> None:
+        radius = 0.5 * targets.sizes[index][0]
+        if np.linalg.norm(targets.xys[index] - self._pos) > radius:
+            self._plan_reach(targets, index, t + self._noisy(0.5 * self.reaction_time))
+
+
+class HeadlessMotorTask(MotorTask):
+    """MotorTask which runs on a HeadlessWindow with a SimulatedMouse"""
+
+    def __init__(
+        self,
+        experiment: Experiment,
+        win: HeadlessWindow | None = None,
+        mouse: SimulatedMouse | None = None,
+        seed: int | None = None,
+        monitor: ExperimentMonitor | None = None,
+    ):
+        if win is None:
+            win = HeadlessWindow()
+        participant_seed, task_seed = np.random.SeedSequence(seed).spawn(2)
+        if mouse is None:
+            mouse = SimulatedMouse(win, np.random.default_rng(participant_seed))
+        self._simulated_mouse = mouse
+        super().__init__(
+            experiment, win, monitor, int(task_seed.generate_state(1, np.uint64)[0])
+        )
+
+    def _make_clock(self) -> VirtualClock:  # type: ignore[override]
+        return VirtualClock(self.win)
+
+    def _make_trial_manager(self, trial: vstt.vtypes.Trial) -> TrialManager:
+        return HeadlessTrialManager(
+            self.win, trial, self._make_clock(), self.stimulus_pool
+        )
+
+    def _make_input_devices(self) -> tuple[SimulatedMouse, None, None]:  # type: ignore[override]
+        return self._simulated_mouse, None, None
+
+    def _do_splash_screen(self) -> None:
+        pass
+
+    def _display_results(
+        self,
+        display_time_seconds: float,
+        enter_to_skip_delay: bool,
+        show_delay_countdown: bool,
+        trial_handler: Any,
+        i_trial: int,
+        all_trials_for_this_condition: bool,
+        mouse_pos: tuple[float, float],
+        stats: Any = None,
+    ) -> None:
+        self.win.wait(display_time_seconds)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import logging
+
 import vstt
 
 
@@ -19,6 +21,10 @@ def default_metadata() -> vstt.vtypes.Metadata:
         "display_duration": 60,
         "show_delay_countdown": True,
         "enter_to_skip_delay": True,
+        "real_time_mode": False,
+        "trajectory_storage": "float64",
+        "trajectory_compression": "none",
+        "trajectory_compression_level": 6,
     }
 
 
@@ -36,8 +42,26 @@ def metadata_labels() -> dict:
         "display_duration": "Display duration (seconds)",
         "show_delay_countdown": "Display a countdown",
         "enter_to_skip_delay": "Skip by pressing enter key",
+        "real_time_mode": "Real time mode (reduce garbage collection pauses, raise priority)",
+        "trajectory_storage": "Store cursor trajectories as",
+        "trajectory_compression": "Compress cursor trajectories in saved files",
+        "trajectory_compression_level": "Compression level (0-9)",
+    }
+
+
+def metadata_choices() -> dict[str, list[str]]:
+    return {
+        "trajectory_storage": ["float64", "float32", "int16"],
+        "trajectory_compression": ["none", "zlib", "lzma"],
     }
 
 
 def import_metadata(metadata_dict: dict) -> vstt.vtypes.Metadata:
-    return vstt.common.import_typed_dict(metadata_dict, default_metadata())
+    metadata = vstt.common.import_typed_dict(metadata_dict, default_metadata())
+    for key, choices in metadata_choices().items():
+        if metadata[key] not in choices:  # type: ignore
+            logging.warning(
+                f"Key '{key}' invalid: expected one of {choices}, got '{metadata[key]}'"  # type: ignore
+            )
+            metadata[key] = default_metadata()[key]  # type: ignore
+    return metadata
@@ -9,6 +9,7 @@ from qtpy.QtCore import Qt
 
 from vstt.experiment import Experiment
 from vstt.meta import default_metadata
+from vstt.meta import metadata_choices
 from vstt.meta import metadata_labels
 from vstt.vis import splash_screen
 
@@ -25,6 +26,7 @@ class MetadataWidget(QtWidgets.QWidget):
         self._str_widgets: dict[str, QtWidgets.QLineEdit] = {}
         self._bool_widgets: dict[str, QtWidgets.QCheckBox] = {}
         self._float_widgets: dict[str, QtWidgets.QDoubleSpinBox] = {}
+        self._choice_widgets: dict[str, QtWidgets.QComboBox] = {}
 
         outer_layout = QtWidgets.QVBoxLayout()
         group_box = QtWidgets.QGroupBox("Metadata")
@@ -38,8 +40,18 @@ class MetadataWidget(QtWidgets.QWidget):
         fields = QtWidgets.QWidget()
         fields.setLayout(fields_layout)
         labels = metadata_labels()
+        choices = metadata_choices()
         for row_index, (key, value) in enumerate(default_metadata().items()):
-            if isinstance(value, str):
+            if key in choices:
+                lbl = QtWidgets.QLabel(f"{labels[key]}:", self)
+                lbl.setAlignment(Qt.AlignRight)
+                fields_layout.addWidget(lbl, row_index, 0)
+                combo_box = QtWidgets.QComboBox(self)
+                combo_box.addItems(choices[key])
+                fields_layout.addWidget(combo_box, row_index, 1)
+                combo_box.textActivated.connect(self._update_value_callback(key))
+                self._choice_widgets[key] = combo_box
+            elif isinstance(value, str):
                 lbl = QtWidgets.QLabel(f"{labels[key]}:", self)
                 lbl.setAlignment(Qt.AlignRight)
                 fields_layout.addWidget(lbl, row_index, 0)
@@ -98,3 +110,5 @@ class MetadataWidget(QtWidgets.QWidget):
             bool_widget.setChecked(self._experiment.metadata[key])  # type: ignore
         for key, float_widget in self._float_widgets.items():
             float_widget.setValue(self._experiment.metadata[key])  # type: ignore
+        for key, choice_widget in self._choice_widgets.items():
+            choice_widget.setCurrentText(self._experiment.metadata[key])  # type: ignore
@@ -0,0 +1,251 @@
+"""
+Live monitor of the results of an experiment while it is running
+
+After each trial the MotorTask publishes a few scalar statistics for the trial to a queue.
+Publishing never blocks: if the queue is full the statistics for the trial are dropped.
+A separate process with a lower priority reads the queue and displays the running totals in a Qt window,
+so the experimenter can follow the session without affecting the participant's frame loop.
+The same monitor window is reset and re-used for each run of the experiment,
+and is closed by the process that started it.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import multiprocessing
+import os
+import queue
+from typing import TYPE_CHECKING
+from typing import Any
+
+import numpy as np
+
+import vstt
+
+if TYPE_CHECKING:
+    from vstt.task import TrialData
+
+# messages to the monitor window, in addition to the trial summaries
+_reset_message = "reset"
+_close_message = "close"
+
+
+def trial_summary(
+    trial_data: TrialData, i_trial: int, condition_index: int
+) -> dict[str, float]:
+    """
+    Scalar statistics for a trial
+
+    :param trial_data: The data from the trial
+    :param i_trial: The index of the trial
+    :param condition_index: The index of the trial condition
+    :return: A dict of scalar statistics
+    """
+    reaction_times = []
+    times = []
+    frame_intervals = [np.zeros(0)]
+    for timestamps, positions, n_before_visible in zip(
+        trial_data.to_target_timestamps,
+        trial_data.to_target_mouse_positions,
+        trial_data.to_target_num_timestamps_before_visible,
+    ):
+        reaction_times.append(
+            vstt.stats._reaction_time(timestamps, positions, n_before_visible)
+        )
+        times.append(vstt.stats._total_time(timestamps, n_before_visible))
+        frame_intervals.append(np.diff(timestamps))
+    for timestamps in trial_data.to_center_timestamps:
+        frame_intervals.append(np.diff(timestamps))
+    intervals = np.concatenate(frame_intervals)
+    dropped_frames = 0
+    max_frame_interval = np.nan
+    if intervals.shape[0] > 0:
+        max_frame_interval = float(np.max(intervals))
+        # a frame is dropped if the interval is much longer than the typical interval
+        dropped_frames = int(np.sum(intervals > 1.5 * np.median(intervals)))
+    n_targets = len(trial_data.to_target_success)
+    return {
+        "i_trial": i_trial,
+        "condition_index": condition_index,
+        "num_targets": n_targets,
+        "num_successful_targets": int(np.sum(trial_data.to_target_success)),
+        "to_target_reaction_time": _nanmean(reaction_times),
+        "to_target_time": _nanmean(times),
+        "num_frames": int(intervals.shape[0]),
+        "num_dropped_frames": dropped_frames,
+        "max_frame_interval": max_frame_interval,
+    }
+
+
+def _nanmean(values: list[float]) -> float:
+    values_array = np.array(values, dtype=float)
+    if np.all(np.isnan(values_array)):
+        return np.nan
+    return float(np.nanmean(values_array))
+
+
+class MonitorTotals:
+    """The running totals of the trial summaries received by the monitor"""
+
+    def __init__(self) -> None:
+        self.num_trials = 0
+        self.num_targets = 0
+        self.num_successful_targets = 0
+        self.num_frames = 0
+        self.num_dropped_frames = 0
+        self.max_frame_interval = 0.0
+        self._reaction_times: list[float] = []
+        self._times: list[float] = []
+
+    def add(self, summary: dict[str, float]) -> None:
+        self.num_trials += 1
+        self.num_targets += int(summary["num_targets"])
+        self.num_successful_targets += int(summary["num_successful_targets"])
+        self.num_frames += int(summary["num_frames"])
+        self.num_dropped_frames += int(summary["num_dropped_frames"])
+        self.max_frame_interval = float(
+            np.nanmax([self.max_frame_interval, summary["max_frame_interval"]])
+        )
+        self._reaction_times.append(summary["to_target_reaction_time"])
+        self._times.append(summary["to_target_time"])
+
+    def as_dict(self) -> dict[str, str]:
+        """The running totals as labelled strings for display"""
+        success = np.nan
+        if self.num_targets > 0:
+            success = 100.0 * self.num_successful_targets / self.num_targets
+        return {
+            "Trials": f"{self.num_trials}",
+            "Targets": f"{self.num_targets}",
+            "Success rate": f"{success:.1f}%",
+            "Reaction time": f"{_nanmean(self._reaction_times):.3f}s",
+            "Time to target": f"{_nanmean(self._times):.3f}s",
+            "Dropped frames": f"{self.num_dropped_frames} / {self.num_frames}",
+            "Longest frame": f"{1000.0 * self.max_frame_interval:.1f}ms",
+        }
+
+
+class ExperimentMonitor:
+    """Publishes trial summaries to a monitor window running in a separate process"""
+
+    def __init__(self, max_queue_size: int = 1000, queue: Any = None):
+        """
+        :param max_queue_size: The maximum number of messages waiting in the queue
+        :param queue: The queue of an existing monitor, e.g. to publish from a task running in another process
+        """
+        self._context = multiprocessing.get_context("spawn")
+        self.queue: Any = (
+            queue if queue is not None else self._context.Queue(max_queue_size)
+        )
+        self.num_dropped = 0
+        self._process: Any = None
+
+    def start(self) -> None:
+        """Start the monitor window in a separate process, unless it is already running"""
+        if self.is_running():
+            return
+        self._process = self._context.Process(
+            target=_run_monitor_window, args=(self.queue,), daemon=True
+        )
+        self._process.start()
+
+    def is_running(self) -> bool:
+        """True if the monitor window process is running"""
+        return self._process is not None and self._process.is_alive()
+
+    def reset(self) -> None:
+        """Clear the running totals, e.g. at the start of a new run of the experiment"""
+        self.num_dropped = 0
+        self._put(_reset_message)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Close the monitor window and wait for its process to exit
+
+        :param timeout: The time in seconds to wait before the process is terminated
+        """
+        if self._process is None:
+            return
+        self._put(_close_message)
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._process = None
+
+    def publish(self, summary: dict[str, float]) -> None:
+        """Add a trial summary to the queue without waiting"""
+        self._put(summary)
+
+    def _put(self, message: Any) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.num_dropped += 1
+
+    def finish(self) -> None:
+        """Tell the monitor that the experiment has finished"""
+        self.publish({})
+
+
+def _lower_priority() -> None:
+    if hasattr(os, "nice"):
+        with contextlib.suppress(OSError):
+            os.nice(10)
+    if hasattr(os, "sched_getaffinity"):
+        with contextlib.suppress(OSError):
+            cpus = sorted(os.sched_getaffinity(0))
+            if len(cpus) > 1:
+                # real time mode pins the experiment to the last cpu: avoid it
+                os.sched_setaffinity(0, cpus[:-1])
+
+
+def _run_monitor_window(summaries: Any) -> None:
+    from qtpy import QtCore
+    from qtpy import QtWidgets
+
+    _lower_priority()
+    app = QtWidgets.QApplication([])
+    totals = MonitorTotals()
+    widget = QtWidgets.QWidget()
+    widget.setWindowTitle("VSTT experiment monitor")
+    layout = QtWidgets.QFormLayout()
+    labels = {}
+    for name, value in totals.as_dict().items():
+        labels[name] = QtWidgets.QLabel(value)
+        layout.addRow(f"{name}:", labels[name])
+    status = QtWidgets.QLabel("Running")
+    layout.addRow("Status:", status)
+    widget.setLayout(layout)
+
+    def update_labels() -> None:
+        for name, value in totals.as_dict().items():
+            labels[name].setText(value)
+
+    def update() -> None:
+        nonlocal totals
+        while True:
+            try:
+                summary = summaries.get_nowait()
+            except queue.Empty:
+                return
+            if summary == _close_message:
+                app.quit()
+                return
+            if summary == _reset_message:
+                totals = MonitorTotals()
+                update_labels()
+                status.setText("Running")
+                continue
+            if not summary:
+                status.setText("Finished")
+                continue
+            totals.add(summary)
+            update_labels()
+            status.setText(f"Running (condition {summary['condition_index']})")
+
+    timer = QtCore.QTimer()
+    timer.timeout.connect(update)
+    timer.start(250)
+    widget.show()
+    app.exec()
@@ -0,0 +1,229 @@
+"""
+Offscreen rasterizer for results images
+
+Draws the same elements as the results display of :mod:`vstt.vis`
+(targets, paths, areas and stats text) directly into a Pillow image,
+without a psychopy window or an OpenGL context.
+This means results images can be generated on machines without a display,
+and in parallel in multiple processes.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+from PIL import ImageDraw
+from PIL import ImageFont
+from psychopy.colors import colorNames
+from psychopy.data import TrialHandlerExt
+
+from vstt.session import SessionData
+from vstt.stats import stats_dataframe
+from vstt.vis import colors
+from vstt.vis import make_stats_scene
+from vstt.vis import select_stats
+from vstt.vtypes import DisplayOptions
+
+# the default background color of a psychopy window
+background_color = (128, 128, 128)
+
+# pillow anchors corresponding to the psychopy TextBox2 anchors used in the results display
+_text_anchors = {"center": "mm", "top_center": "ma", "top_left": "la"}
+_text_alignments = {"center": "center", "top_center": "center", "top_left": "left"}
+
+
+def _to_rgb(color: Any) -> tuple[int, int, int]:
+    if isinstance(color, str):
+        color = colorNames[color]
+    # psychopy rgb colors have components in the range [-1, 1]
+    rgb = np.clip(np.rint(127.5 * (np.asarray(color, dtype=float)[:3] + 1.0)), 0, 255)
+    return int(rgb[0]), int(rgb[1]), int(rgb[2])
+
+
+def _font(size: float) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", max(int(size), 1))
+    except OSError:
+        return ImageFont.load_default(max(int(size), 1))
+
+
+class _Canvas:
+    """Converts from psychopy height units to pixels, and draws scene elements"""
+
+    def __init__(self, image: Image.Image, pixel_scale: int):
+        self.image = image
+        self.pixel_scale = pixel_scale
+        self.draw = ImageDraw.Draw(image)
+        self.width, self.height = image.size
+
+    def to_pixels(self, points: Any) -> np.ndarray:
+        xy = np.asarray(points, dtype=float).reshape(-1, 2)
+        return np.stack(
+            [
+                0.5 * self.width + xy[:, 0] * self.height,
+                0.5 * self.height - xy[:, 1] * self.height,
+            ],
+            axis=1,
+        )
+
+    def text(self, kwargs: dict[str, Any]) -> None:
+        anchor = kwargs.get("anchor", "center")
+        ((x, y),) = self.to_pixels(kwargs["pos"])
+        self.draw.multiline_text(
+            (x, y),
+            kwargs["text"].rstrip("\n"),
+            fill=_to_rgb(kwargs["color"]),
+            font=_font(kwargs["letterHeight"] * self.height),
+            anchor=_text_anchors[anchor],
+            align=_text_alignments[kwargs.get("alignment", anchor)],
+        )
+
+    def circle(self, kwargs: dict[str, Any]) -> None:
+        ((x, y),) = self.to_pixels(kwargs["pos"])
+        r = kwargs["radius"] * self.height
+        self.draw.ellipse(
+            (x - r, y - r, x + r, y + r), fill=_to_rgb(kwargs["fillColor"])
+        )
+
+    def shape(self, kwargs: dict[str, Any]) -> None:
+        vertices = self.to_pixels(kwargs["vertices"])
+        # psychopy line widths are in pixels
+        width = max(int(round(kwargs["lineWidth"] * self.pixel_scale)), 1)
+        line_color = _to_rgb(kwargs["lineColor"])
+        if kwargs.get("closeShape", False):
+            if vertices.shape[0] > 2:
+                self.draw.polygon(
+                    [tuple(v) for v in vertices],
+                    fill=_to_rgb(kwargs["fillColor"]),
+                    outline=line_color,
+                    width=width,
+                )
+            return
+        # NaN vertices separate the individual paths of a batched line
+        is_nan = np.isnan(vertices[:, 0])
+        for path in np.split(vertices, np.flatnonzero(is_nan)):
+            path = path[~np.isnan(path[:, 0])]
+            if path.shape[0] > 1:
+                self.draw.line(
+                    [tuple(v) for v in path],
+                    fill=line_color,
+                    width=width,
+                    joint="curve",
+                )
+
+
+def rasterize_results(
+    trial_handler: TrialHandlerExt,
+    display_options: DisplayOptions,
+    i_trial: int,
+    all_trials_for_this_condition: bool,
+    size: tuple[int, int] = (1920, 1080),
+    stats_df: pd.DataFrame | None = None,
+    supersample: int = 2,
+) -> Image.Image:
+    """
+    Draw the results display for a trial or condition into an image
+
+    :param trial_handler: The trial handler with the results
+    :param display_options: The display options
+    :param i_trial: The index of the trial
+    :param all_trials_for_this_condition: Draw all the trials with the same condition as this trial
+    :param size: The width and height of the image in pixels
+    :param stats_df: The stats dataframe of the trial handler, calculated if not supplied
+    :param supersample: Draw at this multiple of the image size, then downsample to smooth the edges
+    :return: The image
+    """
+    if stats_df is None:
+        stats_df = stats_dataframe(trial_handler)
+    supersample = max(int(supersample), 1)
+    canvas = _Canvas(
+        Image.new(
+            "RGB", (size[0] * supersample, size[1] * supersample), background_color
+        ),
+        supersample,
+    )
+    scene = make_stats_scene(
+        trial_handler,
+        display_options,
+        select_stats(stats_df, i_trial, all_trials_for_this_condition),
+        np.array(size),
+        all_trials_for_this_condition,
+    )
+    for name, kwargs in scene:
+        if name == "TextBox2":
+            canvas.text(kwargs)
+        elif name == "Circle":
+            canvas.circle(kwargs)
+        else:
+            canvas.shape(kwargs)
+    if supersample == 1:
+        return canvas.image
+    return canvas.image.resize(size, Image.Resampling.LANCZOS)
+
+
+def rasterize_thumbnail(
+    session_data: SessionData, i_trial: int, size: int = 48, supersample: int = 4
+) -> Image.Image:
+    """
+    Draw a small image of the targets and cursor paths of a trial
+
+    The image is scaled to fit the targets and paths, and has no text.
+
+    :param session_data: The results
+    :param i_trial: The index of the trial
+    :param size: The width and height of the image in pixels
+    :param supersample: Draw at this multiple of the image size, then downsample to smooth the edges
+    :return: The image
+    """
+    supersample = max(int(supersample), 1)
+    canvas = _Canvas(
+        Image.new("RGB", (size * supersample, size * supersample), background_color),
+        supersample,
+    )
+    rows = session_data.trial_rows(i_trial)
+    target_indices = session_data.target_index[rows]
+    target_positions = session_data.target_pos[rows]
+    target_radius = session_data.target_radius[rows].max(initial=0.0)
+    center_radius = session_data.center_radius[rows].max(initial=0.0)
+    # only decompresses the trajectories of this trial if the results are compressed
+    to_target_paths = [
+        session_data.movement("to_target", i)[1] for i in range(rows.start, rows.stop)
+    ]
+    to_center_paths = [
+        session_data.movement("to_center", i)[1] for i in range(rows.start, rows.stop)
+    ]
+    points = [np.zeros((1, 2)), target_positions, *to_target_paths, *to_center_paths]
+    # scale so the targets and paths fill the image, with a margin of a target radius
+    extent = np.nanmax(np.abs(np.concatenate(points))) + target_radius
+    scale = 0.5 / max(extent, 1e-6)
+    canvas.circle(
+        dict(
+            pos=(0.0, 0.0),
+            radius=scale * center_radius,
+            fillColor=(0.1, 0.1, 0.1),
+        )
+    )
+    for target_index, target_pos in zip(target_indices, target_positions):
+        canvas.circle(
+            dict(
+                pos=scale * target_pos,
+                radius=scale * target_radius,
+                fillColor=colors[int(target_index)],
+            )
+        )
+    for path in to_center_paths:
+        canvas.shape(dict(vertices=scale * path, lineColor="black", lineWidth=1))
+    for target_index, path in zip(target_indices, to_target_paths):
+        canvas.shape(
+            dict(
+                vertices=scale * path,
+                lineColor=colors[int(target_index)],
+                lineWidth=1,
+            )
+        )
+    if supersample == 1:
+        return canvas.image
+    return canvas.image.resize((size, size), Image.Resampling.LANCZOS)
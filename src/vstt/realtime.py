@@ -0,0 +1,109 @@
+"""
+Optional measures to reduce dropped frames during the trial loop
+
+Python's cyclic garbage collector can pause the main thread for several milliseconds,
+which occasionally results in one or more dropped frames while a target is displayed.
+When real time mode is enabled:
+
+- all objects that exist when the task starts are frozen, so the garbage collector ignores them
+- automatic garbage collection is disabled while targets are displayed, and done between trials instead
+- on linux the scheduling priority of the main thread is raised and it is pinned to a single CPU, if permitted
+
+Each of these is applied on a best effort basis, and whether it was actually active is recorded.
+"""
+
+from __future__ import annotations
+
+import gc
+import logging
+import os
+
+
+def default_real_time_status() -> dict[str, bool]:
+    return {
+        "gc_frozen": False,
+        "high_priority": False,
+        "cpu_affinity": False,
+    }
+
+
+class RealTimeMode:
+    def __init__(self, enabled: bool, niceness: int = -10):
+        self.enabled = enabled
+        self.niceness = niceness
+        self.status = default_real_time_status()
+        self._gc_was_enabled = gc.isenabled()
+        self._original_niceness: int | None = None
+        self._original_affinity: set[int] | None = None
+
+    def start(self) -> None:
+        """Apply real time settings, to be called once before the first trial"""
+        if not self.enabled:
+            return
+        self._gc_was_enabled = gc.isenabled()
+        gc.collect()
+        gc.freeze()
+        self.status["gc_frozen"] = True
+        self.status["high_priority"] = self._raise_priority()
+        self.status["cpu_affinity"] = self._pin_cpu()
+        logging.info(f"Real time mode status: {self.status}")
+
+    def begin_targets(self) -> None:
+        """Disable automatic garbage collection while targets are displayed"""
+        if self.enabled:
+            gc.disable()
+
+    def end_targets(self) -> None:
+        """Re-enable garbage collection and collect garbage in the gap between trials"""
+        if not self.enabled:
+            return
+        if self._gc_was_enabled:
+            gc.enable()
+        gc.collect()
+
+    def stop(self) -> None:
+        """Restore the original settings, to be called once after the last trial"""
+        if not self.enabled:
+            return
+        if self.status["gc_frozen"]:
+            gc.unfreeze()
+        if self._gc_was_enabled:
+            gc.enable()
+        if self.status["high_priority"] and self._original_niceness is not None:
+            try:
+                os.setpriority(os.PRIO_PROCESS, 0, self._original_niceness)
+            except OSError as e:
+                logging.debug(f"Failed to restore priority: {e}")
+        if self.status["cpu_affinity"] and self._original_affinity is not None:
+            try:
+                os.sched_setaffinity(0, self._original_affinity)
+            except OSError as e:
+                logging.debug(f"Failed to restore cpu affinity: {e}")
+
+    def _raise_priority(self) -> bool:
+        if not hasattr(os, "setpriority"):
+            return False
+        try:
+            self._original_niceness = os.getpriority(os.PRIO_PROCESS, 0)
+            # on linux this only applies to the calling (main) thread
+            os.setpriority(os.PRIO_PROCESS, 0, self.niceness)
+            return os.getpriority(os.PRIO_PROCESS, 0) == self.niceness
+        except OSError as e:
+            logging.info(f"Could not raise scheduling priority: {e}")
+            return False
+
+    def _pin_cpu(self) -> bool:
+        if not hasattr(os, "sched_setaffinity"):
+            return False
+        try:
+            self._original_affinity = os.sched_getaffinity(0)
+            if len(self._original_affinity) < 2:
+                # nothing to gain from pinning on a single cpu
+                return False
+            # avoid cpu 0 which typically handles most of the interrupts
+            cpu = max(self._original_affinity)
+            os.sched_setaffinity(0, {cpu})
+            return os.sched_getaffinity(0) == {cpu}
+        except OSError as e:
+            logging.info(f"Could not set cpu affinity: {e}")
+            return False
@@ -0,0 +1,122 @@
+"""
+Batch export of results images
+
+Renders the results image of every trial and/or every condition of an experiment to a folder,
+using the offscreen rasterizer from :mod:`vstt.raster` in a pool of worker processes.
+The stats are calculated once and sent to each worker when it starts.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import pandas as pd
+from psychopy.data import TrialHandlerExt
+
+from vstt.experiment import Experiment
+from vstt.raster import rasterize_results
+from vstt.vtypes import DisplayOptions
+
+# the results of the experiment in each worker process
+_worker_results: dict[str, Any] = {}
+
+
+def list_images(stats_df: pd.DataFrame, per: str) -> list[tuple[int, bool, str]]:
+    """
+    The images to render for a stats dataframe
+
+    :param stats_df: The stats dataframe
+    :param per: "trial", "condition" or "all" for both
+    :return: A list of (trial index, all trials for this condition, image file name) for each image
+    """
+    images = []
+    if per in ["trial", "all"]:
+        trial_indices = stats_df.i_trial.unique()
+        width = len(str(max(trial_indices, default=0)))
+        images += [(int(i), False, f"trial_{i:0{width}d}.png") for i in trial_indices]
+    if per in ["condition", "all"]:
+        first_trials = stats_df.groupby("condition_index").i_trial.min()
+        width = len(str(max(first_trials.index, default=0)))
+        images += [
+            (int(i_trial), True, f"condition_{condition_index:0{width}d}.png")
+            for condition_index, i_trial in first_trials.items()
+        ]
+    return images
+
+
+def _init_worker(
+    trial_handler: TrialHandlerExt,
+    display_options: DisplayOptions,
+    stats_df: pd.DataFrame,
+    size: tuple[int, int],
+) -> None:
+    _worker_results.update(
+        trial_handler=trial_handler,
+        display_options=display_options,
+        stats_df=stats_df,
+        size=size,
+    )
+
+
+def _render_image(
+    i_trial: int, all_trials_for_this_condition: bool, filename: str
+) -> str:
+    rasterize_results(
+        _worker_results["trial_handler"],
+        _worker_results["display_options"],
+        i_trial,
+        all_trials_for_this_condition,
+        size=_worker_results["size"],
+        stats_df=_worker_results["stats_df"],
+    ).save(filename)
+    return filename
+
+
+def render_images(
+    experiment: Experiment,
+    folder: str | pathlib.Path,
+    per: str = "all",
+    jobs: int = 1,
+    size: tuple[int, int] = (1920, 1080),
+) -> tuple[list[str], float]:
+    """
+    Render results images for an experiment to a folder
+
+    :param experiment: The experiment with results
+    :param folder: The folder to write the png images to, created if it doesn't exist
+    :param per: "trial", "condition" or "all" for both
+    :param jobs: The number of worker processes to use
+    :param size: The width and height of the images in pixels
+    :return: The filenames of the images, and the time taken in seconds
+    """
+    if experiment.trial_handler_with_results is None or experiment.stats is None:
+        raise RuntimeError("Experiment has no results to render")
+    t0 = time.perf_counter()
+    folder = pathlib.Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    images = [
+        (i_trial, all_trials, str(folder / filename))
+        for i_trial, all_trials, filename in list_images(experiment.stats, per)
+    ]
+    init_args = (
+        experiment.trial_handler_with_results,
+        experiment.display_options,
+        experiment.stats,
+        size,
+    )
+    if jobs <= 1:
+        _init_worker(*init_args)
+        filenames = [_render_image(*image) for image in images]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=init_args,
+        ) as executor:
+            filenames = list(executor.map(_render_image, *zip(*images)))
+    return filenames, time.perf_counter() - t0
@@ -0,0 +1,218 @@
+"""
+Replay recorded cursor trajectories through the task logic
+
+The recorded cursor positions and timestamps of an experiment are fed back through
+the trial logic of :class:`vstt.task.MotorTask` using the headless backend, as fast as possible.
+Each simulated frame advances the time to the next recorded timestamp,
+and the cursor is at the recorded position for this timestamp.
+If the recorded data for a trial runs out, the cursor stays at the final recorded position.
+
+With unchanged trial conditions this reproduces the recorded success flags and target timings,
+which allows changes to the task logic to be regression tested.
+With modified trial conditions, e.g. a different ``target_size`` or ``ignore_incorrect_targets``,
+it re-scores the recorded movements as if they had been made with these conditions.
+"""
+
+from __future__ import annotations
+
+import copy
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from psychopy.data import TrialHandlerExt
+
+import vstt.vtypes
+from vstt.compression import trial_trajectories
+from vstt.experiment import Experiment
+from vstt.geom import PointRotator
+from vstt.headless import HeadlessMotorTask
+from vstt.headless import HeadlessWindow
+from vstt.headless import SimulatedMouse
+from vstt.schedule import Schedule
+from vstt.session import decode_positions
+from vstt.session import decode_timestamps
+from vstt.task import TrialManager
+
+
+class ReplayWindow(HeadlessWindow):
+    """HeadlessWindow where each flip advances the time to the next recorded timestamp"""
+
+    def __init__(self, frame_rate: float = 60.0):
+        super().__init__(frame_rate)
+        self._t0 = 0.0
+        self._timestamps = np.array([])
+        self._positions = np.zeros((0, 2))
+        self._index = -1
+        self.position = np.array([0.0, 0.0])
+
+    def start_trial(self, timestamps: np.ndarray, positions: np.ndarray) -> None:
+        self._t0 = self.time
+        self._timestamps = timestamps
+        self._positions = positions
+        self._index = -1
+
+    def _next_flip_time(self) -> float:
+        if self._index + 1 >= self._timestamps.shape[0]:
+            # no recorded data left: cursor stays at the final recorded position
+            return super()._next_flip_time()
+        self._index += 1
+        self.position = self._positions[self._index]
+        return max(self.time, self._t0 + self._timestamps[self._index])
+
+
+class ReplayMouse(SimulatedMouse):
+    """SimulatedMouse which returns the recorded position of the ReplayWindow"""
+
+    def __init__(self, win: ReplayWindow):
+        super().__init__(win)
+        self._win = win
+        self._inverse_rotator = PointRotator(0.0)
+
+    def set_cursor_rotation(self, cursor_rotation_degrees: float) -> None:
+        # recorded positions are cursor positions, the task rotates the mouse position to get these
+        self._inverse_rotator = PointRotator(-cursor_rotation_degrees)
+
+    def setPos(self, pos: Any) -> None:
+        pass
+
+    def getPos(self) -> np.ndarray:
+        x, y = self._win.position
+        return np.array(self._inverse_rotator((x, y)))
+
+
+def _recorded_target_indices(
+    trial_handler: TrialHandlerExt, i_trial: int
+) -> np.ndarray | None:
+    target_indices = trial_handler.data["target_indices"][i_trial][0]
+    # trials that have not yet happened have a default string instead of an array in their data
+    if type(target_indices) is not np.ndarray:
+        return None
+    return target_indices
+
+
+def _recorded_samples(
+    trial_handler: TrialHandlerExt, i_trial: int
+) -> tuple[np.ndarray, np.ndarray]:
+    timestamps = [np.zeros(0)]
+    positions = [np.zeros((0, 2))]
+    target_indices = _recorded_target_indices(trial_handler, i_trial)
+    n_targets = 0 if target_indices is None else target_indices.shape[0]
+    trajectories = trial_trajectories(trial_handler, i_trial) if n_targets > 0 else {}
+    for i_target in range(n_targets):
+        for dest in ["target", "center"]:
+            key = f"to_{dest}_timestamps"
+            if i_target >= len(trajectories.get(key, [])):
+                continue
+            ts = decode_timestamps(trajectories[key][i_target])
+            if ts.shape[0] == 0:
+                continue
+            timestamps.append(ts)
+            positions.append(
+                decode_positions(trajectories[f"to_{dest}_mouse_positions"][i_target])
+            )
+    all_timestamps = np.concatenate(timestamps)
+    order = np.argsort(all_timestamps, kind="stable")
+    return all_timestamps[order], np.concatenate(positions)[order]
+
+
+class ReplayMotorTask(HeadlessMotorTask):
+    """HeadlessMotorTask which replays the recorded trajectories from `recorded_trial_handler`"""
+
+    def __init__(self, experiment: Experiment, recorded_trial_handler: TrialHandlerExt):
+        self._recorded_trial_handler = recorded_trial_handler
+        win = ReplayWindow()
+        super().__init__(experiment, win, ReplayMouse(win))
+        if experiment.trial_list:
+            # use the recorded order of the targets of each trial
+            self.schedule = Schedule.from_trial_handler(
+                self.trial_handler,
+                self.schedule.seed,
+                [
+                    _recorded_target_indices(recorded_trial_handler, i_trial)
+                    for i_trial in range(len(self.schedule))
+                ],
+            )
+            self.trial_handler.extraInfo["schedule"] = self.schedule.as_dict()
+
+    def _do_trial(
+        self,
+        trial: dict[str, Any],
+        trial_manager: TrialManager,
+        initial_cursor_pos: tuple[float, float],
+        condition_timeout: float,
+    ) -> tuple[float, float]:
+        i_trial = self.trial_handler.thisTrialN
+        timestamps, positions = _recorded_samples(self._recorded_trial_handler, i_trial)
+        self.win.start_trial(timestamps, positions)
+        self.mouse.set_cursor_rotation(trial["cursor_rotation_degrees"])
+        return super()._do_trial(
+            trial, trial_manager, initial_cursor_pos, condition_timeout
+        )
+
+
+def replay_experiment(
+    experiment: Experiment, trial_list: list[vstt.vtypes.Trial] | None = None
+) -> Experiment:
+    """
+    Replay the recorded trajectories of an experiment through the task logic
+
+    :param experiment: The experiment with results to replay
+    :param trial_list: Optional modified trial conditions to use instead of those of the experiment
+    :return: A new experiment with the results of the replay
+    """
+    if experiment.trial_handler_with_results is None:
+        raise RuntimeError("Experiment has no results to replay")
+    replayed = Experiment()
+    replayed.filename = experiment.filename
+    replayed.metadata = copy.deepcopy(experiment.metadata)
+    replayed.metadata["real_time_mode"] = False
+    replayed.display_options = copy.deepcopy(experiment.display_options)
+    replayed.trial_list = copy.deepcopy(
+        trial_list if trial_list is not None else experiment.trial_list
+    )
+    for trial in replayed.trial_list:
+        # recorded positions are replayed directly, whether they came from a mouse or a joystick
+        trial["use_joystick"] = False
+        trial["play_sound"] = False
+    ReplayMotorTask(replayed, experiment.trial_handler_with_results).run()
+    return replayed
+
+
+def compare_replay(
+    recorded_stats: pd.DataFrame,
+    replayed_stats: pd.DataFrame,
+    time_tolerance: float = 1e-6,
+) -> pd.DataFrame:
+    """
+    Compare the success flags and target timings of recorded and replayed results
+
+    :param recorded_stats: The stats dataframe of the recorded experiment
+    :param replayed_stats: The stats dataframe of the replayed experiment
+    :param time_tolerance: The maximum allowed difference between timestamps
+    :return: The targets whose success flags or timings differ
+    """
+    columns = ["i_trial", "i_target"]
+    values = []
+    for dest in ["target", "center"]:
+        values += [f"to_{dest}_success", f"to_{dest}_time"]
+    df = pd.merge(
+        recorded_stats[columns + values],
+        replayed_stats[columns + values],
+        on=columns,
+        how="outer",
+        suffixes=("_recorded", "_replayed"),
+        indicator=True,
+    )
+    mismatch = df["_merge"] != "both"
+    for value in values:
+        recorded = df[f"{value}_recorded"]
+        replayed = df[f"{value}_replayed"]
+        if value.endswith("_success"):
+            mismatch |= recorded.astype(bool) != replayed.astype(bool)
+        else:
+            difference = np.abs(recorded.astype(float) - replayed.astype(float))
+            mismatch |= (difference > time_tolerance) | (
+                recorded.isna() != replayed.isna()
+            )
+    return df.loc[mismatch].drop(columns=["_merge"])
@@ -1,16 +1,323 @@
 from __future__ import annotations
 
+import json
 import logging
 import pathlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
 
 import numpy as np
+import pandas as pd
+from PIL import Image
 from psychopy.visual.window import Window
+from qtpy import QtCore
+from qtpy import QtGui
 from qtpy import QtWidgets
 from qtpy.compat import getsavefilename
 
 from vstt.experiment import Experiment
+from vstt.raster import rasterize_thumbnail
+from vstt.session import SessionData
+from vstt.stats import stats_summary
+from vstt.viewer_widget import ResultsViewer
 from vstt.vis import display_results
 
+# the width and height in pixels of the trial thumbnails in the results list
+thumbnail_size = 48
+# the maximum number of thumbnail pixmaps to keep in memory
+max_thumbnail_cache_size = 2000
+# the maximum number of thumbnails waiting to be rendered: older requests are cancelled
+max_pending_thumbnails = 64
+
+
+def thumbnail_folder(filename: pathlib.Path) -> pathlib.Path:
+    """
+    The folder of saved thumbnails for an experiment file, with any thumbnails of previous results removed
+
+    The folder contains an ``index.json`` with the modification time and size of the experiment file
+    that the thumbnails were rendered from, and the size of the thumbnails.
+    If these don't match, e.g. because the file was overwritten with new results, the saved thumbnails are deleted.
+
+    :param filename: The psydat file of the experiment
+    :return: The ``<name>_thumbnails`` folder next to the experiment file
+    """
+    folder = filename.with_name(f"{filename.stem}_thumbnails")
+    stat = filename.stat()
+    index = {
+        "psydat_mtime_ns": stat.st_mtime_ns,
+        "psydat_size": stat.st_size,
+        "thumbnail_size": thumbnail_size,
+    }
+    index_file = folder / "index.json"
+    try:
+        if json.loads(index_file.read_text()) == index:
+            return folder
+    except (OSError, ValueError):
+        pass
+    for thumbnail in folder.glob("trial_*.png"):
+        thumbnail.unlink()
+    folder.mkdir(parents=True, exist_ok=True)
+    index_file.write_text(json.dumps(index))
+    return folder
+
+
+def _load_or_render_thumbnail(
+    session_data: SessionData, i_trial: int, folder: pathlib.Path | None
+) -> Image.Image:
+    if folder is None:
+        return rasterize_thumbnail(session_data, i_trial, thumbnail_size)
+    filename = folder / f"trial_{i_trial}.png"
+    if filename.is_file():
+        with Image.open(filename) as image:
+            return image.convert("RGB")
+    image = rasterize_thumbnail(session_data, i_trial, thumbnail_size)
+    folder.mkdir(parents=True, exist_ok=True)
+    image.save(filename)
+    return image
+
+
+class ThumbnailLoader(QtCore.QObject):
+    """
+    Renders trial thumbnails in a worker thread and keeps the most recently used pixmaps
+
+    Thumbnails are only rendered when they are requested, i.e. when a row is displayed.
+    If a folder is set, thumbnails are loaded from this folder if they exist, and saved to it otherwise.
+    """
+
+    thumbnail_ready = QtCore.Signal(int)
+    # emitted from the worker thread, received in the gui thread
+    _finished = QtCore.Signal(object, int, object)
+
+    def __init__(self, parent: QtCore.QObject | None = None):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pixmaps: OrderedDict[int, QtGui.QPixmap] = OrderedDict()
+        self._pending: OrderedDict[int, Future[Image.Image]] = OrderedDict()
+        self._session_data: SessionData | None = None
+        self._folder: pathlib.Path | None = None
+        self._finished.connect(self._store)
+
+    def set_session_data(
+        self, session_data: SessionData | None, folder: pathlib.Path | None
+    ) -> None:
+        if session_data is self._session_data and folder == self._folder:
+            return
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._pixmaps.clear()
+        self._session_data = session_data
+        self._folder = folder
+
+    def get(self, i_trial: int) -> QtGui.QPixmap | None:
+        """
+        The thumbnail of a trial, or None if it is not yet ready
+
+        :param i_trial: The index of the trial
+        :return: The thumbnail if it is ready, otherwise None and the thumbnail_ready signal is emitted once it is
+        """
+        pixmap = self._pixmaps.get(i_trial)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(i_trial)
+            return pixmap
+        if self._session_data is None or i_trial in self._pending:
+            return None
+        session_data = self._session_data
+        future = self._executor.submit(
+            _load_or_render_thumbnail, session_data, i_trial, self._folder
+        )
+        future.add_done_callback(
+            lambda f: self._finished.emit(session_data, i_trial, f)
+        )
+        self._pending[i_trial] = future
+        while len(self._pending) > max_pending_thumbnails:
+            # the oldest requests are probably no longer visible
+            _, oldest = self._pending.popitem(last=False)
+            oldest.cancel()
+        return None
+
+    def _store(self, session_data: SessionData, i_trial: int, future: Future) -> None:
+        if self._pending.get(i_trial) is future:
+            del self._pending[i_trial]
+        if (
+            session_data is not self._session_data
+            or future.cancelled()
+            or future.exception() is not None
+        ):
+            return
+        image = future.result()
+        data = image.tobytes()
+        qimage = QtGui.QImage(
+            data,
+            image.width,
+            image.height,
+            3 * image.width,
+            QtGui.QImage.Format_RGB888,
+        )
+        self._pixmaps[i_trial] = QtGui.QPixmap.fromImage(qimage)
+        while len(self._pixmaps) > max_thumbnail_cache_size:
+            self._pixmaps.popitem(last=False)
+        self.thumbnail_ready.emit(i_trial)
+
+
+class ResultsModel(QtCore.QAbstractTableModel):
+    """
+    The trials with results, with their condition, success rate and mean reaction time
+
+    The model stores an array of values for each column, and the text of each item is created when it is displayed.
+    Sorting and filtering only change the array of rows to display.
+    The success rate and reaction time are taken from the stats dataframe, and are empty until it is set.
+    If a ThumbnailLoader is set, the first column is decorated with a thumbnail of the trial.
+    """
+
+    column_names = ["Trial", "Condition", "Success", "Reaction time"]
+
+    def __init__(self, parent: QtCore.QObject | None = None):
+        super().__init__(parent)
+        self.trial_indices = np.zeros(0, dtype=int)
+        self.condition_indices = np.zeros(0, dtype=int)
+        self.success = np.zeros(0)
+        self.reaction_time = np.zeros(0)
+        # the index in the above arrays of each displayed row
+        self.rows = np.zeros(0, dtype=int)
+        self.condition_index: int | None = None
+        self.missed_targets_only = False
+        self._sort_column = 0
+        self._sort_order = QtCore.Qt.AscendingOrder
+        self.thumbnails: ThumbnailLoader | None = None
+
+    def set_thumbnail_loader(self, thumbnails: ThumbnailLoader) -> None:
+        self.thumbnails = thumbnails
+        thumbnails.thumbnail_ready.connect(self._thumbnail_ready)
+
+    def _thumbnail_ready(self, i_trial: int) -> None:
+        for row in np.flatnonzero(self.trial_indices[self.rows] == i_trial):
+            index = self.index(int(row), 0)
+            self.dataChanged.emit(index, index, [QtCore.Qt.DecorationRole])
+
+    def _columns(self) -> list[np.ndarray]:
+        return [
+            self.trial_indices,
+            self.condition_indices,
+            self.success,
+            self.reaction_time,
+        ]
+
+    def _sorted_filtered_rows(self) -> np.ndarray:
+        keep = np.full(self.trial_indices.shape[0], True)
+        if self.condition_index is not None:
+            keep &= self.condition_indices == self.condition_index
+        if self.missed_targets_only:
+            keep &= self.success < 100.0
+        rows = np.flatnonzero(keep)
+        values = self._columns()[self._sort_column][rows].astype(float)
+        if self._sort_order == QtCore.Qt.DescendingOrder:
+            values = -values
+        # stable sort with missing values last
+        return rows[np.argsort(values, kind="stable")]
+
+    def _reset(self) -> None:
+        self.beginResetModel()
+        self.rows = self._sorted_filtered_rows()
+        self.endResetModel()
+
+    def set_session_data(self, session_data: SessionData | None) -> None:
+        if session_data is None:
+            self.trial_indices = np.zeros(0, dtype=int)
+            self.condition_indices = np.zeros(0, dtype=int)
+        else:
+            self.trial_indices, first_rows = np.unique(
+                session_data.i_trial, return_index=True
+            )
+            self.condition_indices = session_data.condition_index[first_rows]
+        self.success = np.full(self.trial_indices.shape[0], np.nan)
+        self.reaction_time = np.full(self.trial_indices.shape[0], np.nan)
+        self._reset()
+
+    def set_stats(self, stats_df: pd.DataFrame | None) -> None:
+        if stats_df is None or self.trial_indices.shape[0] == 0:
+            return
+        trials = stats_summary(stats_df, "i_trial").reindex(self.trial_indices)
+        self.success = 100.0 * trials.to_target_success.to_numpy()
+        self.reaction_time = trials.to_target_reaction_time.to_numpy()
+        self._reset()
+
+    def set_filter(
+        self, condition_index: int | None, missed_targets_only: bool
+    ) -> None:
+        """
+        Only display some of the trials
+
+        :param condition_index: Only display trials with this condition, or all conditions if None
+        :param missed_targets_only: Only display trials where not all targets were reached
+        """
+        self.condition_index = condition_index
+        self.missed_targets_only = missed_targets_only
+        self._reset()
+
+    def sort(
+        self, column: int, order: QtCore.Qt.SortOrder = QtCore.Qt.AscendingOrder
+    ) -> None:
+        self._sort_column = column
+        self._sort_order = order
+        self.layoutAboutToBeChanged.emit()
+        old_rows = self.rows
+        self.rows = self._sorted_filtered_rows()
+        # keep the selection on the same trials
+        new_row = np.zeros(self.trial_indices.shape[0], dtype=int)
+        new_row[self.rows] = np.arange(self.rows.shape[0])
+        for index in self.persistentIndexList():
+            self.changePersistentIndex(
+                index,
+                self.index(int(new_row[old_rows[index.row()]]), index.column()),
+            )
+        self.layoutChanged.emit()
+
+    def trial_index(self, row: int) -> int:
+        return int(self.trial_indices[self.rows[row]])
+
+    def rowCount(self, parent: QtCore.QModelIndex | None = None) -> int:
+        if parent is not None and parent.isValid():
+            return 0
+        return self.rows.shape[0]
+
+    def columnCount(self, parent: QtCore.QModelIndex | None = None) -> int:
+        if parent is not None and parent.isValid():
+            return 0
+        return len(self.column_names)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        value = self._columns()[index.column()][self.rows[index.row()]]
+        if role == QtCore.Qt.UserRole:
+            return float(value)
+        if role == QtCore.Qt.DecorationRole:
+            if index.column() != 0 or self.thumbnails is None:
+                return None
+            return self.thumbnails.get(int(value))
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if index.column() < 2:
+            return f"{value}"
+        if np.isnan(value):
+            return ""
+        if index.column() == 2:
+            return f"{value:.0f}%"
+        return f"{value:.3f}s"
+
+    def headerData(
+        self,
+        section: int,
+        orientation: QtCore.Qt.Orientation,
+        role: int = QtCore.Qt.DisplayRole,
+    ) -> Any:
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.column_names[section]
+        return None
+
 
 class ResultsWidget(QtWidgets.QWidget):
     def __init__(
@@ -25,53 +332,123 @@ class ResultsWidget(QtWidgets.QWidget):
         outer_layout.addWidget(group_box)
         inner_layout = QtWidgets.QGridLayout()
         group_box.setLayout(inner_layout)
-        self._list_trial_row_to_trial_index: list[int] = []
-        self._list_trials = QtWidgets.QListWidget()
-        self._list_trials.currentRowChanged.connect(self._row_changed)
-        self._list_trials.itemDoubleClicked.connect(self._btn_display_trial_clicked)
-        inner_layout.addWidget(self._list_trials, 0, 0, 1, 4)
+        self.save_thumbnails = False
+        self._thumbnails = ThumbnailLoader(self)
+        self._model = ResultsModel(self)
+        self._model.set_thumbnail_loader(self._thumbnails)
+        self._combo_condition = QtWidgets.QComboBox()
+        self._combo_condition.addItem("All conditions")
+        self._combo_condition.currentIndexChanged.connect(self._filter_changed)
+        inner_layout.addWidget(self._combo_condition, 0, 0, 1, 2)
+        self._chk_missed_targets = QtWidgets.QCheckBox(
+            "Only trials with missed targets"
+        )
+        self._chk_missed_targets.stateChanged.connect(self._filter_changed)
+        inner_layout.addWidget(self._chk_missed_targets, 0, 2, 1, 2)
+        self._list_trials = QtWidgets.QTableView()
+        self._list_trials.setModel(self._model)
+        self._list_trials.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self._list_trials.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self._list_trials.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self._list_trials.setSortingEnabled(True)
+        self._list_trials.sortByColumn(0, QtCore.Qt.AscendingOrder)
+        self._list_trials.verticalHeader().hide()
+        self._list_trials.verticalHeader().setDefaultSectionSize(thumbnail_size + 4)
+        self._list_trials.setIconSize(QtCore.QSize(thumbnail_size, thumbnail_size))
+        self._list_trials.horizontalHeader().setStretchLastSection(True)
+        self._list_trials.selectionModel().currentRowChanged.connect(self._row_changed)
+        self._list_trials.doubleClicked.connect(self._btn_display_trial_clicked)
+        self._viewer = ResultsViewer()
+        split_list_viewer = QtWidgets.QSplitter(QtCore.Qt.Vertical)
+        split_list_viewer.addWidget(self._list_trials)
+        split_list_viewer.addWidget(self._viewer)
+        inner_layout.addWidget(split_list_viewer, 1, 0, 1, 4)
+        self._chk_view_condition = QtWidgets.QCheckBox(
+            "View all trials with the same condition"
+        )
+        self._chk_view_condition.stateChanged.connect(self.update_viewer)
+        inner_layout.addWidget(self._chk_view_condition, 2, 0, 1, 4)
+        # poll for the stats while they are being calculated in the background
+        self._stats_timer = QtCore.QTimer(self)
+        self._stats_timer.setInterval(100)
+        self._stats_timer.timeout.connect(self._update_stats)
         self._btn_display_trial = QtWidgets.QPushButton("View Trial")
         self._btn_display_trial.clicked.connect(self._btn_display_trial_clicked)
-        inner_layout.addWidget(self._btn_display_trial, 1, 0)
+        inner_layout.addWidget(self._btn_display_trial, 3, 0)
         self._btn_screenshot_trial = QtWidgets.QPushButton("Trial Image")
         self._btn_screenshot_trial.clicked.connect(self._btn_screenshot_trial_clicked)
-        inner_layout.addWidget(self._btn_screenshot_trial, 1, 1)
+        inner_layout.addWidget(self._btn_screenshot_trial, 3, 1)
         self._btn_display_condition = QtWidgets.QPushButton("View Condition")
         self._btn_display_condition.clicked.connect(self._btn_display_condition_clicked)
-        inner_layout.addWidget(self._btn_display_condition, 1, 2)
+        inner_layout.addWidget(self._btn_display_condition, 3, 2)
         self._btn_screenshot_condition = QtWidgets.QPushButton("Condition Image")
         self._btn_screenshot_condition.clicked.connect(
             self._btn_screenshot_condition_clicked
         )
-        inner_layout.addWidget(self._btn_screenshot_condition, 1, 3)
+        inner_layout.addWidget(self._btn_screenshot_condition, 3, 3)
         self.setLayout(outer_layout)
         self._row_changed()
 
-    def _is_valid(self, row: int) -> bool:
+    def _current_trial_index(self) -> int | None:
         if (
-            self._list_trials.count() > 0
+            self._model.rowCount() > 0
             and self.experiment.trial_handler_with_results is None
         ):
             # experiment results have been cleared - re-assign experiment to update widget
             self.experiment = self._experiment
-            return False
-        return (
-            self.experiment.trial_handler_with_results is not None
-            and 0 <= row < self._list_trials.count()
-        )
+            return None
+        if self.experiment.trial_handler_with_results is None:
+            return None
+        row = self._list_trials.currentIndex().row()
+        if not 0 <= row < self._model.rowCount():
+            return None
+        return self._model.trial_index(row)
 
     def _row_changed(self) -> None:
-        valid = self._is_valid(self._list_trials.currentRow())
+        valid = self._current_trial_index() is not None
         self._btn_display_trial.setEnabled(valid)
         self._btn_screenshot_trial.setEnabled(valid)
         self._btn_display_condition.setEnabled(valid)
         self._btn_screenshot_condition.setEnabled(valid)
+        self.update_viewer()
+
+    def update_viewer(self) -> None:
+        """Draw the results of the selected trial in the viewer"""
+        trial_index = self._current_trial_index()
+        if trial_index is None:
+            self._viewer.clear()
+        elif not self._experiment.stats_ready:
+            self._viewer.clear("Calculating statistics...")
+        else:
+            self._viewer.show_results(
+                self._experiment.trial_handler_with_results,
+                self._experiment.display_options,
+                self._experiment.stats,
+                trial_index,
+                self._chk_view_condition.isChecked(),
+            )
+
+    def _filter_changed(self) -> None:
+        condition_index = self._combo_condition.currentIndex() - 1
+        self._model.set_filter(
+            condition_index if condition_index >= 0 else None,
+            self._chk_missed_targets.isChecked(),
+        )
+        self._row_changed()
+
+    def _update_stats(self) -> None:
+        if not self._experiment.stats_ready:
+            return
+        self._stats_timer.stop()
+        if self._experiment.trial_handler_with_results is not None:
+            self._model.set_stats(self._experiment.stats)
+            self._row_changed()
 
     def _display_results(
         self, all_trials_for_this_condition: bool, screenshot: bool
     ) -> None:
-        row = self._list_trials.currentRow()
-        if not self._is_valid(row):
+        trial_index = self._current_trial_index()
+        if trial_index is None:
             return
         screenshot_image = display_results(
             60,
@@ -79,7 +456,7 @@ class ResultsWidget(QtWidgets.QWidget):
             False,
             self._experiment.trial_handler_with_results,
             self._experiment.display_options,
-            self._list_trial_row_to_trial_index[row],
+            trial_index,
             all_trials_for_this_condition,
             win=self._win,
             return_screenshot=screenshot,
@@ -122,27 +499,40 @@ class ResultsWidget(QtWidgets.QWidget):
     def _btn_screenshot_condition_clicked(self) -> None:
         self._display_results(True, True)
 
+    def _thumbnail_folder(self) -> pathlib.Path | None:
+        # only save thumbnails for results that have been saved to the experiment file
+        path = pathlib.Path(self._experiment.filename)
+        if (
+            not self.save_thumbnails
+            or self._experiment.has_unsaved_changes
+            or not path.is_file()
+        ):
+            return None
+        try:
+            return thumbnail_folder(path)
+        except OSError as e:
+            logging.warning(f"Could not use thumbnail folder for '{path}': {e}")
+            return None
+
     @property
     def experiment(self) -> Experiment:
         return self._experiment
 
     @experiment.setter
     def experiment(self, experiment: Experiment) -> None:
-        self._list_trials.clear()
-        self._list_trial_row_to_trial_index.clear()
         self._experiment = experiment
-        trial_handler = experiment.trial_handler_with_results
-        if trial_handler is None:
-            return
-        # assume 1 repetition of experiment
-        rep_index = 0
-        for trial_index, condition_index in enumerate(trial_handler.sequenceIndices):
-            # trials that have no data have a default string instead of a numpy array
-            if (
-                type(trial_handler.data["target_indices"][(trial_index, rep_index)])
-                is np.ndarray
-            ):
-                self._list_trials.addItem(
-                    f"Trial {trial_index} [Condition {condition_index[rep_index]}]"
-                )
-                self._list_trial_row_to_trial_index.append(trial_index)
+        self._viewer.clear_cache()
+        session_data = experiment.session_data
+        self._thumbnails.set_session_data(session_data, self._thumbnail_folder())
+        self._model.set_session_data(session_data)
+        self._combo_condition.blockSignals(True)
+        self._combo_condition.clear()
+        self._combo_condition.addItem("All conditions")
+        if session_data is not None:
+            for condition_index in range(len(experiment.trial_list)):
+                self._combo_condition.addItem(f"Condition {condition_index}")
+        self._combo_condition.blockSignals(False)
+        self._filter_changed()
+        self._update_stats()
+        if not experiment.stats_ready:
+            self._stats_timer.start()
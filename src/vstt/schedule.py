@@ -0,0 +1,196 @@
+"""
+Precomputed schedule of the targets of each trial of an experiment
+
+When the trial handler for an experiment is created, the order of the targets of every trial,
+their positions, and for conditions with fixed target intervals the time at which each target is displayed,
+are computed in advance from a seed and stored in flat arrays with offsets.
+The task reads the targets of each trial from the schedule instead of shuffling them when the trial starts.
+
+The schedule is stored with the results in the ``"schedule"`` entry of the ``extraInfo`` of the trial handler,
+as a dict of numpy arrays, so the order of the targets can be inspected before an experiment is run,
+and regenerated from the stored seed.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+from psychopy.data import TrialHandlerExt
+
+import vstt.vtypes
+from vstt.geom import points_on_circle
+
+
+def trial_target_indices(
+    trial: vstt.vtypes.Trial | dict[str, Any], rng: np.random.Generator
+) -> np.ndarray:
+    """
+    The order of the targets of a trial
+
+    :param trial: The trial condition
+    :param rng: The random number generator used to shuffle the targets if the target order is random
+    :return: The indices of the targets in the order that they are displayed
+    """
+    target_indices = np.fromstring(trial["target_indices"], dtype="int", sep=" ")
+    if trial["target_order"] == "random":
+        rng.shuffle(target_indices)
+    return target_indices
+
+
+class Schedule:
+    """
+    The targets of each trial of an experiment
+
+    Rows ``offsets[i]:offsets[i+1]`` of the target arrays are the targets of trial ``i``.
+    """
+
+    __slots__ = (
+        "seed",
+        "condition_indices",
+        "offsets",
+        "target_indices",
+        "target_pos",
+        "target_display_times",
+    )
+
+    def __init__(
+        self,
+        seed: int,
+        condition_indices: np.ndarray,
+        offsets: np.ndarray,
+        target_indices: np.ndarray,
+        target_pos: np.ndarray,
+        target_display_times: np.ndarray,
+    ):
+        """
+        :param seed: The seed used to generate the random target orders
+        :param condition_indices: The condition index of each trial
+        :param offsets: The index of the first target of each trial, followed by the total number of targets
+        :param target_indices: The index of each target
+        :param target_pos: The (x, y) position of each target
+        :param target_display_times: For fixed target intervals, the time since the start of the trial
+                                     at which each target is displayed, otherwise NaN
+        """
+        self.seed = seed
+        self.condition_indices = condition_indices
+        self.offsets = offsets
+        self.target_indices = target_indices
+        self.target_pos = target_pos
+        self.target_display_times = target_display_times
+
+    @classmethod
+    def from_trial_list(
+        cls,
+        trial_list: Sequence[vstt.vtypes.Trial],
+        condition_indices: Sequence[int],
+        seed: int | None = None,
+        target_indices: Sequence[np.ndarray | None] | None = None,
+    ) -> Schedule:
+        """
+        Generate the schedule of an experiment
+
+        :param trial_list: The list of trial conditions
+        :param condition_indices: The condition index of each trial in the order they are run
+        :param seed: The seed for the random target orders, if None a new seed is generated
+        :param target_indices: Optional fixed order of the targets of each trial, e.g. from recorded results,
+                               where None uses the order from the trial condition
+        :return: The schedule
+        """
+        if seed is None:
+            seed = int(np.random.SeedSequence().generate_state(1, np.uint64)[0])
+        rng = np.random.default_rng(seed)
+        # the position of each outer target of each condition
+        positions = [
+            points_on_circle(trial["num_targets"], trial["target_distance"])
+            for trial in trial_list
+        ]
+        indices = []
+        display_times = []
+        for i_trial, condition_index in enumerate(condition_indices):
+            trial = trial_list[condition_index]
+            if target_indices is not None and target_indices[i_trial] is not None:
+                indices.append(np.asarray(target_indices[i_trial], dtype=np.int64))
+            else:
+                indices.append(trial_target_indices(trial, rng))
+            if trial["fixed_target_intervals"]:
+                n = indices[-1].shape[0]
+                display_times.append(np.arange(1, n + 1) * trial["target_duration"])
+            else:
+                display_times.append(np.full(indices[-1].shape[0], np.nan))
+        conditions = np.asarray(condition_indices, dtype=np.int64)
+        offsets = np.zeros(conditions.shape[0] + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([i.shape[0] for i in indices])
+        if offsets[-1] == 0:
+            return cls(
+                seed,
+                conditions,
+                offsets,
+                np.zeros(0, dtype=np.int64),
+                np.zeros((0, 2)),
+                np.zeros(0),
+            )
+        target_pos = np.concatenate(
+            [positions[c][i] for c, i in zip(conditions, indices) if i.shape[0] > 0]
+        )
+        return cls(
+            seed,
+            conditions,
+            offsets,
+            np.concatenate(indices),
+            target_pos,
+            np.concatenate(display_times),
+        )
+
+    @classmethod
+    def from_trial_handler(
+        cls,
+        trial_handler: TrialHandlerExt,
+        seed: int | None = None,
+        target_indices: Sequence[np.ndarray | None] | None = None,
+    ) -> Schedule:
+        """
+        Generate the schedule for the trials of a trial handler
+
+        :param trial_handler: The trial handler
+        :param seed: The seed for the random target orders, if None a new seed is generated
+        :param target_indices: Optional fixed order of the targets of each trial
+        :return: The schedule
+        """
+        return cls.from_trial_list(
+            trial_handler.trialList,
+            trial_handler.sequenceIndices.flatten(order="F"),
+            seed,
+            target_indices,
+        )
+
+    @classmethod
+    def from_dict(cls, schedule: dict[str, Any]) -> Schedule:
+        """
+        The schedule stored in the extraInfo of a trial handler
+
+        :param schedule: The dict from :meth:`as_dict`
+        :return: The schedule
+        """
+        return cls(**{name: schedule[name] for name in cls.__slots__})
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        The schedule as a dict of numpy arrays, which can be stored without vstt
+
+        :return: The dict
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __len__(self) -> int:
+        return self.condition_indices.shape[0]
+
+    def trial_rows(self, i_trial: int) -> range:
+        """
+        The rows of the targets of a trial
+
+        :param i_trial: The index of the trial
+        :return: The range of rows
+        """
+        return range(self.offsets[i_trial], self.offsets[i_trial + 1])
@@ -0,0 +1,700 @@
+"""
+Typed columnar storage of the results of an experiment
+
+The psychopy TrialHandlerExt used for the psydat files stores the results of each trial
+as a separate numpy object array for each kind of data, which is slow to access and has no fixed types.
+:class:`SessionData` stores the same results with an explicit schema:
+one typed array per column with a row for each target,
+and the mouse positions and timestamps of all the movements in a single flat array with offsets.
+If the results were saved as compressed blocks of trajectories, see :mod:`vstt.compression`,
+the blocks are only decompressed when the movements of a trial are used.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from psychopy.data import TrialHandlerExt
+
+from vstt.compression import _contains_mixed_length_numpy_arrays
+from vstt.compression import block_key
+from vstt.compression import decode_block
+
+# the per-target columns of SessionData and their types
+target_columns: dict[str, type] = {
+    "i_trial": np.int64,
+    "i_rep": np.int64,
+    "i_target": np.int64,
+    "condition_index": np.int64,
+    "target_index": np.int64,
+    # x and y are stored as two columns of a (n_targets, 2) array
+    "target_pos": np.float64,
+    "target_radius": np.float64,
+    "center_radius": np.float64,
+    "to_target_success": np.bool_,
+    "to_target_num_timestamps_before_visible": np.int64,
+    "to_target_sound_onset_timestamp": np.float64,
+    # false if no movement back to the center was recorded for this target
+    "has_to_center": np.bool_,
+    "to_center_success": np.bool_,
+    "to_center_num_timestamps_before_visible": np.int64,
+    "to_center_sound_onset_timestamp": np.float64,
+}
+
+# the movements of SessionData, stored as Trajectories
+trajectory_columns: list[str] = ["to_target", "to_center"]
+
+# the ways trajectories can be stored: the dtype of the timestamps and of the positions
+trajectory_storage_dtypes: dict[str, tuple[type, type]] = {
+    "float64": (np.float64, np.float64),
+    "float32": (np.float32, np.float32),
+    "int16": (np.float32, np.int16),
+}
+# int16 positions are stored as multiples of this, which covers +-4 screen heights
+# with a resolution that is finer than a pixel on a 4k screen
+position_quantum: float = 2.0**-13
+
+
+def encode_timestamps(timestamps: Any, storage: str) -> np.ndarray:
+    """
+    Convert timestamps to the dtype used by a trajectory storage option
+
+    Timestamps are relative to the start of the trial, so float32 has a resolution of a few microseconds.
+
+    :param timestamps: The timestamps in seconds
+    :param storage: The trajectory storage option, a key of :data:`trajectory_storage_dtypes`
+    :return: The stored timestamps
+    """
+    dtype = trajectory_storage_dtypes[storage][0]
+    return np.asarray(timestamps, dtype=np.float64).reshape(-1).astype(dtype)
+
+
+def positions_fit_storage(positions: Any, storage: str) -> bool:
+    """
+    Check if positions can be stored with a trajectory storage option
+
+    :param positions: The positions in screen height units
+    :param storage: The trajectory storage option, a key of :data:`trajectory_storage_dtypes`
+    :return: False if the positions are outside the range of int16 storage
+    """
+    dtype = trajectory_storage_dtypes[storage][1]
+    if not np.issubdtype(dtype, np.integer):
+        return True
+    quantized = np.rint(np.asarray(positions, dtype=np.float64) / position_quantum)
+    limits: np.iinfo = np.iinfo(dtype)
+    return not (np.any(quantized < limits.min) or np.any(quantized > limits.max))
+
+
+def encode_positions(positions: Any, storage: str) -> np.ndarray:
+    """
+    Convert positions to the dtype used by a trajectory storage option
+
+    int16 positions are rounded to the nearest multiple of :data:`position_quantum`.
+    If any positions are too large to be stored as int16, they are all stored as float32 instead.
+
+    :param positions: The positions in screen height units
+    :param storage: The trajectory storage option, a key of :data:`trajectory_storage_dtypes`
+    :return: The stored positions
+    """
+    dtype = trajectory_storage_dtypes[storage][1]
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+    if not np.issubdtype(dtype, np.integer):
+        return positions.astype(dtype)
+    if not positions_fit_storage(positions, storage):
+        logging.warning(
+            f"Positions outside the range of {dtype.__name__} storage, using float32"
+        )
+        return positions.astype(np.float32)
+    return np.rint(positions / position_quantum).astype(dtype)
+
+
+def decode_timestamps(timestamps: Any) -> np.ndarray:
+    """
+    Convert stored timestamps to float64
+
+    :param timestamps: The stored timestamps
+    :return: The timestamps in seconds, which is a view if they were stored as float64
+    """
+    return np.asarray(timestamps).astype(np.float64, copy=False).reshape(-1)
+
+
+def decode_positions(positions: Any) -> np.ndarray:
+    """
+    Convert stored positions to float64
+
+    :param positions: The stored positions, where int16 positions are multiples of :data:`position_quantum`
+    :return: The positions in screen height units, which is a view if they were stored as float64
+    """
+    positions = np.asarray(positions)
+    if positions.dtype == np.int16:
+        return (positions * position_quantum).reshape(-1, 2)
+    return positions.astype(np.float64, copy=False).reshape(-1, 2)
+
+
+def trajectory_storage(trial_handler: TrialHandlerExt) -> str:
+    """
+    The trajectory storage option used for the results in a trial handler
+
+    :param trial_handler: The trial handler
+    :return: The trajectory storage option from the metadata, or "float64" if not set
+    """
+    metadata = (trial_handler.extraInfo or {}).get("metadata", {})
+    storage = metadata.get("trajectory_storage", "float64")
+    return storage if storage in trajectory_storage_dtypes else "float64"
+
+
+class Trajectories:
+    """
+    The timestamps and mouse positions of many movements, stored in flat arrays
+
+    The samples of movement ``i`` are ``timestamps[offsets[i]:offsets[i+1]]``.
+    Consecutive samples of a movement at the same position, e.g. while the cursor is at rest
+    before the movement starts, are collapsed without any loss into a run:
+    ``positions`` has a row for each run, the runs of movement ``i`` are ``positions[run_offsets[i]:run_offsets[i+1]]``,
+    and ``stationary`` has a packed bit for each sample, which is set if the sample continues the current run.
+    The arrays have the dtypes of one of the :data:`trajectory_storage_dtypes`,
+    and are converted to float64 with a position for each sample when a movement is accessed.
+    The runs are not saved: in the compressed blocks of :mod:`vstt.compression`
+    delta encoding already turns them into zeros, which compress better than a bit per sample.
+    """
+
+    __slots__ = (
+        "timestamps",
+        "positions",
+        "offsets",
+        "run_offsets",
+        "stationary",
+        "storage",
+    )
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        positions: np.ndarray,
+        offsets: np.ndarray,
+        storage: str = "float64",
+    ):
+        """
+        :param timestamps: The stored timestamps of all the samples
+        :param positions: The stored positions of all the samples, which are collapsed into runs
+        :param offsets: The index of the first sample of each movement, followed by the number of samples
+        :param storage: The trajectory storage option, a key of :data:`trajectory_storage_dtypes`
+        """
+        self.timestamps = np.asarray(timestamps)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.storage = storage
+        positions = np.asarray(positions).reshape(-1, 2)
+        stationary = np.zeros(positions.shape[0], dtype=bool)
+        stationary[1:] = np.all(positions[1:] == positions[:-1], axis=1)
+        # the first sample of each movement starts a new run
+        stationary[self.offsets[:-1][self.offsets[:-1] < stationary.shape[0]]] = False
+        self.positions = positions[~stationary]
+        self.run_offsets = np.concatenate(([0], np.cumsum(~stationary)))[self.offsets]
+        self.stationary = np.packbits(stationary)
+
+    @classmethod
+    def from_lists(
+        cls,
+        timestamps: Sequence[Any],
+        positions: Sequence[Any],
+        storage: str = "float64",
+    ) -> Trajectories:
+        """
+        Construct from a list of timestamps and a list of positions for each movement
+
+        :param timestamps: The timestamps of each movement
+        :param positions: The mouse positions of each movement, which can be stored values or floats
+        :param storage: The trajectory storage option, a key of :data:`trajectory_storage_dtypes`
+        :return: The trajectories
+        """
+        times = [decode_timestamps(t) for t in timestamps]
+        points = [decode_positions(p) for p in positions]
+        offsets = np.zeros(len(times) + 1, dtype=np.int64)
+        np.cumsum([t.shape[0] for t in times], out=offsets[1:])
+        return cls(
+            encode_timestamps(np.concatenate(times) if times else [], storage),
+            encode_positions(np.concatenate(points) if points else [], storage),
+            offsets,
+            storage,
+        )
+
+    def __len__(self) -> int:
+        return self.offsets.shape[0] - 1
+
+    def __getitem__(self, i: int) -> tuple[np.ndarray, np.ndarray]:
+        """The float64 timestamps and positions of a movement, the timestamps are a view if stored as float64"""
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        run_starts = np.flatnonzero(~self._stationary_samples(start, stop))
+        positions = self.positions[self.run_offsets[i] : self.run_offsets[i + 1]]
+        return (
+            decode_timestamps(self.timestamps[start:stop]),
+            decode_positions(
+                np.repeat(positions, np.diff(run_starts, append=stop - start), axis=0)
+            ),
+        )
+
+    def _stationary_samples(self, start: int, stop: int) -> np.ndarray:
+        first_byte = start // 8
+        bits = np.unpackbits(self.stationary[first_byte : (stop + 7) // 8])
+        return bits[start - 8 * first_byte : stop - 8 * first_byte].astype(bool)
+
+    @property
+    def nbytes(self) -> int:
+        """The memory used by the arrays in bytes"""
+        return (
+            self.timestamps.nbytes
+            + self.positions.nbytes
+            + self.offsets.nbytes
+            + self.run_offsets.nbytes
+            + self.stationary.nbytes
+        )
+
+    def first_movement_indices(self, min_distance: float) -> np.ndarray:
+        """
+        The index of the first sample in each movement where the cursor has moved from its initial position
+
+        Only the first sample of each run needs to be checked, so the stationary samples are skipped.
+
+        :param min_distance: The minimum distance from the initial position that counts as a movement
+        :return: The index for each movement, the last index if the cursor never moves, or -1 for an empty movement
+        """
+        lengths = self.lengths()
+        indices = lengths - 1
+        run_starts = np.flatnonzero(
+            ~np.unpackbits(self.stationary, count=self.timestamps.shape[0]).astype(bool)
+        )
+        run_movements = np.repeat(np.arange(len(self)), np.diff(self.run_offsets))
+        positions = decode_positions(self.positions)
+        initial_positions = positions[self.run_offsets[:-1][run_movements]]
+        moved_runs = np.flatnonzero(
+            np.hypot(*(positions - initial_positions).T) >= min_distance
+        )
+        movements, first = np.unique(run_movements[moved_runs], return_index=True)
+        indices[movements] = (
+            run_starts[moved_runs[first]] - self.offsets[:-1][movements]
+        )
+        return indices
+
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def timestamps_list(self) -> list[np.ndarray]:
+        return [self[i][0] for i in range(len(self))]
+
+    def positions_list(self) -> list[np.ndarray]:
+        return [self[i][1] for i in range(len(self))]
+
+
+# the maximum number of decompressed trials to keep when accessing the movements of compressed results
+max_decoded_blocks: int = 16
+
+
+class _TrajectoryBlocks:
+    # the compressed trajectories of each trial of SessionData, see vstt.compression,
+    # which are only decompressed when the movements of a trial are used
+
+    def __init__(
+        self,
+        blocks: list[bytes | None],
+        codec: str,
+        trial_offsets: np.ndarray,
+        storage: str,
+    ):
+        self.blocks = blocks
+        self.codec = codec
+        # the first row of each trial, followed by the number of rows
+        self.trial_offsets = trial_offsets
+        self.storage = storage
+        self._decoded: OrderedDict[int, dict[str, list[np.ndarray]]] = OrderedDict()
+        # the stats and the thumbnails use the movements from different threads
+        self._lock = threading.Lock()
+
+    def _decode(self, i_block: int) -> dict[str, list[np.ndarray]]:
+        with self._lock:
+            decoded = self._decoded.get(i_block)
+            if decoded is None:
+                block = self.blocks[i_block]
+                decoded = {} if block is None else decode_block(block, self.codec)
+                self._decoded[i_block] = decoded
+                while len(self._decoded) > max_decoded_blocks:
+                    self._decoded.popitem(last=False)
+            self._decoded.move_to_end(i_block)
+            return decoded
+
+    def movement(self, name: str, row: int) -> tuple[Any, Any]:
+        # the stored timestamps and positions of a row, which are empty if no movement was recorded
+        i_block = int(np.searchsorted(self.trial_offsets, row, side="right")) - 1
+        i_target = row - self.trial_offsets[i_block]
+        decoded = self._decode(i_block)
+        timestamps = decoded.get(f"{name}_timestamps", [])
+        if i_target >= len(timestamps):
+            return [], []
+        return timestamps[i_target], decoded[f"{name}_mouse_positions"][i_target]
+
+    def trajectories(self, name: str) -> Trajectories:
+        movements = [self.movement(name, row) for row in range(self.trial_offsets[-1])]
+        return Trajectories.from_lists(
+            [timestamps for timestamps, _ in movements],
+            [positions for _, positions in movements],
+            self.storage,
+        )
+
+
+def add_trial_data(
+    trial_handler: TrialHandlerExt, values: dict[str, Any], storage: str = "float64"
+) -> None:
+    """
+    Add the results of the current trial to a psychopy trial handler
+
+    :param trial_handler: The trial handler
+    :param values: The list of values for each target of the trial, for each kind of data
+    :param storage: The trajectory storage option used for the timestamps and mouse positions
+    """
+    position_keys = ["to_target_mouse_positions", "to_center_mouse_positions"]
+    positions_storage = storage
+    if not all(
+        positions_fit_storage(positions, storage)
+        for key in position_keys
+        for positions in values.get(key, [])
+    ):
+        # movements with the same number of samples are stored in a single array,
+        # so all positions of the trial must have the same dtype
+        logging.warning(
+            f"Positions outside the range of {storage} storage, using float32 for this trial"
+        )
+        positions_storage = "float32"
+    for name, value in values.items():
+        if name in ["to_target_timestamps", "to_center_timestamps"]:
+            value = [encode_timestamps(v, storage) for v in value]
+        elif name in position_keys:
+            value = [encode_positions(v, positions_storage) for v in value]
+        dtype = object if _contains_mixed_length_numpy_arrays(value) else None
+        trial_handler.addData(name, np.array(value, dtype=dtype))
+
+
+def _trial_value(
+    data: dict, key: str, index: tuple, i_target: int | slice, default: Any
+) -> Any:
+    # older psydat files may not contain all keys, and trials without a central target have no to_center data
+    values = data.get(key)
+    if values is None:
+        return default
+    try:
+        return values[index][i_target]
+    except IndexError:
+        return default
+
+
+class SessionData:
+    """
+    The results of an experiment, with a row for each target that was displayed
+
+    The per-target columns are typed numpy arrays as listed in :data:`target_columns`,
+    and the rows are ordered by trial and then by target.
+    The movements to each target and back to the center are stored as :class:`Trajectories`.
+    If the results are compressed, these are only created when they are first used,
+    and :meth:`movement` decompresses only the block of the trial of a movement.
+    """
+
+    __slots__ = (*target_columns, "_trajectories", "_blocks")
+    i_trial: np.ndarray
+    i_rep: np.ndarray
+    i_target: np.ndarray
+    condition_index: np.ndarray
+    target_index: np.ndarray
+    target_pos: np.ndarray
+    target_radius: np.ndarray
+    center_radius: np.ndarray
+    to_target_success: np.ndarray
+    to_target_num_timestamps_before_visible: np.ndarray
+    to_target_sound_onset_timestamp: np.ndarray
+    has_to_center: np.ndarray
+    to_center_success: np.ndarray
+    to_center_num_timestamps_before_visible: np.ndarray
+    to_center_sound_onset_timestamp: np.ndarray
+    _trajectories: dict[str, Trajectories]
+    _blocks: _TrajectoryBlocks | None
+
+    def __init__(
+        self,
+        columns: dict[str, Any],
+        blocks: _TrajectoryBlocks | None = None,
+        **trajectories: Trajectories,
+    ):
+        # the trajectories are either given, or created from the compressed blocks when first used
+        n_targets = np.asarray(columns["i_trial"]).shape[0]
+        for name, dtype in target_columns.items():
+            values: np.ndarray = np.asarray(columns[name], dtype=dtype)
+            if name == "target_pos":
+                values = values.reshape(n_targets, 2)
+            if values.shape[0] != n_targets:
+                raise ValueError(f"Column '{name}' should have {n_targets} rows")
+            setattr(self, name, values)
+        self._blocks = blocks
+        self._trajectories = {}
+        if blocks is not None:
+            if blocks.trial_offsets[-1] != n_targets:
+                raise ValueError(f"Trajectory blocks should have {n_targets} rows")
+            return
+        for name in trajectory_columns:
+            if len(trajectories[name]) != n_targets:
+                raise ValueError(f"Trajectories '{name}' should have {n_targets} rows")
+            self._trajectories[name] = trajectories[name]
+
+    def __len__(self) -> int:
+        return self.i_trial.shape[0]
+
+    def _all_trajectories(self, name: str) -> Trajectories:
+        trajectories = self._trajectories.get(name)
+        if trajectories is None:
+            assert self._blocks is not None
+            trajectories = self._blocks.trajectories(name)
+            self._trajectories[name] = trajectories
+        return trajectories
+
+    @property
+    def to_target(self) -> Trajectories:
+        """The movements to each target, which decompresses all the blocks the first time if the results are compressed"""
+        return self._all_trajectories("to_target")
+
+    @property
+    def to_center(self) -> Trajectories:
+        """The movements back to the center, which decompresses all the blocks the first time if the results are compressed"""
+        return self._all_trajectories("to_center")
+
+    def movement(self, name: str, row: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The float64 timestamps and positions of a single movement
+
+        If the results are compressed, only the block of the trial of this movement is decompressed.
+
+        :param name: The kind of movement, one of :data:`trajectory_columns`
+        :param row: The row of the target
+        :return: The timestamps and positions, which are empty if no movement was recorded
+        """
+        if name in self._trajectories or self._blocks is None:
+            return self._all_trajectories(name)[row]
+        timestamps, positions = self._blocks.movement(name, row)
+        return decode_timestamps(timestamps), decode_positions(positions)
+
+    @property
+    def trial_indices(self) -> np.ndarray:
+        """The indices of the trials that have results"""
+        return np.unique(self.i_trial)
+
+    def trial_rows(self, i_trial: int) -> slice:
+        """
+        The rows of the targets of a trial
+
+        :param i_trial: The index of the trial
+        :return: A slice of the rows, which is empty if the trial has no results
+        """
+        start, stop = np.searchsorted(self.i_trial, [i_trial, i_trial + 1])
+        return slice(int(start), int(stop))
+
+    @classmethod
+    def from_trial_handler(
+        cls, trial_handler: TrialHandlerExt, storage: str | None = None
+    ) -> SessionData:
+        """
+        Construct from the results stored in a psychopy trial handler
+
+        If the trajectories are stored as compressed blocks, they are not decompressed here.
+
+        :param trial_handler: The trial handler with the results
+        :param storage: The trajectory storage option, by default the one used by the trial handler
+        :return: The results
+        """
+        if storage is None:
+            storage = trajectory_storage(trial_handler)
+        columns: dict[str, list] = {name: [] for name in target_columns}
+        movements: dict[str, list] = {
+            f"{name}_{kind}": []
+            for name in trajectory_columns
+            for kind in ["timestamps", "mouse_positions"]
+        }
+        data = trial_handler.data
+        target_indices = data.get("target_indices")
+        blocks = data.get(block_key)
+        trial_blocks: list[bytes | None] = []
+        trial_offsets = [0]
+        # compressed blocks contain the timestamps, but the number of timestamps before visible
+        # is stored for each recorded movement back to the center
+        to_center_key = (
+            "to_center_timestamps"
+            if blocks is None
+            else "to_center_num_timestamps_before_visible"
+        )
+        for index in np.ndindex(trial_handler.sequenceIndices.shape):
+            # trials that have not yet happened have a default string instead of an array in their data
+            if target_indices is None or type(target_indices[index]) is not np.ndarray:
+                continue
+            condition_index = trial_handler.sequenceIndices[index]
+            conditions = trial_handler.trialList[condition_index]
+            n_targets = target_indices[index].shape[0]
+            # the number of targets with a recorded movement back to the center
+            n_to_center = len(_trial_value(data, to_center_key, index, slice(None), []))
+            if blocks is not None:
+                block = blocks[index]
+                trial_blocks.append(block if isinstance(block, bytes) else None)
+                trial_offsets.append(trial_offsets[-1] + n_targets)
+            for i_target in range(n_targets):
+                columns["i_trial"].append(index[0])
+                columns["i_rep"].append(index[1])
+                columns["i_target"].append(i_target)
+                columns["condition_index"].append(condition_index)
+                columns["target_index"].append(target_indices[index][i_target])
+                columns["target_pos"].append(data["target_pos"][index][i_target])
+                columns["target_radius"].append(conditions["target_size"])
+                columns["center_radius"].append(conditions["central_target_size"])
+                for name in trajectory_columns:
+                    if blocks is None:
+                        for kind in ["timestamps", "mouse_positions"]:
+                            movements[f"{name}_{kind}"].append(
+                                _trial_value(
+                                    data, f"{name}_{kind}", index, i_target, []
+                                )
+                            )
+                    columns[f"{name}_success"].append(
+                        _trial_value(data, f"{name}_success", index, i_target, True)
+                    )
+                    columns[f"{name}_num_timestamps_before_visible"].append(
+                        _trial_value(
+                            data,
+                            f"{name}_num_timestamps_before_visible",
+                            index,
+                            i_target,
+                            0,
+                        )
+                    )
+                    columns[f"{name}_sound_onset_timestamp"].append(
+                        _trial_value(
+                            data,
+                            f"{name}_sound_onset_timestamps",
+                            index,
+                            i_target,
+                            np.nan,
+                        )
+                    )
+                columns["has_to_center"].append(i_target < n_to_center)
+        if blocks is not None:
+            return cls(
+                columns,
+                _TrajectoryBlocks(
+                    trial_blocks,
+                    trial_handler.extraInfo["trajectory_compression"],
+                    np.array(trial_offsets, dtype=np.int64),
+                    storage,
+                ),
+            )
+        to_target, to_center = (
+            Trajectories.from_lists(
+                movements[f"{name}_timestamps"],
+                movements[f"{name}_mouse_positions"],
+                storage,
+            )
+            for name in trajectory_columns
+        )
+        return cls(columns, to_target=to_target, to_center=to_center)
+
+    def to_trial_handler(
+        self, trial_list: list[dict[str, Any]], extra_info: dict[str, Any] | None = None
+    ) -> TrialHandlerExt:
+        """
+        Store the results in a psychopy trial handler, as they would be stored when running the experiment
+
+        The trajectories are stored with the same storage option as in this session data.
+
+        :param trial_list: The list of trial conditions of the experiment
+        :param extra_info: The extraInfo of the trial handler
+        :return: The trial handler with the results
+        """
+        trial_handler = TrialHandlerExt(
+            trial_list,
+            nReps=1,
+            method="sequential",
+            originPath=-1,
+            extraInfo=extra_info,
+        )
+        for trial in trial_handler:
+            i_trial = trial_handler.thisN
+            rows = np.arange(len(self))[self.trial_rows(i_trial)]
+            if rows.shape[0] == 0:
+                continue
+            if np.any(self.condition_index[rows] != trial_handler.thisIndex):
+                raise ValueError(f"Trial {i_trial} has a different condition")
+            center_rows = rows[self.has_to_center[rows]]
+            # with automove the movement to the center is not recorded but is successful
+            center_success_rows = (
+                rows if trial["automove_cursor_to_center"] else center_rows
+            )
+            add_trial_data(
+                trial_handler,
+                {
+                    "target_indices": self.target_index[rows],
+                    "target_pos": list(self.target_pos[rows]),
+                    "to_target_timestamps": [self.to_target[i][0] for i in rows],
+                    "to_target_num_timestamps_before_visible": list(
+                        self.to_target_num_timestamps_before_visible[rows]
+                    ),
+                    "to_center_timestamps": [self.to_center[i][0] for i in center_rows],
+                    "to_center_num_timestamps_before_visible": list(
+                        self.to_center_num_timestamps_before_visible[center_rows]
+                    ),
+                    "to_target_mouse_positions": [self.to_target[i][1] for i in rows],
+                    "to_center_mouse_positions": [
+                        self.to_center[i][1] for i in center_rows
+                    ],
+                    "to_target_success": list(self.to_target_success[rows]),
+                    "to_center_success": list(
+                        self.to_center_success[center_success_rows]
+                    ),
+                    "to_target_sound_onset_timestamps": list(
+                        self.to_target_sound_onset_timestamp[rows]
+                    ),
+                    "to_center_sound_onset_timestamps": list(
+                        self.to_center_sound_onset_timestamp[center_rows]
+                    ),
+                },
+                self.to_target.storage,
+            )
+        return trial_handler
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        A dataframe with a row for each target, as used by :func:`vstt.stats.stats_dataframe`
+
+        :return: The dataframe
+        """
+        n_targets = len(self)
+        df = pd.DataFrame(
+            {
+                name: getattr(self, name)
+                for name in [
+                    "i_trial",
+                    "i_rep",
+                    "i_target",
+                    "condition_index",
+                    "target_index",
+                ]
+            }
+        )
+        df["target_pos"] = list(self.target_pos)
+        df["target_radius"] = self.target_radius
+        df["center_pos"] = [np.zeros(2) for _ in range(n_targets)]
+        df["center_radius"] = self.center_radius
+        for name in trajectory_columns:
+            trajectories: Trajectories = getattr(self, name)
+            df[f"{name}_timestamps"] = trajectories.timestamps_list()
+            df[f"{name}_mouse_positions"] = trajectories.positions_list()
+            df[f"{name}_success"] = getattr(self, f"{name}_success")
+            df[f"{name}_num_timestamps_before_visible"] = getattr(
+                self, f"{name}_num_timestamps_before_visible"
+            )
+        return df
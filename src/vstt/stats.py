@@ -1,19 +1,23 @@
 from __future__ import annotations
 
-import logging
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 import numpy as np
 import pandas as pd
 from numpy import linalg as LA
 from psychopy.data import TrialHandlerExt
-from psychopy.event import xydist
-from shapely.geometry import LineString
-from shapely.ops import polygonize
-from shapely.ops import unary_union
+
+from vstt.geom import xydist
+from vstt.session import SessionData
+from vstt.session import Trajectories
+from vstt.session import decode_timestamps
 
 min_distance: float = 1e-12
 
+_background_executor: ThreadPoolExecutor | None = None
+
 
 def list_dest_stat_label_units() -> list[tuple[str, list[tuple[str, str, str]]]]:
     list_dest_stats = []
@@ -83,103 +87,29 @@ def _get_trial_data_columns() -> list[str]:
     ]
 
 
-def _get_dat(
-    data: dict, key: str, index: tuple, i_target: int, default_value: Any
-) -> Any:
-    ar = data.get(key)
-    if ar is None:
-        logging.debug(
-            f"Key '{key}' not found in data, using default value {default_value}"
-        )
-        return default_value
-    try:
-        return ar[index][i_target]
-    except IndexError:
-        logging.debug(
-            f"Index error for key '{key}', index '{index}', i_target '{i_target}', using default value {default_value}"
-        )
-    return default_value
-
-
-def _get_target_data(
-    trial_handler: TrialHandlerExt, index: tuple, i_target: int
-) -> list:
-    data = trial_handler.data
-    condition_index = trial_handler.sequenceIndices[index]
-    conditions = trial_handler.trialList[condition_index]
-    target_radius = conditions["target_size"]
-    central_target_radius = conditions["central_target_size"]
-    target_index = data["target_indices"][index][i_target]
-    target_pos = np.array(data["target_pos"][index][i_target])
-    center_pos = np.array([0.0, 0.0])
-    to_target_timestamps = np.array(data["to_target_timestamps"][index][i_target])
-    to_target_num_timestamps_before_visible = _get_dat(
-        data, "to_target_num_timestamps_before_visible", index, i_target, 0
-    )
-    to_target_mouse_positions = np.stack(
-        np.array(data["to_target_mouse_positions"][index][i_target])
-    )  # type: ignore
-    to_target_success = np.array(data["to_target_success"][index][i_target])
-    to_center_success: np.ndarray | bool
-    to_center_timestamps = np.array(
-        _get_dat(data, "to_center_timestamps", index, i_target, [])
-    )
-    to_center_num_timestamps_before_visible = _get_dat(
-        data, "to_center_num_timestamps_before_visible", index, i_target, 0
-    )
-    to_center_mouse_positions = np.array(
-        _get_dat(data, "to_center_mouse_positions", index, i_target, [])
-    )
-    if to_center_mouse_positions.shape[0] > 0:
-        to_center_mouse_positions = np.stack(to_center_mouse_positions)  # type: ignore
-    to_center_success = np.array(
-        _get_dat(data, "to_center_success", index, i_target, True)
-    )
-    return [
-        index[0],
-        index[1],
-        i_target,
-        condition_index,
-        target_index,
-        target_pos,
-        target_radius,
-        to_target_timestamps,
-        to_target_mouse_positions,
-        to_target_success,
-        to_target_num_timestamps_before_visible,
-        center_pos,
-        central_target_radius,
-        to_center_timestamps,
-        to_center_mouse_positions,
-        to_center_success,
-        to_center_num_timestamps_before_visible,
-    ]
-
+def _data_df(results: TrialHandlerExt | SessionData) -> pd.DataFrame:
+    if not isinstance(results, SessionData):
+        results = SessionData.from_trial_handler(results)
+    return results.to_dataframe()[_get_trial_data_columns()]
 
-def _data_df(trial_handler: TrialHandlerExt) -> pd.DataFrame:
-    data = []
-    for index in np.ndindex(trial_handler.sequenceIndices.shape):
-        # trials that have not yet happened have a default string instead of an array in their data
-        if type(trial_handler.data["target_indices"][index]) is np.ndarray:
-            n_targets = trial_handler.data["target_indices"][index].shape[0]
-            for i_target in range(n_targets):
-                data.append(_get_target_data(trial_handler, index, i_target))
-    return pd.DataFrame(data, columns=_get_trial_data_columns())
 
+def stats_dataframe(results: TrialHandlerExt | SessionData) -> pd.DataFrame:
+    """
+    Calculate the statistics of each target
 
-def stats_dataframe(trial_handler: TrialHandlerExt) -> pd.DataFrame:
-    df = _data_df(trial_handler)
+    :param results: The results, either in a psychopy trial handler or as session data
+    :return: The stats dataframe, with a row for each target
+    """
+    if not isinstance(results, SessionData):
+        results = SessionData.from_trial_handler(results)
+    df = _data_df(results)
     for destination in ["target", "center"]:
         df[f"to_{destination}_distance"] = df[f"to_{destination}_mouse_positions"].map(
             _distance
         )
-        df[f"to_{destination}_reaction_time"] = df.apply(
-            lambda x, destination=destination: _reaction_time(
-                x[f"to_{destination}_timestamps"],
-                x[f"to_{destination}_mouse_positions"],
-                x[f"to_{destination}_num_timestamps_before_visible"],
-            ),
-            axis=1,
+        df[f"to_{destination}_reaction_time"] = _reaction_times(
+            getattr(results, f"to_{destination}"),
+            getattr(results, f"to_{destination}_num_timestamps_before_visible"),
         )
         df[f"to_{destination}_time"] = df.apply(
             lambda x, destination=destination: _total_time(
@@ -265,6 +195,79 @@ def stats_dataframe(trial_handler: TrialHandlerExt) -> pd.DataFrame:
     return df
 
 
+def stats_dataframe_in_background(
+    trial_handler: TrialHandlerExt,
+) -> Future[pd.DataFrame]:
+    """
+    Start calculating the stats dataframe in a background thread
+
+    :param trial_handler: The trial handler with the results, which should not be modified until the stats are ready
+    :return: A future which will contain the stats dataframe
+    """
+    global _background_executor
+    if _background_executor is None:
+        _background_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="vstt-stats"
+        )
+    return _background_executor.submit(stats_dataframe, trial_handler)
+
+
+def stats_summary(
+    stats_df: pd.DataFrame, by: str | list[str] | None = None
+) -> pd.DataFrame:
+    """
+    Summarize the stats dataframe for groups of rows in a single grouped pass
+
+    For each group the summary contains the mean of each numeric statistic,
+    the mean target and center positions as x and y columns,
+    the number of targets ``num_targets`` and trials ``num_trials``,
+    and for each destination "target" and "center":
+
+    - ``to_{dest}_success``: the fraction of targets that were reached
+    - ``to_{dest}_trial_success``: the fraction of trials where all targets were reached
+
+    :param stats_df: The stats dataframe
+    :param by: The column(s) to group by, e.g. "i_trial", "condition_index" or "target_index", or None to summarize all rows
+    :return: A dataframe with one row for each group, indexed by the group columns
+    """
+    keys = ["_all"] if by is None else [by] if isinstance(by, str) else list(by)
+    df = stats_df.select_dtypes(include="number").drop(
+        columns=[c for c in ["i_rep", "i_target"] if c not in keys]
+    )
+    if by is None:
+        df["_all"] = 0
+    for label in ["target_pos", "center_pos"]:
+        xy = np.array(stats_df[label].tolist(), dtype=float).reshape(-1, 2)
+        df[f"{label}_x"] = xy[:, 0]
+        df[f"{label}_y"] = xy[:, 1]
+    # each trial has the same weight in the trial success fractions, however many of its targets are in a group
+    trial_keys = keys if "i_trial" in keys else keys + ["i_trial"]
+    weight = 1.0 / df.groupby(trial_keys).i_trial.transform("size")
+    for dest in ["target", "center"]:
+        success = stats_df[f"to_{dest}_success"].astype(float)
+        df[f"to_{dest}_success"] = success
+        df[f"to_{dest}_trial_success"] = weight * success.groupby(
+            stats_df.i_trial
+        ).transform("min")
+    df["num_trials"] = weight
+    grouped = df.groupby(keys, sort=True)
+    summary = grouped.mean()
+    totals = grouped[
+        ["num_trials", "to_target_trial_success", "to_center_trial_success"]
+    ].sum()
+    summary["num_trials"] = np.rint(totals.num_trials).astype(int)
+    for dest in ["target", "center"]:
+        summary[f"to_{dest}_trial_success"] = (
+            totals[f"to_{dest}_trial_success"] / totals.num_trials
+        )
+    summary["num_targets"] = grouped.size()
+    if "i_trial" not in keys:
+        summary = summary.drop(columns=["i_trial"])
+    if by is None:
+        summary = summary.reset_index(drop=True)
+    return summary
+
+
 def concatenate_mouse_positions(x: np.ndarray) -> np.ndarray:
     """
     concatenate the "to_target_mouse_positions" and "to_center_mouse_positions"
@@ -305,6 +308,15 @@ def append_stats_data_to_excel(df: pd.DataFrame, writer: Any, data_format: str)
         df_stats[f"{label}_y"] = column_as_2d_array[:, 1]
         df_stats = df_stats.drop(columns=[label])
     df_stats.to_excel(writer, sheet_name="statistics", index=False)
+    # summary sheets: means and success fractions for each trial, condition and target of each condition
+    for sheet_name, by in [
+        ("trial_summary", ["i_trial"]),
+        ("condition_summary", ["condition_index"]),
+        ("target_summary", ["condition_index", "target_index"]),
+    ]:
+        stats_summary(df, by).reset_index().to_excel(
+            writer, sheet_name=sheet_name, index=False
+        )
     # add timestamp/mouse position arrays
     if data_format == "target":
         # one sheet for each row (target) in df, with arrays of time/position data.
@@ -427,6 +439,29 @@ def _reaction_time(
     return mouse_times[i] - mouse_times[to_target_num_timestamps_before_visible]
 
 
+def _reaction_times(
+    trajectories: Trajectories,
+    num_timestamps_before_visible: np.ndarray,
+) -> np.ndarray:
+    """
+    The reaction times of many movements, as defined in :func:`_reaction_time`
+
+    :param trajectories: The timestamps and mouse positions of the movements
+    :param num_timestamps_before_visible: The index of the first timestamp where the target is visible for each movement
+    :return: The reaction time of each movement, or NaN if it can't be calculated
+    """
+    lengths = trajectories.lengths()
+    valid = (lengths > 0) & (lengths > num_timestamps_before_visible)
+    reaction_times = np.full(lengths.shape[0], np.nan)
+    offsets = trajectories.offsets[:-1][valid]
+    first_movement = offsets + trajectories.first_movement_indices(min_distance)[valid]
+    visible = offsets + num_timestamps_before_visible[valid]
+    reaction_times[valid] = decode_timestamps(
+        trajectories.timestamps[first_movement]
+    ) - decode_timestamps(trajectories.timestamps[visible])
+    return reaction_times
+
+
 def _total_time(
     mouse_times: np.ndarray,
     to_target_num_timestamps_before_visible: int,
@@ -454,7 +489,7 @@ def _distance(mouse_positions: np.ndarray) -> float:
     :param mouse_positions: The array of mouse positions
     :return: The distance travelled.
     """
-    dist = 0
+    dist = 0.0
     for i in range(mouse_positions.shape[0] - 1):
         dist += xydist(mouse_positions[i + 1], mouse_positions[i])
     return dist
@@ -502,6 +537,10 @@ def _area(
     :return: area
 
     """
+    from shapely.geometry import LineString
+    from shapely.ops import polygonize
+    from shapely.ops import unary_union
+
     coords = get_closed_polygon(to_target_mouse_positions, to_center_mouse_positions)
     polygons = polygonize(unary_union(LineString(coords)))
     area = sum(polygon.area for polygon in polygons)
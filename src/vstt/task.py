@@ -1,28 +1,42 @@
 from __future__ import annotations
 
 import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import TYPE_CHECKING
 from typing import Any
-from typing import Iterable
+from typing import Callable
+from typing import TypeVar
 
 import numpy as np
+import pandas as pd
 from psychopy.clock import Clock
 from psychopy.data import TrialHandlerExt
 from psychopy.event import Mouse
+from psychopy.hardware import joystick
 from psychopy.hardware.keyboard import Keyboard
 from psychopy.sound import Sound
 from psychopy.visual.basevisual import BaseVisualStim
 from psychopy.visual.elementarray import ElementArrayStim
 from psychopy.visual.shape import ShapeStim
+from psychopy.visual.textbox2 import TextBox2
 from psychopy.visual.window import Window
 
 import vstt.vtypes
 from vstt import joystick_wrapper
 from vstt import vis
-from vstt.experiment import Experiment
 from vstt.geom import JoystickPointUpdater
 from vstt.geom import PointRotator
 from vstt.geom import to_target_dists
-from vstt.stats import stats_dataframe
+from vstt.monitor import ExperimentMonitor
+from vstt.monitor import trial_summary
+from vstt.realtime import RealTimeMode
+from vstt.schedule import Schedule
+from vstt.schedule import trial_target_indices
+from vstt.session import add_trial_data
+
+if TYPE_CHECKING:
+    from vstt.experiment import Experiment
 
 
 def _get_target_indices(outer_target_index: int, trial: dict[str, Any]) -> list[int]:
@@ -37,12 +51,17 @@ def _get_target_indices(outer_target_index: int, trial: dict[str, Any]) -> list[
 class TrialData:
     """Stores the data from the trial that will be stored in the psychopy trial_handler"""
 
-    def __init__(self, trial: dict[str, Any], rng: np.random.Generator):
-        self.target_indices = np.fromstring(
-            trial["target_indices"], dtype="int", sep=" "
-        )
-        if trial["target_order"] == "random":
-            rng.shuffle(self.target_indices)
+    def __init__(
+        self,
+        trial: dict[str, Any],
+        rng: np.random.Generator | None = None,
+        target_indices: np.ndarray | None = None,
+    ):
+        if target_indices is None:
+            target_indices = trial_target_indices(
+                trial, rng if rng is not None else np.random.default_rng()
+            )
+        self.target_indices = target_indices
         self.target_pos: list[np.ndarray] = []
         self.to_target_timestamps: list[np.ndarray] = []
         self.to_target_num_timestamps_before_visible: list[int] = []
@@ -52,32 +71,85 @@ class TrialData:
         self.to_center_mouse_positions: list[np.ndarray] = []
         self.to_target_success: list[bool] = []
         self.to_center_success: list[bool] = []
+        self.to_target_sound_onset_timestamps: list[float] = []
+        self.to_center_sound_onset_timestamps: list[float] = []
+
+
+# the stimuli of this many different sets of visual parameters are kept for re-use
+max_stimulus_pool_size: int = 8
+
+_Stimuli = TypeVar("_Stimuli")
+
+
+def stimulus_key(trial: vstt.vtypes.Trial) -> tuple:
+    """
+    The visual parameters of a trial condition that determine its stimuli
+
+    :param trial: The trial condition
+    :return: A key which is equal for conditions that can share the same stimuli
+    """
+    return (
+        trial["num_targets"],
+        trial["target_distance"],
+        trial["target_size"],
+        trial["add_central_target"],
+        trial["central_target_size"],
+        trial["show_target_labels"],
+        trial["target_labels"] if trial["show_target_labels"] else "",
+        trial["cursor_size"],
+    )
+
+
+class StimulusPool:
+    """Stimuli shared by the TrialManagers of conditions with the same visual parameters"""
+
+    def __init__(self, max_size: int | None = None):
+        self.max_size = max_stimulus_pool_size if max_size is None else max_size
+        self._stimuli: OrderedDict[tuple, Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._stimuli)
+
+    def get(
+        self, trial: vstt.vtypes.Trial, make_stimuli: Callable[[], _Stimuli]
+    ) -> _Stimuli:
+        """
+        The stimuli for a trial condition, which are only created if not already in the pool
+
+        The least recently used stimuli are removed when the pool is full.
+
+        :param trial: The trial condition
+        :param make_stimuli: Function that creates the stimuli for this condition
+        :return: The stimuli
+        """
+        key = stimulus_key(trial)
+        stimuli = self._stimuli.pop(key, None)
+        if stimuli is None:
+            stimuli = make_stimuli()
+        self._stimuli[key] = stimuli
+        while len(self._stimuli) > self.max_size:
+            self._stimuli.popitem(last=False)
+        return stimuli
 
 
 class TrialManager:
     """Stores the drawable elements and other objects needed during a trial"""
 
-    def __init__(self, win: Window, trial: vstt.vtypes.Trial):
-        self.targets = vis.make_targets(
-            win,
-            trial["num_targets"],
-            trial["target_distance"],
-            trial["target_size"],
-            trial["add_central_target"],
-            trial["central_target_size"],
-        )
+    def __init__(
+        self,
+        win: Window,
+        trial: vstt.vtypes.Trial,
+        clock: Clock | None = None,
+        stimulus_pool: StimulusPool | None = None,
+    ):
+        if stimulus_pool is None:
+            stimuli = self._make_stimuli(win, trial)
+        else:
+            stimuli = stimulus_pool.get(trial, lambda: self._make_stimuli(win, trial))
+        self.targets, self.target_labels, self.cursor, self._cursor_path = stimuli
         self.drawables: list[BaseVisualStim | ElementArrayStim] = [self.targets]
-        self.target_labels = None
-        if trial["show_target_labels"]:
-            self.target_labels = vis.make_target_labels(
-                win,
-                trial["num_targets"],
-                trial["target_distance"],
-                trial["target_size"],
-                trial["target_labels"],
-            )
+        if trial["show_target_labels"] and self.target_labels is not None:
             self.drawables.extend(self.target_labels)
-        self.cursor = vis.make_cursor(win, trial["cursor_size"])
         self.cursor.setPos(np.array([0.0, 0.0]))
         if trial["show_cursor"]:
             self.drawables.append(self.cursor)
@@ -85,17 +157,57 @@ class TrialManager:
         self.joystick_point_updater = JoystickPointUpdater(
             trial["cursor_rotation_degrees"], trial["joystick_max_speed"], win.size
         )
-        self._cursor_path = ShapeStim(
-            win, vertices=[(0.0, 0.0)], lineColor="white", closeShape=False
-        )
         self._cursor_path_vertices: list[tuple[float, float]] = []
-        self.clock = Clock()
+        self.clock = clock if clock is not None else Clock()
         if trial["show_cursor_path"]:
             self.drawables.append(self._cursor_path)
         self.first_target_of_condition_shown = False
         self.most_recent_target_display_time = 0.0
         self.final_target_display_time_previous_trial = 0.0
         self.green_target_index: int | None = None
+        self.sound = self._make_sound(trial)
+        self.sound_onset_time = np.nan
+
+    def _make_stimuli(
+        self, win: Window, trial: vstt.vtypes.Trial
+    ) -> tuple[ElementArrayStim, list[TextBox2] | None, ShapeStim, ShapeStim]:
+        targets = vis.make_targets(
+            win,
+            trial["num_targets"],
+            trial["target_distance"],
+            trial["target_size"],
+            trial["add_central_target"],
+            trial["central_target_size"],
+        )
+        target_labels = None
+        if trial["show_target_labels"]:
+            target_labels = vis.make_target_labels(
+                win,
+                trial["num_targets"],
+                trial["target_distance"],
+                trial["target_size"],
+                trial["target_labels"],
+            )
+        cursor = vis.make_cursor(win, trial["cursor_size"])
+        cursor_path = ShapeStim(
+            win, vertices=[(0.0, 0.0)], lineColor="white", closeShape=False
+        )
+        return targets, target_labels, cursor, cursor_path
+
+    def _make_sound(self, trial: vstt.vtypes.Trial) -> Sound | None:
+        if not trial["play_sound"]:
+            return None
+        # create the tone once per condition, so no audio buffer is allocated at target onset
+        return Sound("A", secs=0.160, blockSize=1024, stereo=True)
+
+    def play_sound(self) -> None:
+        """Play the preloaded tone and record the time at which it was started"""
+        if self.sound is None:
+            return
+        # stop any previous playback so the tone restarts from the beginning
+        self.sound.stop()
+        self.sound.play()
+        self.sound_onset_time = self.clock.getTime()
 
     def cursor_path_add_vertex(
         self, vertex: tuple[float, float], clear_existing: bool = False
@@ -106,48 +218,63 @@ class TrialManager:
         self._cursor_path.vertices = self._cursor_path_vertices
 
 
-def _contains_mixed_length_numpy_arrays(items: Iterable) -> bool:
-    return (
-        len(set([item.shape if isinstance(item, np.ndarray) else 1 for item in items]))
-        > 1
-    )
-
-
 def add_trial_data_to_trial_handler(
-    trial_data: TrialData, trial_handler: TrialHandlerExt
+    trial_data: TrialData, trial_handler: TrialHandlerExt, storage: str = "float64"
 ) -> None:
-    for name, value in vars(trial_data).items():
-        dtype = object if _contains_mixed_length_numpy_arrays(value) else None
-        trial_handler.addData(name, np.array(value, dtype=dtype))
+    add_trial_data(trial_handler, vars(trial_data), storage)
 
 
 class MotorTask:
-    def __init__(self, experiment: Experiment, win: Window | None = None):
+    def __init__(
+        self,
+        experiment: Experiment,
+        win: Window | None = None,
+        monitor: ExperimentMonitor | None = None,
+        seed: int | None = None,
+    ):
         self.close_window_when_done = False
         self.experiment = experiment
+        self.monitor = monitor
+        self._stats: Future[pd.DataFrame] | None = None
         if win is None:
             win = Window(fullscr=True, units="height")
             self.close_window_when_done = True
         self.win = win
         if not experiment.trial_list:
             return
-        self.trial_managers = {
-            condition_index: TrialManager(self.win, trial)
-            for condition_index, trial in enumerate(experiment.trial_list)
-        }
-        self.trial_handler = experiment.create_trialhandler()
-        self.mouse = Mouse(visible=False, win=win)
-        self.kb = Keyboard()
-        self.js = joystick_wrapper.get_joystick()
-        self.rng = np.random.default_rng()
+        vis.wait_for_preloaded_fonts()
+        # the TrialManager of each condition is created when its block of trials starts
+        self.stimulus_pool = StimulusPool()
+        self.trial_handler = experiment.create_trialhandler(seed)
+        self.schedule = Schedule.from_dict(self.trial_handler.extraInfo["schedule"])
+        self.mouse, self.kb, self.js = self._make_input_devices()
+        self.real_time_mode = RealTimeMode(experiment.metadata["real_time_mode"])
+
+    def _make_clock(self) -> Clock:
+        return Clock()
+
+    def _make_trial_manager(self, trial: vstt.vtypes.Trial) -> TrialManager:
+        return TrialManager(self.win, trial, self._make_clock(), self.stimulus_pool)
+
+    def _make_input_devices(
+        self,
+    ) -> tuple[Mouse, Keyboard | None, joystick.Joystick | None]:
+        return (
+            Mouse(visible=False, win=self.win),
+            Keyboard(),
+            joystick_wrapper.get_joystick(),
+        )
 
     def run(self) -> bool:
         if not self.experiment.trial_list:
             return self._clean_up_and_return(False)
         try:
             self._do_trials()
+            self.trial_handler.extraInfo["real_time_mode"] = dict(
+                self.real_time_mode.status
+            )
             self.experiment.trial_handler_with_results = self.trial_handler
-            self.experiment.stats = stats_dataframe(self.trial_handler)
+            self.experiment.stats = self._start_stats()
             self.experiment.has_unsaved_changes = True
             return self._clean_up_and_return(True)
         except vis.MotorTaskCancelledByUser:
@@ -159,6 +286,19 @@ class MotorTask:
             if self.win is not None and self.close_window_when_done:
                 self.win.close()
             raise
+        finally:
+            self.real_time_mode.stop()
+            if self.monitor is not None:
+                self.monitor.finish()
+
+    def _is_final_trial(self) -> bool:
+        # nRemaining of the trial handler is only updated when the next trial is requested
+        return bool(self.trial_handler.thisN == self.trial_handler.nTotal - 1)
+
+    def _start_stats(self) -> Future[pd.DataFrame]:
+        if self._stats is None:
+            self._stats = vstt.stats.stats_dataframe_in_background(self.trial_handler)
+        return self._stats
 
     def _do_trials(self) -> None:
         self._do_splash_screen()
@@ -167,10 +307,11 @@ class MotorTask:
         ]
         current_condition_index = -1
         current_condition_first_trial_index = 0
-        current_condition_clock = Clock()
+        current_condition_clock = self._make_clock()
         current_condition_max_time = 0.0
         self.mouse.setPos((0.0, 0.0))
         current_cursor_pos = (0.0, 0.0)
+        self.real_time_mode.start()
         for trial in self.trial_handler:
             if self.trial_handler.thisIndex != current_condition_index:
                 # starting a new set of conditions
@@ -178,7 +319,7 @@ class MotorTask:
                 current_condition_max_time = trial["condition_timeout"]
                 current_condition_index = self.trial_handler.thisIndex
                 current_condition_first_trial_index = self.trial_handler.thisTrialN
-                trial_manager = self.trial_managers[current_condition_index]
+                trial_manager = self._make_trial_manager(trial)
             condition_trial_indices[self.trial_handler.thisIndex].append(
                 self.trial_handler.thisTrialN
             )
@@ -193,22 +334,24 @@ class MotorTask:
                     current_cursor_pos,
                     current_condition_max_time - current_condition_clock.getTime(),
                 )
+            stats = None
+            if self._is_final_trial():
+                # all trials done: calculate stats in the background, and use them for the final results display
+                stats = self._start_stats()
             is_final_trial_of_block = (
                 len(condition_trial_indices[self.trial_handler.thisIndex])
                 == trial["weight"]
             )
             if is_final_trial_of_block and trial["post_block_delay"] > 0:
-                vis.display_results(
+                self._display_results(
                     trial["post_block_delay"],
                     trial["enter_to_skip_delay"],
                     trial["show_delay_countdown"],
                     self.trial_handler if trial["post_block_display_results"] else None,
-                    self.experiment.display_options,
                     current_condition_first_trial_index,
                     True,
-                    self.win,
-                    self.mouse,
                     current_cursor_pos,
+                    stats=stats,
                 )
         if self.win.nDroppedFrames > 0:
             logging.warning(f"Dropped {self.win.nDroppedFrames} frames")
@@ -222,6 +365,31 @@ class MotorTask:
             win=self.win,
         )
 
+    def _display_results(
+        self,
+        display_time_seconds: float,
+        enter_to_skip_delay: bool,
+        show_delay_countdown: bool,
+        trial_handler: TrialHandlerExt | None,
+        i_trial: int,
+        all_trials_for_this_condition: bool,
+        mouse_pos: tuple[float, float],
+        stats: Future[pd.DataFrame] | None = None,
+    ) -> None:
+        vis.display_results(
+            display_time_seconds,
+            enter_to_skip_delay,
+            show_delay_countdown,
+            trial_handler,
+            self.experiment.display_options,
+            i_trial,
+            all_trials_for_this_condition,
+            self.win,
+            self.mouse,
+            mouse_pos,
+            stats=stats,
+        )
+
     def _do_trial(
         self,
         trial: dict[str, Any],
@@ -235,7 +403,8 @@ class MotorTask:
         trial_manager.final_target_display_time_previous_trial = (
             trial_manager.most_recent_target_display_time
         )
-        trial_data = TrialData(trial, self.rng)
+        rows = self.schedule.trial_rows(self.trial_handler.thisTrialN)
+        trial_data = TrialData(trial, target_indices=self.schedule.target_indices[rows])
         self.win.recordFrameIntervals = True
         trial_manager.clock.reset()
         vis.update_target_colors(
@@ -245,13 +414,15 @@ class MotorTask:
             vis.update_target_label_colors(
                 trial_manager.target_labels, trial["show_inactive_targets"], None
             )
-        for index in trial_data.target_indices:
+        self.real_time_mode.begin_targets()
+        for row in rows:
             if (
                 condition_timeout <= 0.0
                 or trial_manager.clock.getTime() < condition_timeout
             ):
-                self._do_target(trial, index, trial_manager, trial_data)
+                self._do_target(trial, row, trial_manager, trial_data)
         self.win.recordFrameIntervals = False
+        self.real_time_mode.end_targets()
         if trial["automove_cursor_to_center"]:
             trial_data.to_center_success = [True] * trial["num_targets"]
         if (
@@ -259,35 +430,51 @@ class MotorTask:
             or trial_manager.clock.getTime() < condition_timeout
         ):
             # only store trial data if we didn't run out of time for this condition
-            add_trial_data_to_trial_handler(trial_data, self.trial_handler)
+            add_trial_data_to_trial_handler(
+                trial_data,
+                self.trial_handler,
+                self.experiment.metadata["trajectory_storage"],
+            )
+            if self.monitor is not None:
+                self.monitor.publish(
+                    trial_summary(
+                        trial_data,
+                        self.trial_handler.thisTrialN,
+                        self.trial_handler.thisIndex,
+                    )
+                )
         if trial["post_trial_delay"] > 0:
-            vis.display_results(
+            stats = None
+            if self._is_final_trial():
+                # final trial: start the stats that are also used after the trial loop
+                stats = self._start_stats()
+            self._display_results(
                 trial["post_trial_delay"],
                 trial["enter_to_skip_delay"],
                 trial["show_delay_countdown"],
                 self.trial_handler if trial["post_trial_display_results"] else None,
-                self.experiment.display_options,
                 self.trial_handler.thisTrialN,
                 False,
-                self.win,
-                self.mouse,
                 trial_manager.cursor.pos,
+                stats=stats,
             )
         return trial_manager.cursor.pos
 
     def _do_target(
-        self, trial: dict[str, Any], index: int, tm: TrialManager, trial_data: TrialData
+        self, trial: dict[str, Any], row: int, tm: TrialManager, trial_data: TrialData
     ) -> None:
+        # row: the index of this target in the schedule
         minimum_window_for_flip = 1.0 / 60.0
         mouse_pos = tm.cursor.pos
         stop_waiting_time = 0.0
         stop_target_time = 0.0
         if trial["fixed_target_intervals"]:
-            num_completed_targets = len(trial_data.to_target_timestamps)
-            stop_waiting_time = (num_completed_targets + 1) * trial[
-                "target_duration"
-            ] - tm.final_target_display_time_previous_trial
+            stop_waiting_time = (
+                self.schedule.target_display_times[row]
+                - tm.final_target_display_time_previous_trial
+            )
             stop_target_time = stop_waiting_time + trial["target_duration"]
+        index = self.schedule.target_indices[row]
         for target_index in _get_target_indices(index, trial):
             t0 = tm.clock.getTime()
             is_central_target = target_index == trial["num_targets"]
@@ -357,14 +544,16 @@ class MotorTask:
                 vis.update_target_label_colors(
                     tm.target_labels, trial["show_inactive_targets"], target_index
                 )
+            tm.sound_onset_time = np.nan
             if trial["play_sound"]:
-                Sound("A", secs=0.160, blockSize=1024, stereo=True).play()
+                # start the tone immediately after the flip that displays the target
+                self.win.callOnFlip(tm.play_sound)
             if is_central_target:
                 trial_data.to_center_num_timestamps_before_visible.append(
                     len(mouse_times)
                 )
             else:
-                trial_data.target_pos.append(tm.targets.xys[target_index])
+                trial_data.target_pos.append(self.schedule.target_pos[row])
                 trial_data.to_target_num_timestamps_before_visible.append(
                     len(mouse_times)
                 )
@@ -418,8 +607,10 @@ class MotorTask:
                 tm.green_target_index = target_index
             if is_central_target:
                 trial_data.to_center_success.append(success)
+                trial_data.to_center_sound_onset_timestamps.append(tm.sound_onset_time)
             else:
                 trial_data.to_target_success.append(success)
+                trial_data.to_target_sound_onset_timestamps.append(tm.sound_onset_time)
             if is_central_target:
                 trial_data.to_center_timestamps.append(np.array(mouse_times))
                 trial_data.to_center_mouse_positions.append(np.array(mouse_positions))
@@ -0,0 +1,119 @@
+"""
+Run the MotorTask in a separate process
+
+The task runs in a fresh python interpreter which only imports psychopy and :mod:`vstt.task`,
+so the Qt event loop, garbage collection of GUI objects and anything else loaded by the GUI process
+can't compete with the frame loop of the task.
+The statistics are only imported in the subprocess once all trials are done.
+The subprocess is started with the "spawn" method of :mod:`multiprocessing`, with the experiment
+and the queue of the live monitor (which keeps running in the parent process) as arguments.
+The validated trial conditions, the trial handler with the results and their statistics
+are sent back through a pipe.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from typing import TYPE_CHECKING
+from typing import Any
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+
+    from vstt.experiment import Experiment
+    from vstt.monitor import ExperimentMonitor
+
+
+def run_task_in_subprocess(
+    experiment: Experiment,
+    headless: bool = False,
+    monitor: ExperimentMonitor | None = None,
+) -> bool:
+    """
+    Run the MotorTask for an experiment in a separate process
+
+    If the task is completed, the results are stored in the experiment as if the task had run in this process.
+
+    :param experiment: The experiment to run
+    :param headless: Run with the simulated participant from :mod:`vstt.headless` instead of a window
+    :param monitor: Optional live monitor from :mod:`vstt.monitor` to publish the trial summaries to
+    :return: True if the task was completed
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_run_task_process,
+        args=(
+            experiment._as_dict(),
+            headless,
+            monitor.queue if monitor is not None else None,
+            sender,
+        ),
+    )
+    process.start()
+    # only the subprocess can send results, so receiving fails if it exits without sending them
+    sender.close()
+    try:
+        task_result = receiver.recv()
+    except EOFError:
+        task_result = None
+    finally:
+        receiver.close()
+        process.join()
+    if task_result is None:
+        raise RuntimeError(f"Task process failed with exit code {process.exitcode}")
+    if task_result["error"] is not None:
+        raise RuntimeError(task_result["error"])
+    # the trial list is validated by the task, and is the trial list of the trial handler
+    experiment.trial_list = task_result["trial_list"]
+    if task_result["success"]:
+        experiment.trial_handler_with_results = task_result["trial_handler"]
+        experiment.stats = task_result["stats"]
+        experiment.has_unsaved_changes = True
+    return task_result["success"]
+
+
+def _run_task(
+    experiment_dict: dict[str, Any], headless: bool, monitor_queue: Any
+) -> dict[str, Any]:
+    from vstt.experiment import Experiment
+
+    monitor = None
+    if monitor_queue is not None:
+        from vstt.monitor import ExperimentMonitor
+
+        monitor = ExperimentMonitor(queue=monitor_queue)
+    experiment = Experiment()
+    experiment.metadata = experiment_dict["metadata"]
+    experiment.display_options = experiment_dict["display_options"]
+    experiment.trial_list = experiment_dict["trial_list"]
+    if headless:
+        from vstt.headless import HeadlessMotorTask
+
+        success = HeadlessMotorTask(experiment, monitor=monitor).run()
+    else:
+        from vstt.task import MotorTask
+
+        success = MotorTask(experiment, monitor=monitor).run()
+    return {
+        "success": success,
+        "trial_list": experiment.trial_list,
+        "trial_handler": experiment.trial_handler_with_results if success else None,
+        # waits for the stats that the task calculates in the background
+        "stats": experiment.stats if success else None,
+        "error": None,
+    }
+
+
+def _run_task_process(
+    experiment_dict: dict[str, Any],
+    headless: bool,
+    monitor_queue: Any,
+    sender: Connection,
+) -> None:
+    try:
+        result = _run_task(experiment_dict, headless, monitor_queue)
+    except Exception as e:
+        result = {"success": False, "error": f"{e}"}
+    with sender:
+        sender.send(result)
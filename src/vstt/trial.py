@@ -1,15 +1,22 @@
 from __future__ import annotations
 
 import copy
+import itertools
+import logging
+from typing import TYPE_CHECKING
 from typing import Any
 from typing import Mapping
+from typing import Sequence
 
 import numpy as np
-from psychopy.gui.qtgui import DlgFromDict
 
+from vstt.common import _has_valid_type
 from vstt.common import import_typed_dict
 from vstt.vtypes import Trial
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 def describe_trial(trial: Trial) -> str:
     repeats = f"{trial['weight']} repeat{'s' if trial['weight'] > 1 else ''}"
@@ -115,6 +122,8 @@ def get_trial_from_user(
         if target_order != order_of_targets[0]:
             order_of_targets.append(target_order)
     trial["target_order"] = order_of_targets
+    from psychopy.gui.qtgui import DlgFromDict
+
     dialog = DlgFromDict(
         trial, title="Trial conditions", labels=trial_labels(), sortKeys=False
     )
@@ -123,34 +132,333 @@ def get_trial_from_user(
     return import_and_validate_trial(trial)
 
 
-def import_and_validate_trial(trial_or_dict: Mapping[str, Any]) -> Trial:
-    trial = import_typed_dict(trial_or_dict, default_trial())
-    # make any negative time durations zero
-    for duration in [
-        "condition_timeout",
-        "target_duration",
-        "central_target_duration",
-        "pre_target_delay",
-        "pre_central_target_delay",
-        "pre_first_target_extra_delay",
-        "post_trial_delay",
-        "post_block_delay",
-    ]:
-        if trial[duration] < 0.0:  # type: ignore
-            trial[duration] = 0.0  # type: ignore
+# durations which are made zero if they are negative
+_durations = [
+    "condition_timeout",
+    "target_duration",
+    "central_target_duration",
+    "pre_target_delay",
+    "pre_central_target_delay",
+    "pre_first_target_extra_delay",
+    "post_trial_delay",
+    "post_block_delay",
+]
+
+
+def _validated_target_indices(
+    target_order: str | list,
+    num_targets: int,
+    target_indices: str,
+    rng: np.random.Generator,
+) -> str:
     # convert string of target indices to a numpy array of ints
-    target_indices = np.fromstring(trial["target_indices"], dtype="int", sep=" ")
-    if trial["target_order"] == "fixed":
+    indices = np.fromstring(target_indices, dtype="int", sep=" ")
+    if target_order == "fixed":
         # clip indices to valid range
-        target_indices = np.clip(target_indices, 0, trial["num_targets"] - 1)
+        indices = np.clip(indices, 0, num_targets - 1)
     else:
         # construct clockwise sequence
-        target_indices = np.array(range(trial["num_targets"]))
-        if trial["target_order"] == "anti-clockwise":
-            target_indices = np.flip(target_indices)
-        elif trial["target_order"] == "random":
-            rng = np.random.default_rng()
-            rng.shuffle(target_indices)
+        indices = np.array(range(num_targets))
+        if target_order == "anti-clockwise":
+            indices = np.flip(indices)
+        elif target_order == "random":
+            rng.shuffle(indices)
     # convert array of indices back to a string
-    trial["target_indices"] = " ".join(f"{int(i)}" for i in target_indices)
+    return " ".join(f"{int(i)}" for i in indices)
+
+
+def import_and_validate_trial(trial_or_dict: Mapping[str, Any]) -> Trial:
+    trial = import_typed_dict(trial_or_dict, default_trial())
+    # make any negative time durations zero
+    for duration in _durations:
+        if trial[duration] < 0.0:  # type: ignore
+            trial[duration] = 0.0  # type: ignore
+    trial["target_indices"] = _validated_target_indices(
+        trial["target_order"],
+        trial["num_targets"],
+        trial["target_indices"],
+        np.random.default_rng(),
+    )
     return trial
+
+
+def _import_column(
+    df: pd.DataFrame,
+    key: str,
+    default_value: Any,
+    rows: Sequence[Mapping[str, Any]] | None,
+) -> list:
+    # the values of a key for all trials, with the same checks and conversions as import_typed_dict
+    n_trials = df.shape[0]
+    if key not in df:
+        logging.warning(f"Key '{key}' missing, using default '{default_value}'")
+        return [default_value] * n_trials
+    column = df[key]
+    values = column.tolist()
+    is_missing = np.zeros(n_trials, dtype=bool)
+    from_rows = False
+    if rows is not None and column.isna().any():
+        from_rows = True
+        # in a DataFrame made from a list of dicts, None values and keys missing from some of the dicts are NaN
+        is_missing = np.array([key not in row for row in rows])
+        values = [row.get(key) for row in rows]
+        if np.any(is_missing):
+            logging.warning(
+                f"Key '{key}' missing in {np.count_nonzero(is_missing)} trials, using default '{default_value}'"
+            )
+    correct_type = type(default_value)
+    kind = column.dtype.kind
+    if not from_rows:
+        # fast paths for columns where all values have a valid type
+        if correct_type is bool and kind == "b":
+            return values
+        if correct_type is float and kind in "iuf":
+            return column.astype(float).tolist()
+        if correct_type is int and kind in "iu":
+            return values
+        if (
+            correct_type is int
+            and kind == "f"
+            and np.all(np.isfinite(column.to_numpy()))
+        ):
+            return column.astype(np.int64).tolist()
+        if correct_type is str and all(type(value) is str for value in values):
+            return values
+    invalid = []
+    failed = []
+    for index, value in enumerate(values):
+        if is_missing[index]:
+            values[index] = default_value
+            continue
+        if not _has_valid_type(value, correct_type):
+            invalid.append(value)
+        try:
+            values[index] = correct_type(value)
+        except (ValueError, TypeError):
+            failed.append(value)
+            values[index] = default_value
+    if invalid:
+        logging.warning(
+            f"Key '{key}' invalid in {len(invalid)} trials: expected {correct_type}, got e.g. {type(invalid[0])} '{invalid[0]}'"
+        )
+    if failed:
+        logging.warning(
+            f"Failed to coerce Key '{key}' in {len(failed)} trials, e.g. {type(failed[0])} '{failed[0]}', to correct type {correct_type}"
+        )
+    return values
+
+
+def import_and_validate_trials(
+    trials: pd.DataFrame | Sequence[Mapping[str, Any]],
+) -> list[Trial]:
+    """
+    Import and validate a list of trial conditions
+
+    This gives the same trials as calling :func:`import_and_validate_trial` for each trial,
+    but the values of each key are checked and converted for all trials at once,
+    and any warnings are logged once per key with the number of trials they apply to.
+
+    :param trials: The trial conditions, as a DataFrame with a row for each trial or a list of dicts
+    :return: The list of validated trials
+    """
+    import pandas as pd
+
+    rows = None
+    if isinstance(trials, pd.DataFrame):
+        df = trials
+    else:
+        rows = trials
+        df = pd.DataFrame.from_records(list(rows))
+    if df.shape[0] == 0:
+        return []
+    columns = {
+        key: _import_column(df, key, default_value, rows)
+        for key, default_value in default_trial().items()
+    }
+    for key in df.columns:
+        if key not in columns:
+            logging.warning(f"Ignoring unknown key '{key}'")
+    # make any negative time durations zero
+    for duration in _durations:
+        values = np.array(columns[duration])
+        if np.any(values < 0.0):
+            columns[duration] = np.where(values < 0.0, 0.0, values).tolist()
+    # the target indices only need to be constructed once for each non-random combination
+    rng = np.random.default_rng()
+    target_indices: dict[tuple, str] = {}
+    for index, key in enumerate(
+        zip(
+            columns["target_order"],
+            columns["num_targets"],
+            columns["target_indices"],
+        )
+    ):
+        if key[0] == "random":
+            columns["target_indices"][index] = _validated_target_indices(*key, rng)
+            continue
+        if key not in target_indices:
+            target_indices[key] = _validated_target_indices(*key, rng)
+        columns["target_indices"][index] = target_indices[key]
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]  # type: ignore
+
+
+def expand_sweep(sweep: Mapping[str, Any]) -> list[Trial]:
+    """
+    The trial conditions of a sweep
+
+    A sweep is a compact description of a factorial design: a dict with a ``"base"`` trial,
+    and a list of ``"factors"``, each of which is a dict of keys with equally long lists of values
+    that are varied together. There is a trial condition for each combination of the values of the factors,
+    in the order of :func:`itertools.product`, i.e. the values of the last factor vary fastest.
+    For example this sweep has 6 conditions, and any keys not in the base trial have their default values::
+
+        {
+            "base": {"num_targets": 4, "target_order": "random"},
+            "factors": [
+                {"cursor_rotation_degrees": [0.0, 30.0, 60.0]},
+                {"target_size": [0.02, 0.04], "central_target_size": [0.01, 0.02]},
+            ],
+        }
+
+    :param sweep: The sweep
+    :return: The list of validated trial conditions
+    """
+    base = {**default_trial(), **sweep["base"]}
+    factor_keys = []
+    factor_values = []
+    for factor in sweep["factors"]:
+        _sweep_factor_length(factor)
+        factor_keys.append(list(factor))
+        factor_values.append(list(zip(*factor.values())))
+    trials = []
+    for combination in itertools.product(*factor_values):
+        trial = dict(base)
+        for keys, values in zip(factor_keys, combination):
+            trial.update(zip(keys, values))
+        trials.append(trial)
+    return import_and_validate_trials(trials)
+
+
+def _sweep_factor_length(factor: Mapping[str, Any]) -> int:
+    if not isinstance(factor, Mapping) or not all(
+        isinstance(values, (list, tuple)) for values in factor.values()
+    ):
+        raise ValueError(f"Sweep factor {factor} is not a dict of lists of values")
+    lengths = {len(values) for values in factor.values()}
+    if 0 in lengths:
+        raise ValueError(f"Sweep factor {list(factor)} has no values")
+    if len(lengths) != 1:
+        raise ValueError(
+            f"Sweep factor {list(factor)} has value lists of different lengths"
+        )
+    return lengths.pop()
+
+
+def import_and_validate_sweep(sweep: Mapping[str, Any]) -> dict[str, Any]:
+    """
+    Import and validate a sweep without expanding it
+
+    The values of the sweep are validated as trial conditions with :func:`import_and_validate_trials`:
+    one with the first value of each factor, and one for each of the other values of each factor.
+    Invalid values are replaced with their defaults, and unknown keys are removed.
+    Values that depend on each other, such as ``num_targets`` and ``target_indices``,
+    should be varied in the same factor.
+
+    :param sweep: The sweep, see :func:`expand_sweep`
+    :return: The validated sweep
+    """
+    if (
+        not isinstance(sweep, Mapping)
+        or not isinstance(sweep.get("base"), Mapping)
+        or not isinstance(sweep.get("factors"), (list, tuple))
+    ):
+        raise ValueError("Sweep must be a dict with a base trial and a list of factors")
+    factors = sweep["factors"]
+    lengths = [_sweep_factor_length(factor) for factor in factors]
+    first = dict(sweep["base"])
+    for factor in factors:
+        first.update((key, values[0]) for key, values in factor.items())
+    trials = [first]
+    for factor, length in zip(factors, lengths):
+        for i in range(1, length):
+            trials.append(
+                {**first, **{key: values[i] for key, values in factor.items()}}
+            )
+    validated = import_and_validate_trials(trials)
+    factor_keys = {key for factor in factors for key in factor}
+    base = {
+        key: _sweep_column(validated[:1], key)[0]
+        for key in validated[0]
+        if key not in factor_keys
+    }
+    validated_factors = []
+    start = 1
+    for factor, length in zip(factors, lengths):
+        factor_trials = [validated[0], *validated[start : start + length - 1]]
+        start += length - 1
+        validated_factor = {
+            key: _sweep_column(factor_trials, key)
+            for key in factor
+            if key in validated[0]
+        }
+        if validated_factor:
+            validated_factors.append(validated_factor)
+    return {"base": base, "factors": validated_factors}
+
+
+def _sweep_column(trial_list: Sequence[Trial], key: str) -> list:
+    if key != "target_indices":
+        return [trial[key] for trial in trial_list]  # type: ignore
+    # target indices are only kept for fixed target orders, otherwise they are generated from the order
+    return [
+        trial["target_indices"]
+        if trial["target_order"] == "fixed"
+        else " ".join(f"{i}" for i in range(trial["num_targets"]))
+        for trial in trial_list
+    ]
+
+
+def find_sweep(trial_list: Sequence[Trial]) -> dict[str, Any] | None:
+    """
+    The sweep with these trial conditions, if there is one
+
+    This is the inverse of :func:`expand_sweep`: if the trial conditions are all the combinations
+    of the values of some factors, in the same order as :func:`expand_sweep`, the sweep is returned.
+
+    :param trial_list: The list of validated trial conditions
+    :return: The sweep, or None if the trial conditions are not a sweep
+    """
+    n_trials = len(trial_list)
+    if n_trials < 2:
+        return None
+    base = dict(trial_list[0])
+    # the keys that vary, grouped by the number of trials before their value changes
+    factors: dict[int, dict[str, list]] = {}
+    for key in base:
+        values = _sweep_column(trial_list, key)
+        base[key] = values[0]
+        stride = next((i for i, v in enumerate(values) if v != values[0]), n_trials)
+        if stride == n_trials:
+            continue
+        distinct_values = list(dict.fromkeys(values))
+        count = len(distinct_values)
+        if values != [distinct_values[(i // stride) % count] for i in range(n_trials)]:
+            return None
+        factors.setdefault(stride, {})[key] = distinct_values
+    # the stride of each factor must be the product of the numbers of values of the following factors
+    expected_stride = 1
+    for stride in sorted(factors):
+        values_list = list(factors[stride].values())
+        if stride != expected_stride or len({len(v) for v in values_list}) != 1:
+            return None
+        expected_stride *= len(values_list[0])
+    if expected_stride != n_trials:
+        return None
+    for factor in factors.values():
+        for key in factor:
+            base.pop(key)
+    return {
+        "base": base,
+        "factors": [factors[stride] for stride in sorted(factors, reverse=True)],
+    }
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from psychopy.data import TrialHandlerExt
+from qtpy import QtCore
+from qtpy import QtGui
+from qtpy import QtWidgets
+
+from vstt.raster import _to_rgb
+from vstt.raster import background_color
+from vstt.vis import make_stats_scene
+from vstt.vis import select_stats
+from vstt.vtypes import DisplayOptions
+
+# the maximum number of results scenes to keep in memory
+max_scene_cache_size = 64
+# paths are simplified for a window this many times larger than the viewer, so zooming in stays smooth
+zoom_headroom = 4
+# the width of the results display in height units that should fit in the viewer at the default zoom
+fit_width = 1.5
+# the range of zoom factors
+min_zoom = 0.25
+max_zoom = 40.0
+
+# qt alignment flags corresponding to the psychopy TextBox2 anchors used in the results display
+_text_flags = {
+    "center": QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter,
+    "top_center": QtCore.Qt.AlignHCenter | QtCore.Qt.AlignTop,
+    "top_left": QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop,
+}
+
+
+def _qcolor(color: Any) -> QtGui.QColor:
+    return QtGui.QColor(*_to_rgb(color))
+
+
+def _painter_path(vertices: Any, close: bool) -> QtGui.QPainterPath:
+    # NaN vertices separate the individual paths of a batched line
+    path = QtGui.QPainterPath()
+    move = True
+    for x, y in np.asarray(vertices, dtype=float).reshape(-1, 2):
+        if np.isnan(x):
+            move = True
+        elif move:
+            path.moveTo(x, y)
+            move = False
+        else:
+            path.lineTo(x, y)
+    if close:
+        path.closeSubpath()
+    return path
+
+
+class ResultsViewer(QtWidgets.QWidget):
+    """
+    Draws the results display of :mod:`vstt.vis` with a QPainter
+
+    Drag with the mouse to pan, use the mouse wheel to zoom, and double click to reset the view.
+    """
+
+    def __init__(self, parent: QtWidgets.QWidget | None = None):
+        super().__init__(parent)
+        self.setMinimumSize(200, 150)
+        self.setCursor(QtCore.Qt.OpenHandCursor)
+        self._scene_cache: OrderedDict[tuple, list[tuple[str, Any]]] = OrderedDict()
+        self._items: list[tuple[str, Any]] = []
+        self._message = ""
+        self._zoom = 1.0
+        self._offset = QtCore.QPointF(0.0, 0.0)
+        self._drag_start: QtCore.QPointF | None = None
+
+    def clear(self, message: str = "") -> None:
+        """
+        Remove the displayed results
+
+        :param message: A message to display instead
+        """
+        self._items = []
+        self._message = message
+        self.update()
+
+    def clear_cache(self) -> None:
+        self._scene_cache.clear()
+
+    def show_results(
+        self,
+        trial_handler: TrialHandlerExt,
+        display_options: DisplayOptions,
+        stats_df: pd.DataFrame,
+        i_trial: int,
+        all_trials_for_this_condition: bool,
+    ) -> None:
+        """
+        Display the results of a trial, or of all the trials with the same condition
+
+        :param trial_handler: The trial handler with the results
+        :param display_options: The display options
+        :param stats_df: The stats dataframe of the trial handler
+        :param i_trial: The index of the trial
+        :param all_trials_for_this_condition: Display all the trials with the same condition as this trial
+        """
+        window_size = zoom_headroom * np.array(
+            [max(self.width(), 1), max(self._height_pixels(), 1)]
+        )
+        key = (
+            id(trial_handler),
+            i_trial,
+            all_trials_for_this_condition,
+            tuple(display_options.items()),
+            tuple(window_size),
+        )
+        items = self._scene_cache.get(key)
+        if items is None:
+            scene = make_stats_scene(
+                trial_handler,
+                display_options,
+                select_stats(stats_df, i_trial, all_trials_for_this_condition),
+                window_size,
+                all_trials_for_this_condition,
+            )
+            items = [self._make_item(name, kwargs) for name, kwargs in scene]
+            self._scene_cache[key] = items
+            while len(self._scene_cache) > max_scene_cache_size:
+                self._scene_cache.popitem(last=False)
+        self._scene_cache.move_to_end(key)
+        self._items = items
+        self._message = ""
+        self.update()
+
+    def reset_view(self) -> None:
+        self._zoom = 1.0
+        self._offset = QtCore.QPointF(0.0, 0.0)
+        self.update()
+
+    @staticmethod
+    def _make_item(name: str, kwargs: dict[str, Any]) -> tuple[str, Any]:
+        if name == "TextBox2":
+            anchor = kwargs.get("anchor", "center")
+            return name, (
+                QtCore.QPointF(*kwargs["pos"]),
+                kwargs["text"].rstrip("\n"),
+                _qcolor(kwargs["color"]),
+                kwargs["letterHeight"],
+                _text_flags[kwargs.get("alignment", anchor)],
+                anchor,
+            )
+        if name == "Circle":
+            return name, (
+                QtCore.QPointF(*kwargs["pos"]),
+                kwargs["radius"],
+                _qcolor(kwargs["fillColor"]),
+            )
+        close = kwargs.get("closeShape", False)
+        # psychopy line widths are in pixels
+        pen = QtGui.QPen(_qcolor(kwargs["lineColor"]))
+        pen.setWidthF(kwargs["lineWidth"])
+        pen.setCosmetic(True)
+        brush = QtGui.QBrush(_qcolor(kwargs["fillColor"])) if close else None
+        return name, (_painter_path(kwargs["vertices"], close), pen, brush)
+
+    def _height_pixels(self) -> float:
+        # the number of pixels in one height unit at the default zoom
+        return min(self.height(), self.width() / fit_width)
+
+    def _transform(self) -> QtGui.QTransform:
+        # height units, with y pointing up and the origin at the center of the widget
+        scale = self._zoom * self._height_pixels()
+        transform = QtGui.QTransform()
+        transform.translate(
+            0.5 * self.width() + self._offset.x(),
+            0.5 * self.height() + self._offset.y(),
+        )
+        transform.scale(scale, -scale)
+        return transform
+
+    def paintEvent(self, event: QtGui.QPaintEvent) -> None:
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.fillRect(self.rect(), QtGui.QColor(*background_color))
+        if self._message:
+            painter.drawText(self.rect(), QtCore.Qt.AlignCenter, self._message)
+            return
+        transform = self._transform()
+        scale = self._zoom * self._height_pixels()
+        for name, item in self._items:
+            if name == "TextBox2":
+                self._draw_text(painter, transform.map(item[0]), scale, *item[1:])
+                continue
+            painter.setTransform(transform)
+            if name == "Circle":
+                pos, radius, color = item
+                painter.setPen(QtCore.Qt.NoPen)
+                painter.setBrush(color)
+                painter.drawEllipse(pos, radius, radius)
+            else:
+                path, pen, brush = item
+                painter.setPen(pen)
+                painter.setBrush(QtCore.Qt.NoBrush if brush is None else brush)
+                painter.drawPath(path)
+            painter.resetTransform()
+
+    @staticmethod
+    def _draw_text(
+        painter: QtGui.QPainter,
+        pos: QtCore.QPointF,
+        scale: float,
+        text: str,
+        color: QtGui.QColor,
+        letter_height: float,
+        flags: Any,
+        anchor: str,
+    ) -> None:
+        font = painter.font()
+        font.setPixelSize(max(int(round(letter_height * scale)), 1))
+        painter.setFont(font)
+        painter.setPen(color)
+        size = QtCore.QSizeF(
+            QtGui.QFontMetricsF(font)
+            .boundingRect(QtCore.QRectF(), int(flags), text)
+            .size()
+        )
+        rect = QtCore.QRectF(QtCore.QPointF(0.0, 0.0), size)
+        if anchor == "center":
+            rect.moveCenter(pos)
+        elif anchor == "top_center":
+            rect.moveTop(pos.y())
+            rect.moveLeft(pos.x() - 0.5 * size.width())
+        else:
+            rect.moveTopLeft(pos)
+        painter.drawText(rect, int(flags), text)
+
+    def mousePressEvent(self, event: QtGui.QMouseEvent) -> None:
+        if event.button() == QtCore.Qt.LeftButton:
+            self._drag_start = event.position() - self._offset
+            self.setCursor(QtCore.Qt.ClosedHandCursor)
+
+    def mouseMoveEvent(self, event: QtGui.QMouseEvent) -> None:
+        if self._drag_start is not None:
+            self._offset = event.position() - self._drag_start
+            self.update()
+
+    def mouseReleaseEvent(self, event: QtGui.QMouseEvent) -> None:
+        self._drag_start = None
+        self.setCursor(QtCore.Qt.OpenHandCursor)
+
+    def mouseDoubleClickEvent(self, event: QtGui.QMouseEvent) -> None:
+        self.reset_view()
+
+    def wheelEvent(self, event: QtGui.QWheelEvent) -> None:
+        factor = 1.0015 ** event.angleDelta().y()
+        self.zoom(factor, event.position())
+
+    def zoom(self, factor: float, pos: QtCore.QPointF | None = None) -> None:
+        """
+        Zoom in or out, keeping the point under the cursor fixed
+
+        :param factor: The factor to multiply the zoom by
+        :param pos: The position in the widget to keep fixed, the center of the widget if None
+        """
+        if pos is None:
+            pos = QtCore.QPointF(0.5 * self.width(), 0.5 * self.height())
+        zoom = min(max(self._zoom * factor, min_zoom), max_zoom)
+        center = QtCore.QPointF(0.5 * self.width(), 0.5 * self.height())
+        # the position relative to the origin of the results scales with the zoom
+        relative = pos - center - self._offset
+        self._offset = pos - center - relative * (zoom / self._zoom)
+        self._zoom = zoom
+        self.update()
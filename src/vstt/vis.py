@@ -1,33 +1,67 @@
 from __future__ import annotations
 
+import contextlib
+import string
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Iterable
+
 import numpy as np
 import pandas as pd
-from PIL.Image import Image
 from psychopy.clock import Clock
 from psychopy.colors import colorNames
 from psychopy.data import TrialHandlerExt
-from psychopy.event import Mouse
-from psychopy.hardware.keyboard import Keyboard
-from psychopy.visual.basevisual import BaseVisualStim
-from psychopy.visual.circle import Circle
-from psychopy.visual.elementarray import ElementArrayStim
-from psychopy.visual.shape import ShapeStim
-from psychopy.visual.textbox2 import TextBox2
-from psychopy.visual.window import Window
 
+import vstt
 from vstt.geom import points_on_circle
-from vstt.stats import get_closed_polygon
-from vstt.stats import list_dest_stat_label_units
-from vstt.stats import stats_dataframe
+from vstt.geom import simplify_path
 from vstt.vtypes import DisplayOptions
 from vstt.vtypes import Metadata
+from vstt.vtypes import Trial
+
+# psychopy.visual and psychopy.event are imported when stimuli are created,
+# so that results scenes can be made without a display, e.g. by `vstt render`
+if TYPE_CHECKING:
+    from PIL.Image import Image
+    from psychopy.event import Mouse
+    from psychopy.hardware.keyboard import Keyboard
+    from psychopy.visual.basevisual import BaseVisualStim
+    from psychopy.visual.elementarray import ElementArrayStim
+    from psychopy.visual.shape import ShapeStim
+    from psychopy.visual.textbox2 import TextBox2
+    from psychopy.visual.window import Window
 
 colors = [
     color for name, color in colorNames.items() if name not in ["none", "transparent"]
 ]
 
+# paths in condition views are simplified with this tolerance in pixels,
+# the simplified paths are cached until the path they were simplified from is freed
+path_simplification_pixels: float = 0.5
+_simplified_paths_cache: dict[
+    int, tuple[weakref.ReferenceType[np.ndarray], float, np.ndarray | None]
+] = {}
+
+# results of finished experiments don't change, so their stats and drawables are cached
+max_results_cache_size: int = 32
+_stats_df_cache: OrderedDict[int, tuple[TrialHandlerExt, pd.DataFrame]] = OrderedDict()
+_drawables_cache: OrderedDict[
+    tuple, tuple[TrialHandlerExt, Window, list[BaseVisualStim]]
+] = OrderedDict()
+
+# font atlases are preloaded in a background thread, see preload_fonts_in_background
+_preload_executor: ThreadPoolExecutor | None = None
+_preloaded_fonts: Future[None] | None = None
+
 
 def make_cursor(window: Window, cursor_size: float) -> ShapeStim:
+    from psychopy.visual.shape import ShapeStim
+
     return ShapeStim(
         window,
         lineColor="black",
@@ -52,6 +86,8 @@ def make_targets(
     add_central_target: bool,
     center_point_radius: float,
 ) -> ElementArrayStim:
+    from psychopy.visual.elementarray import ElementArrayStim
+
     n_elements = n_circles + 1 if add_central_target else n_circles
     sizes = [[2.0 * point_radius] * 2] * n_circles
     if add_central_target:
@@ -75,6 +111,8 @@ def make_target_labels(
     point_radius: float,
     labels_string: str,
 ) -> list[TextBox2]:
+    from psychopy.visual.textbox2 import TextBox2
+
     text_boxes: list[TextBox2] = []
     positions = points_on_circle(n_circles, radius, include_centre=False)
     labels = labels_string.strip().split(" ")
@@ -155,7 +193,7 @@ def _make_stats_txt(
     average: bool,
 ) -> str:
     txt_stats = ""
-    for destination, stat_label_units in list_dest_stat_label_units():
+    for destination, stat_label_units in vstt.stats.list_dest_stat_label_units():
         for stat, label, unit in stat_label_units:
             if display_options.get(stat, False):  # type: ignore
                 stat_str = f"{stats[stat]: .3f}{unit}"
@@ -180,47 +218,52 @@ def _make_stats_txt(
     return txt_stats
 
 
-def _make_stats_drawables(
+def make_stats_scene(
     trial_handler: TrialHandlerExt,
     display_options: DisplayOptions,
     stats_df: pd.DataFrame,
-    win: Window,
+    window_size: np.ndarray,
     all_trials_for_this_condition: bool,
-) -> list[BaseVisualStim]:
-    drawables: list[BaseVisualStim] = []
+) -> list[tuple[str, dict[str, Any]]]:
+    """
+    The elements of a results display, independent of how they are drawn
+
+    Each element is the name of a psychopy stimulus class and the keyword arguments to construct it,
+    where all positions and sizes are in height units.
+
+    :param trial_handler: The trial handler with the results
+    :param display_options: The display options
+    :param stats_df: The rows of the stats dataframe to display
+    :param window_size: The size of the window in pixels
+    :param all_trials_for_this_condition: Whether these are all the trials of a condition
+    :return: A list of (stimulus class name, keyword arguments) pairs
+    """
+    scene: list[tuple[str, dict[str, Any]]] = []
     if stats_df.shape[0] == 0:
         # no results to display
-        return drawables
+        return scene
     i_condition = stats_df.iloc[0].condition_index
     conditions = trial_handler.trialList[i_condition]
     trial_indices = stats_df.i_trial.unique()
-    drawables.append(
-        TextBox2(
-            win,
-            f"Condition {i_condition}, trial{'s' if len(trial_indices) > 1 else ''} {trial_indices}",
-            anchor="top_center",
-            pos=(0, 0.5),
-            color="black",
-            alignment="top_center",
-            letterHeight=0.02,
+    scene.append(
+        (
+            "TextBox2",
+            dict(
+                text=f"Condition {i_condition}, trial{'s' if len(trial_indices) > 1 else ''} {trial_indices}",
+                anchor="top_center",
+                pos=(0, 0.5),
+                color="black",
+                alignment="top_center",
+                letterHeight=0.02,
+            ),
         )
     )
     # stats
     letter_height = 0.014
-    # split target_pos pair into two scalars, so they survive the groupby.mean()
-    stats_df[["target_pos_x", "target_pos_y"]] = pd.DataFrame(
-        stats_df.target_pos.tolist(), index=stats_df.index
-    )
-    # convert to_target_success and to_center_success into scalars 0/1
-    stats_df.to_target_success = stats_df.to_target_success.astype(int)
-    stats_df.to_center_success = stats_df.to_center_success.astype(int)
-
-    for _, row in (
-        stats_df.groupby("target_index", as_index=False)
-        .mean(numeric_only=True)
-        .iterrows()
-    ):
-        color = colors[int(np.rint(row.target_index))]
+    for target_index, row in vstt.stats.stats_summary(
+        stats_df, "target_index"
+    ).iterrows():
+        color = colors[int(target_index)]
         txt_stats = _make_stats_txt(
             display_options, row, all_trials_for_this_condition, average=False
         )
@@ -234,41 +277,42 @@ def _make_stats_drawables(
         if n_lines <= 6:
             letter_height = 0.018
         if len(txt_stats) > 0:
-            drawables.append(
-                TextBox2(
-                    win,
-                    txt_stats,
-                    pos=text_pos,
-                    color=color,
-                    alignment="center",
-                    letterHeight=letter_height,
+            scene.append(
+                (
+                    "TextBox2",
+                    dict(
+                        text=txt_stats,
+                        pos=text_pos,
+                        color=color,
+                        alignment="center",
+                        letterHeight=letter_height,
+                    ),
                 )
             )
 
-    # update the values of to_target_success and to_center_success to the successful trial fraction or successful target fraction
-    for dest in ["target", "center"]:
-        stats_df[f"to_{dest}_success"] = (
-            get_successful_trial_fraction(stats_df, dest)
-            if all_trials_for_this_condition
-            else get_successful_target_fraction(stats_df, dest)
-        )
-
     if display_options["averages"]:
+        averages = vstt.stats.stats_summary(stats_df).iloc[0]
+        if all_trials_for_this_condition:
+            # the fraction of trials where all targets were reached instead of the fraction of targets
+            for dest in ["target", "center"]:
+                averages[f"to_{dest}_success"] = averages[f"to_{dest}_trial_success"]
         txt_stats = "Averages:\n" + _make_stats_txt(
             display_options,
-            stats_df.mean(numeric_only=True),
+            averages,
             all_trials_for_this_condition,
             average=True,
         )
-        drawables.append(
-            TextBox2(
-                win,
-                txt_stats,
-                anchor="top_left",
-                pos=(-0.5 * win.size[0] / win.size[1], 0.5),
-                color="black",
-                alignment="top_left",
-                letterHeight=letter_height,
+        scene.append(
+            (
+                "TextBox2",
+                dict(
+                    text=txt_stats,
+                    anchor="top_left",
+                    pos=(-0.5 * window_size[0] / window_size[1], 0.5),
+                    color="black",
+                    alignment="top_left",
+                    letterHeight=letter_height,
+                ),
             )
         )
     # central target
@@ -276,69 +320,213 @@ def _make_stats_drawables(
         display_options["central_target"]
         and not conditions["automove_cursor_to_center"]
     ):
-        drawables.append(
-            Circle(
-                win,
-                radius=conditions["central_target_size"],
-                pos=(0.0, 0.0),
-                fillColor=(0.1, 0.1, 0.1),
+        scene.append(
+            (
+                "Circle",
+                dict(
+                    radius=conditions["central_target_size"],
+                    pos=(0.0, 0.0),
+                    fillColor=(0.1, 0.1, 0.1),
+                ),
             )
         )
     # targets
     if display_options["targets"]:
         for _, row in stats_df.loc[stats_df.i_trial == trial_indices[0]].iterrows():
-            drawables.append(
-                Circle(
-                    win,
-                    radius=conditions["target_size"],
-                    pos=row.target_pos,
-                    fillColor=colors[row.target_index],
+            scene.append(
+                (
+                    "Circle",
+                    dict(
+                        radius=conditions["target_size"],
+                        pos=row.target_pos,
+                        fillColor=colors[row.target_index],
+                    ),
                 )
             )
-    # paths to center
+    to_target_paths = stats_df.to_target_mouse_positions
+    to_center_paths = stats_df.to_center_mouse_positions
+    if all_trials_for_this_condition:
+        # remove vertices that don't make a visible difference at this window size
+        tolerance = path_simplification_pixels / window_size[1]
+        to_target_paths = to_target_paths.map(
+            lambda path: _simplified_path(path, tolerance)
+        )
+        to_center_paths = to_center_paths.map(
+            lambda path: _simplified_path(path, tolerance)
+        )
+    # paths to center: one line for each color, with NaN vertices between paths
     if (
         display_options["to_center_paths"]
         and conditions["add_central_target"]
         and not conditions["automove_cursor_to_center"]
     ):
-        for _, row in stats_df.iterrows():
-            drawables.append(
-                ShapeStim(
-                    win,
-                    vertices=row.to_center_mouse_positions,
-                    lineColor=colors[row.target_index],
-                    closeShape=False,
-                    lineWidth=3,
-                )
-            )
+        scene += _make_batched_paths(stats_df.target_index, to_center_paths)
     # paths to target
     if display_options["to_target_paths"]:
-        for _, row in stats_df.iterrows():
-            drawables.append(
-                ShapeStim(
-                    win,
-                    vertices=row.to_target_mouse_positions,
-                    lineColor=colors[row.target_index],
-                    closeShape=False,
-                    lineWidth=3,
-                )
-            )
+        scene += _make_batched_paths(stats_df.target_index, to_target_paths)
     # fill the area closed by paths to target and center
     if display_options["area"]:
-        for _, row in stats_df.iterrows():
-            drawables.append(
-                ShapeStim(
-                    win,
-                    vertices=get_closed_polygon(
-                        row.to_target_mouse_positions, row.to_center_mouse_positions
+        for target_index, to_target_path, to_center_path in zip(
+            stats_df.target_index, to_target_paths, to_center_paths
+        ):
+            scene.append(
+                (
+                    "ShapeStim",
+                    dict(
+                        vertices=vstt.stats.get_closed_polygon(
+                            to_target_path, to_center_path
+                        ),
+                        lineColor="black",
+                        fillColor=colors[target_index],
+                        closeShape=True,
+                        lineWidth=3,
                     ),
-                    lineColor="black",
-                    fillColor=colors[row.target_index],
-                    closeShape=True,
-                    lineWidth=3,
                 )
             )
-    return drawables
+    return scene
+
+
+def _make_stats_drawables(
+    trial_handler: TrialHandlerExt,
+    display_options: DisplayOptions,
+    stats_df: pd.DataFrame,
+    win: Window,
+    all_trials_for_this_condition: bool,
+) -> list[BaseVisualStim]:
+    from psychopy.visual.circle import Circle
+    from psychopy.visual.shape import ShapeStim
+    from psychopy.visual.textbox2 import TextBox2
+
+    stimulus_classes = {"TextBox2": TextBox2, "Circle": Circle, "ShapeStim": ShapeStim}
+    wait_for_preloaded_fonts()
+    return [
+        stimulus_classes[name](win, **kwargs)
+        for name, kwargs in make_stats_scene(
+            trial_handler,
+            display_options,
+            stats_df,
+            win.size,
+            all_trials_for_this_condition,
+        )
+    ]
+
+
+def _simplified_path(path: np.ndarray, tolerance: float) -> np.ndarray:
+    # cached by the identity of the path array, without keeping it alive:
+    # the entry is removed when the path is freed, e.g. with the stats dataframe that contains it
+    key = id(path)
+    cached = _simplified_paths_cache.get(key)
+    if cached is None or cached[0]() is not path or cached[1] != tolerance:
+        if cached is None or cached[0]() is not path:
+            weakref.finalize(path, _simplified_paths_cache.pop, key, None)
+        simplified = simplify_path(path, tolerance)
+        # None if no vertices were removed, as storing the path itself would keep it alive
+        cached = (
+            weakref.ref(path),
+            tolerance,
+            None if simplified is path else simplified,
+        )
+        _simplified_paths_cache[key] = cached
+    return path if cached[2] is None else cached[2]
+
+
+def batch_paths(paths: Iterable[np.ndarray]) -> np.ndarray:
+    """
+    Concatenate paths into a single array of vertices, with a NaN vertex between consecutive paths
+
+    The NaN vertices break the line between the end of one path and the start of the next,
+    so all paths can be drawn as a single line.
+
+    :param paths: The arrays of x,y coordinates of each path
+    :return: The array of x,y coordinates of all paths
+    """
+    separator = np.full((1, 2), np.nan)
+    vertices = []
+    for path in paths:
+        path = np.asarray(path, dtype=float).reshape(-1, 2)
+        if path.shape[0] > 0:
+            vertices += [path, separator]
+    if not vertices:
+        return np.zeros((0, 2))
+    return np.concatenate(vertices[:-1])
+
+
+def _make_batched_paths(
+    target_indices: pd.Series, paths: pd.Series
+) -> list[tuple[str, dict[str, Any]]]:
+    scene: list[tuple[str, dict[str, Any]]] = []
+    for target_index in target_indices.unique():
+        vertices = batch_paths(paths[target_indices == target_index])
+        if vertices.shape[0] > 0:
+            scene.append(
+                (
+                    "ShapeStim",
+                    dict(
+                        vertices=vertices,
+                        lineColor=colors[target_index],
+                        closeShape=False,
+                        lineWidth=3,
+                    ),
+                )
+            )
+    return scene
+
+
+def _cached_stats_dataframe(trial_handler: TrialHandlerExt) -> pd.DataFrame:
+    if not trial_handler.finished:
+        return vstt.stats.stats_dataframe(trial_handler)
+    key = id(trial_handler)
+    if key not in _stats_df_cache:
+        _stats_df_cache[key] = trial_handler, vstt.stats.stats_dataframe(trial_handler)
+        while len(_stats_df_cache) > max_results_cache_size:
+            _stats_df_cache.popitem(last=False)
+    _stats_df_cache.move_to_end(key)
+    return _stats_df_cache[key][1]
+
+
+def _drawables_cache_key(
+    trial_handler: TrialHandlerExt,
+    win: Window,
+    display_options: DisplayOptions,
+    i_trial: int,
+    all_trials_for_this_condition: bool,
+) -> tuple[Any, ...] | None:
+    if not trial_handler.finished or getattr(win, "_closed", True):
+        return None
+    return (
+        id(trial_handler),
+        id(win),
+        i_trial,
+        all_trials_for_this_condition,
+        tuple(sorted(display_options.items())),
+    )
+
+
+def clear_results_cache() -> None:
+    """Remove all cached results stats, drawables and simplified paths"""
+    _stats_df_cache.clear()
+    _drawables_cache.clear()
+    _simplified_paths_cache.clear()
+
+
+def select_stats(
+    stats_df: pd.DataFrame, i_trial: int, all_trials_for_this_condition: bool
+) -> pd.DataFrame:
+    """
+    Select the rows of the stats dataframe for a trial or for all trials of its condition
+
+    :param stats_df: The stats dataframe
+    :param i_trial: The index of the trial
+    :param all_trials_for_this_condition: Select all the trials with the same condition as this trial
+    :return: A copy of the selected rows
+    """
+    if all_trials_for_this_condition:
+        condition_index = next(
+            iter(stats_df.loc[stats_df.i_trial == i_trial].condition_index.to_numpy()),
+            -1,
+        )
+        return stats_df.loc[stats_df.condition_index == condition_index].copy()
+    return stats_df.loc[stats_df.i_trial == i_trial].copy()
 
 
 def display_results(
@@ -353,27 +541,50 @@ def display_results(
     mouse: Mouse | None = None,
     mouse_pos: tuple[float, float] | None = None,
     return_screenshot: bool = False,
+    stats: pd.DataFrame | Future[pd.DataFrame] | None = None,
 ) -> Image | None:
     close_window_when_done = False
     if win is None:
         win = _make_window()
         close_window_when_done = True
     drawables = []
+    cache_key = None
     if trial_handler is not None:
-        stats_df = stats_dataframe(trial_handler)
-        if all_trials_for_this_condition:
-            condition_index = next(
-                iter(
-                    stats_df.loc[stats_df.i_trial == i_trial].condition_index.to_numpy()
-                ),
-                -1,
-            )
-            stats_df = stats_df.loc[stats_df.condition_index == condition_index]
-        else:
-            stats_df = stats_df.loc[stats_df.i_trial == i_trial]
+        cache_key = _drawables_cache_key(
+            trial_handler,
+            win,
+            display_options,
+            i_trial,
+            all_trials_for_this_condition,
+        )
+    if cache_key is not None and cache_key in _drawables_cache:
+        _drawables_cache.move_to_end(cache_key)
+        drawables = list(_drawables_cache[cache_key][2])
+    elif trial_handler is not None:
+        if isinstance(stats, Future):
+            stats = stats.result()
+        if stats is None:
+            stats = _cached_stats_dataframe(trial_handler)
+        stats_df = select_stats(
+            stats,
+            i_trial,
+            all_trials_for_this_condition,
+        )
         drawables = _make_stats_drawables(
-            trial_handler, display_options, stats_df, win, all_trials_for_this_condition
+            trial_handler,
+            display_options,
+            stats_df,
+            win,
+            all_trials_for_this_condition,
         )
+        if cache_key is not None:
+            for key, (_, cached_win, _) in list(_drawables_cache.items()):
+                if cached_win._closed:
+                    # drawables can't be re-used once their window has been closed
+                    del _drawables_cache[key]
+            _drawables_cache[cache_key] = trial_handler, win, list(drawables)
+            while len(_drawables_cache) > max_results_cache_size:
+                _drawables_cache.popitem(last=False)
     return display_drawables(
         display_time_seconds,
         enter_to_skip_delay,
@@ -396,16 +607,7 @@ def get_successful_trial_fraction(stats_df: pd.DataFrame, dest: str) -> float:
     :return: successful trial fraction
 
     """
-    trial_indices = stats_df["i_trial"].unique()
-
-    to_dest_success_trial = 0
-    for trial_index in trial_indices:
-        data = stats_df.loc[stats_df.i_trial == trial_index]
-        to_dest_success_target_number = (data[f"to_{dest}_success"]).values.sum()
-        to_dest_success_trial += 1 if to_dest_success_target_number == len(data) else 0
-    successful_trial_fraction = to_dest_success_trial / len(trial_indices)
-
-    return successful_trial_fraction
+    return float(vstt.stats.stats_summary(stats_df).iloc[0][f"to_{dest}_trial_success"])
 
 
 def get_successful_target_fraction(stats_df: pd.DataFrame, dest: str) -> float:
@@ -417,16 +619,21 @@ def get_successful_target_fraction(stats_df: pd.DataFrame, dest: str) -> float:
     :return: successful target fraction
 
     """
-    successful_target_fraction = stats_df[f"to_{dest}_success"].values.sum() / len(
-        stats_df[f"to_{dest}_success"]
-    )
-    return successful_target_fraction
+    return float(vstt.stats.stats_summary(stats_df).iloc[0][f"to_{dest}_success"])
+
+
+_press_enter_text = "Please press Enter when you are ready to continue..."
+
+# the letter heights of the results display text, see make_stats_scene
+_stats_letter_heights = [0.02, 0.014, 0.018, 0.028]
 
 
 def _make_textbox_press_enter(win: Window) -> TextBox2:
+    from psychopy.visual.textbox2 import TextBox2
+
     return TextBox2(
         win,
-        "Please press Enter when you are ready to continue...",
+        _press_enter_text,
         pos=(0, -0.47),
         color="navy",
         alignment="center",
@@ -435,6 +642,8 @@ def _make_textbox_press_enter(win: Window) -> TextBox2:
 
 
 def _make_textbox_title(title: str, win: Window) -> TextBox2:
+    from psychopy.visual.textbox2 import TextBox2
+
     return TextBox2(
         win,
         title,
@@ -448,6 +657,8 @@ def _make_textbox_title(title: str, win: Window) -> TextBox2:
 
 
 def _make_textbox_main_text(text: str, win: Window) -> TextBox2:
+    from psychopy.visual.textbox2 import TextBox2
+
     return TextBox2(
         win,
         text,
@@ -460,6 +671,8 @@ def _make_textbox_main_text(text: str, win: Window) -> TextBox2:
 
 
 def _make_textbox_countdown(text: str, win: Window) -> TextBox2:
+    from psychopy.visual.textbox2 import TextBox2
+
     return TextBox2(
         win,
         text,
@@ -471,7 +684,113 @@ def _make_textbox_countdown(text: str, win: Window) -> TextBox2:
     )
 
 
+def _main_text(metadata: Metadata) -> str:
+    return "\n\n".join(
+        [
+            metadata["display_text1"],
+            metadata["display_text2"],
+            metadata["display_text3"],
+            metadata["display_text4"],
+        ]
+    )
+
+
+def _textbox_fonts(
+    trial_list: list[Trial], metadata: Metadata
+) -> list[tuple[float, bool, str]]:
+    # the letter height, bold style and characters of the text boxes of a motor task
+    fonts = [
+        (0.06, True, metadata["display_title"]),
+        (0.03, False, _main_text(metadata) + _press_enter_text),
+        (0.2, False, string.digits),
+    ]
+    for trial in trial_list:
+        if trial["show_target_labels"]:
+            fonts.append((1.25 * trial["target_size"], True, trial["target_labels"]))
+    fonts += [(h, False, string.printable) for h in _stats_letter_heights]
+    return fonts
+
+
+def preload_fonts(
+    trial_list: list[Trial], metadata: Metadata, window_height: float
+) -> None:
+    """
+    Create the font atlases used by the text boxes of a motor task
+
+    The first time a text box is created with a given font size, psychopy rasterizes the glyphs
+    of its text into a font atlas, which takes around 0.1s for each font size.
+    This creates and caches the font atlases in advance for the title, text and countdown
+    of the splash screen, the target labels of each trial and the text of the results display.
+    The OpenGL textures are created later from the cached atlases by the thread that owns the window.
+
+    :param trial_list: The list of trials
+    :param metadata: The experiment metadata
+    :param window_height: The height in pixels of the window the task will be displayed in
+    """
+    from psychopy.visual.textbox2.textbox2 import allFonts
+
+    for letter_height, bold, characters in _textbox_fonts(trial_list, metadata):
+        # same font and size as the TextBox2 defaults with height units
+        font = allFonts.getFont(
+            "Noto Sans",
+            size=letter_height * window_height,
+            bold=bold,
+            italic=False,
+            lineSpacing=1.0,
+        )
+        if not font:
+            continue
+        chars = "".join(sorted(set(characters) - set(string.whitespace)))
+        # if the glyphs don't fit in the atlas they are fetched when needed instead
+        with contextlib.suppress(RuntimeError):
+            font.fetch(chars)
+
+
+def preload_fonts_in_background(
+    trial_list: list[Trial], metadata: Metadata, window_height: float
+) -> Future[None]:
+    """
+    Start preloading the fonts used by a motor task in a background thread
+
+    Use :func:`wait_for_preloaded_fonts` before creating any text boxes.
+
+    :param trial_list: The list of trials
+    :param metadata: The experiment metadata
+    :param window_height: The height in pixels of the window the task will be displayed in
+    :return: A future which is done when the fonts are loaded
+    """
+    global _preload_executor
+    global _preloaded_fonts
+    if _preload_executor is None:
+        _preload_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="vstt-fonts"
+        )
+    # copies, as the experiment can be modified in the gui while the fonts are loading
+    _preloaded_fonts = _preload_executor.submit(
+        preload_fonts,
+        [trial.copy() for trial in trial_list],
+        metadata.copy(),
+        window_height,
+    )
+    return _preloaded_fonts
+
+
+def wait_for_preloaded_fonts() -> None:
+    """
+    Wait until any fonts being preloaded in the background are ready
+
+    The font cache is not thread safe, so this should be called before creating any text boxes.
+    A failure to preload the fonts is ignored, as they are then created when needed.
+    """
+    global _preloaded_fonts
+    if _preloaded_fonts is not None:
+        wait([_preloaded_fonts])
+        _preloaded_fonts = None
+
+
 def _make_window() -> Window:
+    from psychopy.visual.window import Window
+
     return Window(fullscr=True, units="height")
 
 
@@ -497,6 +816,8 @@ def display_drawables(
     else:
         remaining_display_time = int(np.ceil(display_time_seconds))
         if enter_to_skip_delay:
+            from psychopy.hardware.keyboard import Keyboard
+
             kb = Keyboard()
             kb.clearEvents()
             drawables.append(_make_textbox_press_enter(win))
@@ -541,16 +862,9 @@ def splash_screen(
     if win is None:
         win = _make_window()
         close_window_when_done = True
+    wait_for_preloaded_fonts()
     drawables = [_make_textbox_title(metadata["display_title"], win)]
-    main_text = "\n\n".join(
-        [
-            metadata["display_text1"],
-            metadata["display_text2"],
-            metadata["display_text3"],
-            metadata["display_text4"],
-        ]
-    )
-    drawables.append(_make_textbox_main_text(main_text, win))
+    drawables.append(_make_textbox_main_text(_main_text(metadata), win))
     display_drawables(
         display_time_seconds,
         enter_to_skip_delay,
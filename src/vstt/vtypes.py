@@ -90,3 +90,7 @@ class Metadata(TypedDict):
     display_duration: float
     show_delay_countdown: bool
     enter_to_skip_delay: bool
+    real_time_mode: bool
+    trajectory_storage: str
+    trajectory_compression: str
+    trajectory_compression_level: int
@@ -169,7 +169,7 @@ def experiment_with_results() -> Experiment:
         )
         trial_handler.addData(
             "to_center_num_timestamps_before_visible",
-            np.array(to_target_num_timestamps_before_visible),
+            np.array(to_center_num_timestamps_before_visible),
         )
         if trial["automove_cursor_to_center"]:
             to_center_success = [True] * trial["num_targets"]
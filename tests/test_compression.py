@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import os
+import pathlib
+
+import numpy as np
+import pytest
+
+import vstt
+from vstt.compression import block_key
+from vstt.compression import compress_trajectories
+from vstt.compression import decode_block
+from vstt.compression import delta_decode
+from vstt.compression import delta_encode
+from vstt.compression import encode_block
+from vstt.compression import expand_trajectories
+from vstt.compression import trajectory_keys
+from vstt.compression import trial_trajectories
+from vstt.compression import with_expanded_trajectories
+from vstt.experiment import Experiment
+from vstt.headless import HeadlessMotorTask
+
+
+def test_delta_encode_decode() -> None:
+    rng = np.random.default_rng(42)
+    timestamps = np.cumsum(rng.uniform(0.01, 0.02, 100))
+    positions = np.cumsum(rng.uniform(-0.01, 0.01, (100, 2)), axis=0)
+    for values in [
+        timestamps,
+        timestamps.astype(np.float32),
+        positions,
+        positions.astype(np.float32),
+        np.rint(positions / 2.0**-13).astype(np.int16),
+        np.zeros((0, 2)),
+    ]:
+        deltas = delta_encode(values)
+        assert deltas.shape == values.shape
+        assert deltas.dtype.itemsize == values.dtype.itemsize
+        decoded = delta_decode(deltas, values.dtype)
+        assert decoded.dtype == values.dtype
+        assert np.array_equal(decoded, values)
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+def test_encode_decode_block(codec: str) -> None:
+    values = {
+        "to_target_timestamps": [np.linspace(0.0, 1.0, 61), np.zeros(0)],
+        "to_target_mouse_positions": [
+            np.full((61, 2), 0.25),
+            np.zeros((0, 2), dtype=np.int16),
+        ],
+        "to_center_timestamps": [],
+    }
+    decoded = decode_block(encode_block(values, codec, 9), codec)
+    assert decoded.keys() == values.keys()
+    for key, movements in values.items():
+        assert len(decoded[key]) == len(movements)
+        for movement, decoded_movement in zip(movements, decoded[key]):
+            assert decoded_movement.dtype == movement.dtype
+            assert np.array_equal(decoded_movement, movement)
+    with pytest.raises(ValueError):
+        encode_block(values, "gzip")
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+def test_compress_trajectories(experiment_no_results: Experiment, codec: str) -> None:
+    experiment_no_results.metadata["trajectory_storage"] = "int16"
+    assert HeadlessMotorTask(experiment_no_results, seed=1).run() is True
+    trial_handler = experiment_no_results.trial_handler_with_results
+    compressed = compress_trajectories(trial_handler, codec)
+    # the original trial handler is not modified
+    assert all(key in trial_handler.data for key in trajectory_keys)
+    assert block_key not in trial_handler.data
+    assert "trajectory_compression" not in trial_handler.extraInfo
+    assert all(key not in compressed.data for key in trajectory_keys)
+    assert compressed.extraInfo["trajectory_compression"] == codec
+    # random access to the trajectories of a single trial
+    for i_trial in range(trial_handler.data["ran"].shape[0]):
+        single_trial = trial_trajectories(compressed, i_trial)
+        reference = trial_trajectories(trial_handler, i_trial)
+        assert single_trial.keys() == reference.keys()
+        for key in trajectory_keys:
+            for movement, reference_movement in zip(single_trial[key], reference[key]):
+                assert movement.dtype == reference_movement.dtype
+                assert np.array_equal(movement, reference_movement)
+    expand_trajectories(compressed)
+    assert block_key not in compressed.data
+    assert "trajectory_compression" not in compressed.extraInfo
+    assert vstt.stats.stats_dataframe(compressed).equals(
+        vstt.stats.stats_dataframe(trial_handler)
+    )
+
+
+@pytest.mark.parametrize("storage", ["float64", "int16"])
+def test_experiment_compressed_psydat(
+    experiment_no_results: Experiment, tmp_path: pathlib.Path, storage: str
+) -> None:
+    experiment_no_results.metadata["trajectory_storage"] = storage
+    assert HeadlessMotorTask(experiment_no_results, seed=2).run() is True
+    uncompressed = str(tmp_path / "uncompressed.psydat")
+    experiment_no_results.save_psydat(uncompressed)
+    experiment_no_results.metadata["trajectory_compression"] = "zlib"
+    compressed = str(tmp_path / "compressed.psydat")
+    experiment_no_results.save_psydat(compressed)
+    # the rest of the file is not compressed
+    assert os.path.getsize(compressed) < 0.75 * os.path.getsize(uncompressed)
+    experiment = Experiment(compressed)
+    assert experiment.metadata["trajectory_compression"] == "zlib"
+    assert experiment.trial_handler_with_results is not None
+    # the compressed blocks are kept until they are used
+    assert block_key in experiment.trial_handler_with_results.data
+    session_data = experiment.session_data
+    reference = experiment_no_results.session_data
+    assert session_data is not None and reference is not None
+    for name in ["to_target", "to_center"]:
+        for attr in ["timestamps", "positions", "offsets"]:
+            assert np.array_equal(
+                getattr(getattr(session_data, name), attr),
+                getattr(getattr(reference, name), attr),
+            )
+    assert vstt.stats.stats_dataframe(session_data).equals(
+        vstt.stats.stats_dataframe(reference)
+    )
+
+
+def test_load_compressed_decodes_one_trial(
+    experiment_no_results: Experiment,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    assert HeadlessMotorTask(experiment_no_results, seed=2).run() is True
+    reference = experiment_no_results.session_data
+    assert reference is not None
+    experiment_no_results.metadata["trajectory_compression"] = "lzma"
+    filename = str(tmp_path / "compressed.psydat")
+    experiment_no_results.save_psydat(filename)
+    decompressed = []
+    decompress = vstt.compression._decompress
+
+    def counting_decompress(block: bytes, codec: str) -> bytes:
+        decompressed.append(block)
+        return decompress(block, codec)
+
+    monkeypatch.setattr(vstt.compression, "_decompress", counting_decompress)
+    experiment = Experiment(filename)
+    session_data = experiment.session_data
+    assert session_data is not None
+    assert decompressed == []
+    # the movements of a trial only decompress the block of this trial
+    rows = session_data.trial_rows(2)
+    for row in range(rows.start, rows.stop):
+        for name in ["to_target", "to_center"]:
+            movement = session_data.movement(name, row)
+            reference_movement = reference.movement(name, row)
+            assert np.array_equal(movement[0], reference_movement[0])
+            assert np.array_equal(movement[1], reference_movement[1])
+    assert experiment.trial_handler_with_results is not None
+    blocks = experiment.trial_handler_with_results.data[block_key]
+    assert decompressed == [blocks[2, 0]]
+    # the stats use all the movements, which decompresses the other blocks once
+    stats = experiment.stats
+    assert stats is not None
+    assert stats.equals(vstt.stats.stats_dataframe(reference))
+    assert len(decompressed) == blocks.shape[0]
+    assert len(decompressed) == len(set(decompressed))
+
+
+def test_save_loaded_compressed_psydat(
+    experiment_no_results: Experiment, tmp_path: pathlib.Path
+) -> None:
+    assert HeadlessMotorTask(experiment_no_results, seed=2).run() is True
+    reference = vstt.stats.stats_dataframe(
+        experiment_no_results.trial_handler_with_results
+    )
+    experiment_no_results.metadata["trajectory_compression"] = "zlib"
+    experiment_no_results.save_psydat(str(tmp_path / "zlib.psydat"))
+    experiment = Experiment(str(tmp_path / "zlib.psydat"))
+    trial_handler = experiment.trial_handler_with_results
+    blocks = trial_handler.data[block_key]
+    # saved with the same codec: the blocks are saved as they are
+    assert compress_trajectories(trial_handler, "zlib") is trial_handler
+    experiment.save_psydat(str(tmp_path / "zlib2.psydat"))
+    # saved with another codec or without compression: the loaded results are not modified
+    for codec in ["lzma", "none"]:
+        experiment.metadata["trajectory_compression"] = codec
+        filename = str(tmp_path / f"{codec}.psydat")
+        experiment.save_psydat(filename)
+        assert trial_handler.data[block_key] is blocks
+        assert trial_handler.extraInfo["trajectory_compression"] == "zlib"
+        saved = Experiment(filename).trial_handler_with_results
+        assert saved is not None
+        if codec == "none":
+            assert block_key not in saved.data
+        else:
+            assert saved.extraInfo["trajectory_compression"] == codec
+        assert vstt.stats.stats_dataframe(saved).equals(reference)
+    assert vstt.stats.stats_dataframe(
+        Experiment(str(tmp_path / "zlib2.psydat")).trial_handler_with_results
+    ).equals(reference)
+    expanded = with_expanded_trajectories(trial_handler)
+    assert block_key not in expanded.data
+    assert block_key in trial_handler.data
+    assert with_expanded_trajectories(expanded) is expanded
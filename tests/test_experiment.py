@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 import pathlib
 import pickle
 
@@ -10,8 +11,10 @@ from psychopy.data import TrialHandlerExt
 
 from vstt.display import default_display_options
 from vstt.experiment import Experiment
+from vstt.headless import HeadlessMotorTask
 from vstt.meta import default_metadata
 from vstt.trial import default_trial
+from vstt.trial import expand_sweep
 
 
 def test_experiment_no_results(tmp_path: pathlib.Path) -> None:
@@ -76,12 +79,19 @@ def test_experiment_with_results(
     assert th.extraInfo["display_options"] == experiment_with_results.display_options
     assert "to_target_timestamps" not in th.data
     assert th.finished is False
-    # save experiment
+    # save experiment, including additional extraInfo about the run
+    experiment_with_results.trial_handler_with_results.extraInfo["real_time_mode"] = {
+        "gc_frozen": True
+    }
     filename = str(tmp_path / "ex1.psydat")
     experiment_with_results.save_psydat(filename)
     assert experiment_with_results.has_unsaved_changes is False
     # load the experiment
     exp2 = Experiment(filename)
+    assert exp2.trial_handler_with_results is not None
+    assert exp2.trial_handler_with_results.extraInfo["real_time_mode"] == {
+        "gc_frozen": True
+    }
     assert exp2.metadata == experiment_with_results.metadata
     assert exp2.display_options == experiment_with_results.display_options
     assert exp2.trial_list == experiment_with_results.trial_list
@@ -136,7 +146,7 @@ def test_experiment_to_excel_target_data_format(
     for name in df_stats:
         for a, b in zip(stats[name], df_stats[name]):
             assert np.allclose(a, b, equal_nan=True)
-    assert len(dfs) == 4 + sum(
+    assert len(dfs) == 7 + sum(
         [
             trial["weight"] * trial["num_targets"]
             for trial in experiment_with_results.trial_list
@@ -188,7 +198,13 @@ def test_experiment_to_excel_trial_data_format(
         for a, b in zip(stats[name], df_stats[name]):
             assert np.allclose(a, b, equal_nan=True)
     n_trials = sum([trial["weight"] for trial in experiment_with_results.trial_list])
-    assert len(dfs) == 4 + n_trials
+    assert len(dfs) == 7 + n_trials
+    # summary sheets
+    assert dfs["trial_summary"].i_trial.tolist() == list(range(n_trials))
+    assert dfs["condition_summary"].num_trials.tolist() == [
+        trial["weight"] for trial in experiment_with_results.trial_list
+    ]
+    assert dfs["target_summary"].num_targets.sum() == stats.shape[0]
     # check that excel trial data is consistent with stats dataframe
     n_center_targets_to_check = sum(
         [
@@ -311,3 +327,139 @@ def test_experiment_empty_trialhandler() -> None:
     assert experiment.metadata == default_metadata()
     assert experiment.display_options == default_display_options()
     assert len(experiment.trial_list) == 0
+
+
+def test_experiment_trial_sweep(tmp_path: pathlib.Path) -> None:
+    sweep = {
+        "base": {"num_targets": 4},
+        "factors": [
+            {"cursor_rotation_degrees": list(np.linspace(0.0, 90.0, 50))},
+            {"target_size": [0.02, 0.03, 0.04], "cursor_size": [0.01, 0.02, 0.03]},
+            {"show_cursor": [True, False]},
+        ],
+    }
+    trial_list = expand_sweep(sweep)
+    exp = Experiment()
+    # trial conditions that are not a sweep are stored as a list
+    exp.trial_list = trial_list[:-1]
+    assert exp.trial_sweep is None
+    exp.save_json(str(tmp_path / "list.json"))
+    exp.save_psydat(str(tmp_path / "list.psydat"))
+    assert Experiment(str(tmp_path / "list.json")).trial_list == trial_list[:-1]
+    # a large sweep of several factors is stored as a sweep
+    exp.trial_list = trial_list
+    assert exp.trial_sweep is not None
+    assert exp.trial_sweep["factors"] == sweep["factors"]
+    for save, extension in [(exp.save_json, "json"), (exp.save_psydat, "psydat")]:
+        filename = tmp_path / f"sweep.{extension}"
+        save(str(filename))
+        # the file contains the sweep instead of 300 trial conditions
+        list_size = (tmp_path / f"list.{extension}").stat().st_size
+        assert filename.stat().st_size < 0.5 * list_size
+        loaded = Experiment(str(filename))
+        # the trial conditions are expanded when first used
+        assert loaded._trial_list is None
+        assert loaded.trial_sweep == exp.trial_sweep
+        assert loaded.trial_list == trial_list
+        assert loaded._trial_list is not None
+        assert loaded.create_trialhandler().trialList == trial_list
+        # the trial conditions are still saved as a sweep after they are expanded
+        assert loaded.trial_sweep == exp.trial_sweep
+
+
+def test_experiment_small_trial_sweep(tmp_path: pathlib.Path) -> None:
+    trial_sweep = {"base": {}, "factors": [{"weight": [1, 2]}]}
+    exp = Experiment()
+    # a small list of trial conditions is stored as a list, even if it is a sweep
+    exp.trial_list = expand_sweep(trial_sweep)
+    assert exp.trial_sweep is None
+    exp.save_json(str(tmp_path / "list.json"))
+    assert "trial_list" in json.loads((tmp_path / "list.json").read_text())
+    # unless the experiment was created from a sweep
+    exp.trial_sweep = trial_sweep
+    assert exp.trial_sweep is not None
+    assert exp.trial_sweep["factors"] == trial_sweep["factors"]
+    exp.save_json(str(tmp_path / "sweep.json"))
+    saved = json.loads((tmp_path / "sweep.json").read_text())
+    assert "trial_list" not in saved
+    assert saved["trial_sweep"]["factors"] == trial_sweep["factors"]
+    # if the trial conditions are modified so that they are no longer a sweep, they are stored as a list
+    exp.trial_list.append(default_trial())
+    assert exp.trial_sweep is None
+
+
+def test_experiment_clear_trial_sweep() -> None:
+    trial_sweep = {"base": {}, "factors": [{"weight": [1, 2]}]}
+    exp = Experiment()
+    exp.trial_sweep = trial_sweep
+    assert exp._trial_list is None
+    # clearing the sweep keeps the trial conditions that were created from it
+    exp.trial_sweep = None
+    assert exp.trial_list == expand_sweep(trial_sweep)
+    # which are then only stored as a sweep if it is large enough
+    assert exp.trial_sweep is None
+
+
+def test_experiment_trial_sweep_validated(tmp_path: pathlib.Path) -> None:
+    filename = tmp_path / "sweep.json"
+    experiment_dict = {
+        "metadata": default_metadata(),
+        "display_options": default_display_options(),
+        "trial_sweep": {
+            "base": {"num_targets": "4", "unknown_key": 1},
+            "factors": [{"weight": ["1", 2.0], "cursor_size": [0.01, "invalid"]}],
+        },
+    }
+    filename.write_text(json.dumps(experiment_dict))
+    exp = Experiment(str(filename))
+    # the sweep is validated when it is loaded, before it is expanded
+    assert exp._trial_list is None
+    trial_sweep = exp.trial_sweep
+    assert trial_sweep is not None
+    assert trial_sweep["base"]["num_targets"] == 4
+    assert "unknown_key" not in trial_sweep["base"]
+    assert trial_sweep["factors"] == [
+        {"weight": [1, 2], "cursor_size": [0.01, default_trial()["cursor_size"]]}
+    ]
+    assert exp.trial_list == expand_sweep(trial_sweep)
+    # invalid sweeps are not loaded
+    experiment_dict["trial_sweep"] = {
+        "base": {},
+        "factors": [{"weight": [1], "num_targets": [2, 3]}],
+    }
+    filename.write_text(json.dumps(experiment_dict))
+    with pytest.raises(ValueError):
+        Experiment(str(filename))
+
+
+def test_experiment_trial_sweep_with_results(tmp_path: pathlib.Path) -> None:
+    trial_sweep = {
+        "base": {"post_block_delay": 0.0, "play_sound": False},
+        "factors": [{"num_targets": [3, 4]}],
+    }
+    exp = Experiment()
+    exp.trial_sweep = trial_sweep
+    exp.save_psydat(str(tmp_path / "sweep.psydat"))
+    exp = Experiment(str(tmp_path / "sweep.psydat"))
+    assert HeadlessMotorTask(exp, seed=1).run() is True
+    trial_handler = exp.trial_handler_with_results
+    assert trial_handler is not None
+    filename = str(tmp_path / "results.psydat")
+    exp.save_psydat(filename)
+    # the trial handler being saved is not modified
+    assert trial_handler.trialList is exp.trial_list
+    assert "trial_sweep" not in trial_handler.extraInfo
+    # the saved results contain the trial list as well as the sweep
+    with open(filename, "rb") as f:
+        saved = pickle.load(f)
+    assert saved.trialList == exp.trial_list
+    assert saved.extraInfo["trial_sweep"] == exp.trial_sweep
+    loaded = Experiment(filename)
+    assert loaded.trial_list == exp.trial_list
+    assert loaded.trial_sweep == exp.trial_sweep
+    loaded_trial_handler = loaded.trial_handler_with_results
+    assert loaded_trial_handler is not None
+    assert loaded_trial_handler.trialList is loaded.trial_list
+    assert "trial_sweep" not in loaded_trial_handler.extraInfo
+    assert loaded.stats is not None
+    assert len(loaded.stats) == 3 + 4
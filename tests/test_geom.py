@@ -162,3 +162,35 @@ def test_to_target_dists() -> None:
         )
         assert dist_correct == approx(1.0)
         assert dist_any == approx(0.0)
+
+
+def test_simplify_path() -> None:
+    # paths with fewer than 3 points are unchanged
+    for path in [np.zeros((0, 2)), np.array([[0.0, 0.0], [1.0, 1.0]])]:
+        assert np.array_equal(vstt.geom.simplify_path(path, 0.1), path)
+    # collinear points are removed
+    line = np.stack([np.linspace(0, 1, 50), np.linspace(0, 0.5, 50)], axis=1)
+    assert np.array_equal(vstt.geom.simplify_path(line, 1e-6), line[[0, -1]])
+    # zero tolerance keeps all points
+    assert np.array_equal(vstt.geom.simplify_path(line, 0.0), line)
+    # corner is kept
+    corner = np.array([[0.0, 0.0], [0.5, 0.0], [1.0, 0.0], [1.0, 0.5], [1.0, 1.0]])
+    assert np.array_equal(vstt.geom.simplify_path(corner, 0.01), corner[[0, 2, 4]])
+    # overshoot beyond the end point is kept
+    overshoot = np.array([[0.0, 0.0], [0.5, 0.0], [1.2, 0.0], [1.0, 0.0]])
+    assert np.array_equal(
+        vstt.geom.simplify_path(overshoot, 0.01), overshoot[[0, 2, 3]]
+    )
+    # simplified path stays within tolerance of the original noisy path
+    rng = np.random.default_rng(0)
+    t = np.linspace(0, 1, 500)
+    noisy = np.stack([t, 0.1 * np.sin(6 * t)], axis=1) + rng.normal(0, 1e-4, (500, 2))
+    tolerance = 1e-3
+    simplified = vstt.geom.simplify_path(noisy, tolerance)
+    assert simplified.shape[0] < 100
+    assert np.array_equal(simplified[[0, -1]], noisy[[0, -1]])
+    dense = np.concatenate(
+        [np.linspace(a, b, 100) for a, b in zip(simplified[:-1], simplified[1:])]
+    )
+    for point in noisy:
+        assert np.min(np.linalg.norm(dense - point, axis=1)) < 1.1 * tolerance
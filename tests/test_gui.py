@@ -5,6 +5,7 @@ from typing import Any
 
 import qt_test_utils as qtu
 from pytest import MonkeyPatch
+from qtpy.QtWidgets import QAction
 from qtpy.QtWidgets import QFileDialog
 from qtpy.QtWidgets import QInputDialog
 
@@ -31,6 +32,37 @@ def test_gui_run_no_trials() -> None:
     )
 
 
+def test_gui_run_in_subprocess_option() -> None:
+    gui = Gui(filename=None)
+    assert gui.run_task_in_subprocess is False
+    actions = [
+        action
+        for action in gui.findChildren(QAction)
+        if action.text() == "Run in separate &process"
+    ]
+    assert len(actions) == 1
+    assert actions[0].isCheckable()
+    actions[0].trigger()
+    assert gui.run_task_in_subprocess is True
+    actions[0].trigger()
+    assert gui.run_task_in_subprocess is False
+
+
+def test_gui_monitor() -> None:
+    gui = Gui(filename=None)
+    assert gui.monitor is None
+    monitor = gui._start_monitor()
+    assert gui.monitor is monitor
+    assert monitor.is_running()
+    process = monitor._process
+    # the same monitor is reset and re-used for the next run
+    assert gui._start_monitor() is monitor
+    assert monitor._process is process
+    # the monitor is closed with the gui
+    gui.close()
+    assert not monitor.is_running()
+
+
 def test_gui_new_file() -> None:
     gui = Gui(filename=None)
     # initially uses default metadata, display options and trials - no results, no unsaved changes
@@ -107,7 +139,7 @@ def test_gui_file_with_results(
     assert gui.experiment.has_unsaved_changes is False
     assert gui.experiment.trial_handler_with_results is not None
     assert (
-        gui.results_widget._list_trials.count()
+        gui.results_widget._list_trials.model().rowCount()
         == gui.experiment.trial_handler_with_results.nTotal
     )
     # close the gui: no modal prompt as there are no unsaved changes
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pytest
+
+from vstt.experiment import Experiment
+from vstt.headless import HeadlessMotorTask
+from vstt.headless import HeadlessTrialManager
+from vstt.headless import HeadlessWindow
+from vstt.headless import SimulatedMouse
+from vstt.headless import VirtualClock
+from vstt.headless import minimum_jerk
+from vstt.task import StimulusPool
+from vstt.trial import default_trial
+
+
+def test_headless_window_virtual_clock() -> None:
+    win = HeadlessWindow(frame_rate=50.0)
+    clock = VirtualClock(win)
+    assert clock.getTime() == 0.0
+    calls = []
+    win.callOnFlip(calls.append, 1)
+    win.flip()
+    assert calls == [1]
+    assert clock.getTime() == pytest.approx(0.02)
+    win.flip()
+    # callOnFlip functions are only called on the next flip
+    assert calls == [1]
+    assert clock.getTime() == pytest.approx(0.04)
+    clock.reset()
+    assert clock.getTime() == 0.0
+    win.wait(1.5)
+    assert clock.getTime() == pytest.approx(1.5)
+    assert win.nFrames == 2
+
+
+def test_minimum_jerk() -> None:
+    start = np.array([0.0, 0.0])
+    end = np.array([0.4, -0.2])
+    assert np.allclose(minimum_jerk(start, end, -1.0), start)
+    assert np.allclose(minimum_jerk(start, end, 0.0), start)
+    assert np.allclose(minimum_jerk(start, end, 0.5), 0.5 * end)
+    assert np.allclose(minimum_jerk(start, end, 1.0), end)
+    assert np.allclose(minimum_jerk(start, end, 2.0), end)
+    positions = minimum_jerk(start, end, np.linspace(0, 1, 20))
+    assert positions.shape == (20, 2)
+    # monotonic movement towards the end point
+    assert np.all(np.diff(positions[:, 0]) >= 0)
+
+
+@pytest.mark.parametrize("automove_cursor_to_center", [True, False])
+def test_headless_motor_task(
+    experiment_no_results: Experiment, automove_cursor_to_center: bool
+) -> None:
+    for trial in experiment_no_results.trial_list:
+        trial["automove_cursor_to_center"] = automove_cursor_to_center
+        trial["post_block_delay"] = 10.0
+    task = HeadlessMotorTask(experiment_no_results, seed=123)
+    t0 = time.perf_counter()
+    assert task.run() is True
+    wall_clock_time = time.perf_counter() - t0
+    # faster than real time
+    assert task.win.time > wall_clock_time
+    assert experiment_no_results.has_unsaved_changes is True
+    trial_handler = experiment_no_results.trial_handler_with_results
+    assert trial_handler is not None
+    assert trial_handler.finished
+    stats = experiment_no_results.stats
+    assert stats is not None
+    assert len(stats.i_trial.unique()) == 3
+    assert len(stats) == 4 + 3 + 3
+    # simulated participant reaches all targets
+    assert np.all(stats.to_target_success.astype(bool))
+    assert np.all(stats.to_center_success.astype(bool))
+    assert np.all(stats.to_target_reaction_time > 0.1)
+    for timestamps in stats.to_target_timestamps:
+        assert np.all(np.diff(timestamps) > 0)
+
+
+def test_headless_motor_task_reproducible(experiment_no_results: Experiment) -> None:
+    results = []
+    for _ in range(2):
+        win = HeadlessWindow()
+        mouse = SimulatedMouse(win, np.random.default_rng(1), movement_time=0.2)
+        task = HeadlessMotorTask(experiment_no_results, win, mouse, seed=42)
+        assert task.run() is True
+        results.append(experiment_no_results.stats)
+    for dest in ["target", "center"]:
+        for key in [f"to_{dest}_timestamps", f"to_{dest}_mouse_positions"]:
+            for a, b in zip(results[0][key], results[1][key]):
+                assert np.allclose(a, b)
+
+
+def test_headless_motor_task_missed_targets(experiment_no_results: Experiment) -> None:
+    for trial in experiment_no_results.trial_list:
+        trial["target_duration"] = 0.3
+    # participant is too slow to reach any targets
+    win = HeadlessWindow()
+    mouse = SimulatedMouse(win, reaction_time=0.5)
+    task = HeadlessMotorTask(experiment_no_results, win, mouse)
+    assert task.run() is True
+    stats = experiment_no_results.stats
+    assert not np.any(stats.to_target_success.astype(bool))
+    assert np.allclose(stats.to_target_time, 0.3, atol=0.05)
+
+
+def test_stimulus_pool() -> None:
+    pool = StimulusPool(max_size=2)
+    trials = [default_trial() for _ in range(3)]
+    trials[1]["cursor_rotation_degrees"] = 45.0
+    trials[2]["num_targets"] = 4
+    stimuli = pool.get(trials[0], object)
+    # same visual parameters: stimuli are shared
+    assert pool.get(trials[1], object) is stimuli
+    assert len(pool) == 1
+    other_stimuli = pool.get(trials[2], object)
+    assert other_stimuli is not stimuli
+    assert len(pool) == 2
+    # labels are only part of the key if they are shown
+    trials[0]["target_labels"] = "a b c d e f g h"
+    assert pool.get(trials[0], object) is stimuli
+    trials[0]["show_target_labels"] = True
+    assert pool.get(trials[0], object) is not stimuli
+    # least recently used stimuli are removed when the pool is full
+    assert len(pool) == 2
+    assert pool.get(trials[1], object) is stimuli
+    assert pool.get(trials[2], object) is not other_stimuli
+
+
+def test_headless_motor_task_many_conditions(
+    experiment_no_results: Experiment, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    trial = default_trial()
+    trial["weight"] = 1
+    trial["post_block_delay"] = 0.0
+    experiment_no_results.trial_list = []
+    for i in range(40):
+        condition = dict(trial, cursor_rotation_degrees=float(i))
+        if i % 2 == 1:
+            condition["target_distance"] = 0.3
+        experiment_no_results.trial_list.append(condition)
+    task = HeadlessMotorTask(experiment_no_results, seed=1)
+    created = []
+    make_stimuli = HeadlessTrialManager._make_stimuli
+
+    def counting_make_stimuli(self, win, trial):  # type: ignore[no-untyped-def]
+        created.append(trial["target_distance"])
+        return make_stimuli(self, win, trial)
+
+    monkeypatch.setattr(HeadlessTrialManager, "_make_stimuli", counting_make_stimuli)
+    # no trial managers or stimuli are created before the task is run
+    assert len(task.stimulus_pool) == 0
+    assert task.run() is True
+    # conditions with the same visual parameters share their stimuli
+    assert created == [0.4, 0.3]
+    assert len(task.stimulus_pool) == 2
+    assert experiment_no_results.trial_handler_with_results is not None
+    assert experiment_no_results.trial_handler_with_results.data[
+        "to_target_success"
+    ].shape == (40, 1)
+
+
+def test_headless_motor_task_final_results_stats(
+    experiment_no_results: Experiment, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    for trial in experiment_no_results.trial_list:
+        trial["post_trial_delay"] = 0.5
+    task = HeadlessMotorTask(experiment_no_results, seed=1)
+    displayed_stats = []
+    display_results = HeadlessMotorTask._display_results
+
+    def recording_display_results(self, *args, stats=None):  # type: ignore[no-untyped-def]
+        assert self.trial_handler.finished is False
+        displayed_stats.append(stats)
+        return display_results(self, *args, stats=stats)
+
+    monkeypatch.setattr(
+        HeadlessMotorTask, "_display_results", recording_display_results
+    )
+    assert task.run() is True
+    # post trial and post block results displays, the stats are only available for the final ones
+    assert len(displayed_stats) == 3 + 2
+    assert displayed_stats[:-2] == [None] * 3
+    # the final displays use the stats calculated in the background for the experiment
+    assert displayed_stats[-2] is displayed_stats[-1] is task._stats
+    assert experiment_no_results.stats is not None
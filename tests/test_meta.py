@@ -25,6 +25,10 @@ def test_import_metadata() -> None:
         "display_duration": 123,
         "show_delay_countdown": False,
         "enter_to_skip_delay": False,
+        "real_time_mode": True,
+        "trajectory_storage": "int16",
+        "trajectory_compression": "lzma",
+        "trajectory_compression_level": 9,
     }
     metadata = vstt.meta.import_metadata(valid_dict)
     assert metadata == valid_dict
@@ -42,3 +46,8 @@ def test_import_metadata() -> None:
     # unknown keys are ignored
     assert "data" not in metadata
     assert "whoops" not in metadata
+    # values that are not one of the choices are replaced with defaults
+    metadata = vstt.meta.import_metadata({"trajectory_storage": "float16"})
+    assert metadata["trajectory_storage"] == "float64"
+    metadata = vstt.meta.import_metadata({"trajectory_compression": "gzip"})
+    assert metadata["trajectory_compression"] == "none"
@@ -30,8 +30,9 @@ def test_metadata_widget(window: Window) -> None:
     assert 0.005 <= gtu.pixel_color_fraction(screenshot, (0, 0, 0)) <= 0.050
     experiment = Experiment()
     empty_metadata = vstt.meta.default_metadata()
+    choices = vstt.meta.metadata_choices()
     for key, value in empty_metadata.items():
-        if isinstance(value, str):
+        if isinstance(value, str) and key not in choices:
             empty_metadata[key] = ""  # type: ignore
     empty_metadata["show_delay_countdown"] = False
     experiment.metadata = empty_metadata
@@ -66,7 +67,7 @@ def test_metadata_widget(window: Window) -> None:
         assert widget.experiment.has_unsaved_changes is True
         assert signal_received
     for key, value in widget.experiment.metadata.items():
-        if isinstance(value, str):
+        if isinstance(value, str) and key not in choices:
             assert value == key
     # assign another experiment to widget & update fields
     experiment2 = Experiment()
@@ -75,7 +76,7 @@ def test_metadata_widget(window: Window) -> None:
     assert widget.experiment is experiment2
     assert widget.experiment.has_unsaved_changes is False
     for key, value in vstt.meta.default_metadata().items():
-        if isinstance(value, str):
+        if isinstance(value, str) and key not in choices:
             line_edit = widget._str_widgets[key]
             signal_received.clear()
             assert line_edit is not None
@@ -87,9 +88,18 @@ def test_metadata_widget(window: Window) -> None:
             assert signal_received
     # experiment2 has been updated
     for key, value in experiment2.metadata.items():
-        if isinstance(value, str):
+        if isinstance(value, str) and key not in choices:
             assert value == vstt.meta.default_metadata()[key] + "2"  # type: ignore
     # previous experiment was not modified
     for key, value in experiment.metadata.items():
-        if isinstance(value, str):
+        if isinstance(value, str) and key not in choices:
             assert value == key
+    # choices are selected from a combo box
+    combo_box = widget._choice_widgets["trajectory_storage"]
+    assert combo_box.currentText() == "float64"
+    signal_received.clear()
+    combo_box.textActivated.emit("int16")
+    assert experiment2.metadata["trajectory_storage"] == "int16"
+    assert signal_received
+    widget.experiment = Experiment()
+    assert combo_box.currentText() == "float64"
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pytest
+
+from vstt import monitor as vstt_monitor
+from vstt.experiment import Experiment
+from vstt.headless import HeadlessMotorTask
+from vstt.monitor import ExperimentMonitor
+from vstt.monitor import MonitorTotals
+from vstt.monitor import trial_summary
+from vstt.task import TrialData
+
+
+def _drain(monitor: ExperimentMonitor) -> list[dict[str, float]]:
+    summaries = []
+    while True:
+        summary = monitor.queue.get(timeout=5)
+        if not summary:
+            return summaries
+        summaries.append(summary)
+
+
+def test_trial_summary() -> None:
+    trial_data = TrialData(
+        {"target_indices": "0 1", "target_order": "fixed"}, np.random.default_rng()
+    )
+    for success, dropped in [(True, False), (False, True)]:
+        timestamps = np.linspace(0.0, 1.0, 61)
+        if dropped:
+            timestamps = np.delete(timestamps, 30)
+        positions = np.zeros((timestamps.shape[0], 2))
+        positions[20:] = [0.1, 0.1]
+        trial_data.to_target_timestamps.append(timestamps)
+        trial_data.to_target_mouse_positions.append(positions)
+        trial_data.to_target_num_timestamps_before_visible.append(5)
+        trial_data.to_target_success.append(success)
+    summary = trial_summary(trial_data, 3, 1)
+    assert summary["i_trial"] == 3
+    assert summary["condition_index"] == 1
+    assert summary["num_targets"] == 2
+    assert summary["num_successful_targets"] == 1
+    assert np.isclose(summary["to_target_reaction_time"], 15.0 / 60.0)
+    assert np.isclose(summary["to_target_time"], 55.0 / 60.0)
+    assert summary["num_frames"] == 60 + 59
+    assert summary["num_dropped_frames"] == 1
+    assert np.isclose(summary["max_frame_interval"], 2.0 / 60.0)
+
+
+def test_monitor_totals() -> None:
+    totals = MonitorTotals()
+    assert totals.as_dict()["Trials"] == "0"
+    assert totals.as_dict()["Success rate"] == "nan%"
+    for successful_targets, reaction_time in [(4, 0.2), (2, np.nan)]:
+        totals.add(
+            {
+                "i_trial": 0,
+                "condition_index": 0,
+                "num_targets": 4,
+                "num_successful_targets": successful_targets,
+                "to_target_reaction_time": reaction_time,
+                "to_target_time": 0.5,
+                "num_frames": 100,
+                "num_dropped_frames": 1,
+                "max_frame_interval": 0.04,
+            }
+        )
+    assert totals.as_dict() == {
+        "Trials": "2",
+        "Targets": "8",
+        "Success rate": "75.0%",
+        "Reaction time": "0.200s",
+        "Time to target": "0.500s",
+        "Dropped frames": "2 / 200",
+        "Longest frame": "40.0ms",
+    }
+
+
+def test_experiment_monitor_publish_never_blocks() -> None:
+    monitor = ExperimentMonitor(max_queue_size=2)
+    for i in range(5):
+        monitor.publish({"i_trial": i})
+    assert monitor.num_dropped == 3
+    assert monitor.queue.get(timeout=5) == {"i_trial": 0}
+    assert monitor.queue.get(timeout=5) == {"i_trial": 1}
+
+
+def test_experiment_monitor_motor_task(experiment_no_results: Experiment) -> None:
+    monitor = ExperimentMonitor()
+    task = HeadlessMotorTask(experiment_no_results, seed=1, monitor=monitor)
+    assert task.run() is True
+    summaries = _drain(monitor)
+    assert monitor.num_dropped == 0
+    assert [summary["i_trial"] for summary in summaries] == [0, 1, 2]
+    assert [summary["condition_index"] for summary in summaries] == [0, 1, 1]
+    assert [summary["num_targets"] for summary in summaries] == [4, 3, 3]
+    for summary in summaries:
+        assert summary["num_successful_targets"] == summary["num_targets"]
+        assert summary["to_target_reaction_time"] > 0.1
+        assert summary["num_dropped_frames"] == 0
+
+
+def test_lower_priority_is_optional(monkeypatch: pytest.MonkeyPatch) -> None:
+    def fail(*args: object) -> None:
+        raise OSError("Invalid argument")
+
+    # e.g. a cpuset or cgroup that doesn't allow changing the affinity
+    monkeypatch.setattr(os, "nice", fail, raising=False)
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1}, raising=False)
+    monkeypatch.setattr(os, "sched_setaffinity", fail, raising=False)
+    vstt_monitor._lower_priority()
+
+
+def test_experiment_monitor_window() -> None:
+    monitor = ExperimentMonitor()
+    assert monitor.is_running() is False
+    monitor.start()
+    assert monitor.is_running() is True
+    process = monitor._process
+    # the running monitor window is re-used
+    monitor.start()
+    monitor.reset()
+    assert monitor._process is process
+    monitor.close()
+    assert monitor.is_running() is False
+    assert process.exitcode == 0
+    # a closed monitor window is started again
+    monitor.start()
+    assert monitor.is_running() is True
+    monitor.close()
+    assert monitor.is_running() is False
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from vstt.experiment import Experiment
+from vstt.raster import rasterize_results
+from vstt.raster import rasterize_thumbnail
+
+
+def _grey_fraction(image: np.ndarray) -> float:
+    return float(np.mean(np.all(image == [128, 128, 128], axis=2)))
+
+
+@pytest.mark.parametrize("all_trials_for_this_condition", [False, True])
+def test_rasterize_results_nothing(
+    experiment_with_results: Experiment, all_trials_for_this_condition: bool
+) -> None:
+    display_options = {key: False for key in experiment_with_results.display_options}
+    image = rasterize_results(
+        experiment_with_results.trial_handler_with_results,
+        display_options,  # type: ignore
+        0,
+        all_trials_for_this_condition,
+        size=(400, 300),
+    )
+    assert image.size == (400, 300)
+    # all pixels grey except for the black title text
+    assert 0.990 < _grey_fraction(np.asarray(image)) < 1.0
+
+
+@pytest.mark.parametrize("all_trials_for_this_condition", [False, True])
+def test_rasterize_results_everything(
+    experiment_with_results: Experiment, all_trials_for_this_condition: bool
+) -> None:
+    display_options = {key: True for key in experiment_with_results.display_options}
+    trial_handler = experiment_with_results.trial_handler_with_results
+    image = np.asarray(
+        rasterize_results(
+            trial_handler,
+            display_options,  # type: ignore
+            0,
+            all_trials_for_this_condition,
+            size=(800, 600),
+            stats_df=experiment_with_results.stats,
+        )
+    )
+    assert image.shape == (600, 800, 3)
+    # less grey: lots of other colors for targets, paths and stats
+    grey_pixels = _grey_fraction(image)
+    assert 0.5 < grey_pixels < 0.95
+    # off-white pixels for one of the targets
+    assert np.mean(np.all(image == [240, 248, 255], axis=2)) > 0.001
+    # trial 3 with auto-move to center has fewer paths and stats
+    image = np.asarray(
+        rasterize_results(
+            trial_handler,
+            display_options,  # type: ignore
+            3,
+            all_trials_for_this_condition,
+            size=(800, 600),
+        )
+    )
+    assert _grey_fraction(image) > grey_pixels
+
+
+def test_rasterize_thumbnail(experiment_with_results: Experiment) -> None:
+    session_data = experiment_with_results.session_data
+    assert session_data is not None
+    for i_trial in session_data.trial_indices:
+        image = rasterize_thumbnail(session_data, i_trial, size=32)
+        assert image.size == (32, 32)
+        # mostly grey background with some targets and paths
+        assert 0.5 < _grey_fraction(np.asarray(image)) < 0.99
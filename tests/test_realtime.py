@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import gc
+import os
+
+from vstt.realtime import RealTimeMode
+from vstt.realtime import default_real_time_status
+
+
+def test_real_time_mode_disabled() -> None:
+    affinity = os.sched_getaffinity(0) if hasattr(os, "sched_getaffinity") else None
+    rtm = RealTimeMode(False)
+    rtm.start()
+    assert rtm.status == default_real_time_status()
+    assert gc.get_freeze_count() == 0
+    rtm.begin_targets()
+    assert gc.isenabled()
+    rtm.end_targets()
+    assert gc.isenabled()
+    rtm.stop()
+    assert rtm.status == default_real_time_status()
+    if affinity is not None:
+        assert os.sched_getaffinity(0) == affinity
+
+
+def test_real_time_mode_enabled() -> None:
+    affinity = os.sched_getaffinity(0) if hasattr(os, "sched_getaffinity") else None
+    niceness = os.getpriority(os.PRIO_PROCESS, 0) if hasattr(os, "getpriority") else 0
+    rtm = RealTimeMode(True)
+    rtm.start()
+    assert rtm.status["gc_frozen"] is True
+    assert gc.get_freeze_count() > 0
+    # garbage collection disabled while targets are displayed
+    rtm.begin_targets()
+    assert not gc.isenabled()
+    rtm.end_targets()
+    assert gc.isenabled()
+    if rtm.status["cpu_affinity"]:
+        assert len(os.sched_getaffinity(0)) == 1
+    rtm.stop()
+    # original settings are restored
+    assert gc.get_freeze_count() == 0
+    assert gc.isenabled()
+    if affinity is not None:
+        assert os.sched_getaffinity(0) == affinity
+    if hasattr(os, "getpriority"):
+        assert os.getpriority(os.PRIO_PROCESS, 0) == niceness
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import pathlib
+
+import pytest
+from click.testing import CliRunner
+from PIL import Image
+
+from vstt.__main__ import main
+from vstt.experiment import Experiment
+from vstt.render import list_images
+from vstt.render import render_images
+
+
+def test_list_images(experiment_with_results: Experiment) -> None:
+    stats_df = experiment_with_results.stats
+    trials = [
+        (0, False, "trial_0.png"),
+        (1, False, "trial_1.png"),
+        (2, False, "trial_2.png"),
+        (3, False, "trial_3.png"),
+    ]
+    # the first trial of each condition is used for the condition images
+    first_trials = stats_df.groupby("condition_index").i_trial.min()
+    conditions = [
+        (first_trials[0], True, "condition_0.png"),
+        (first_trials[1], True, "condition_1.png"),
+    ]
+    assert list_images(stats_df, "trial") == trials
+    assert list_images(stats_df, "condition") == conditions
+    assert list_images(stats_df, "all") == trials + conditions
+
+
+def test_render_images_no_results(
+    experiment_no_results: Experiment, tmp_path: pathlib.Path
+) -> None:
+    with pytest.raises(RuntimeError):
+        render_images(experiment_no_results, tmp_path)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_render_images(
+    experiment_with_results: Experiment, tmp_path: pathlib.Path, jobs: int
+) -> None:
+    folder = tmp_path / "images"
+    filenames, seconds = render_images(
+        experiment_with_results, folder, "all", jobs, (320, 240)
+    )
+    assert seconds > 0
+    assert [pathlib.Path(f).name for f in filenames] == [
+        "trial_0.png",
+        "trial_1.png",
+        "trial_2.png",
+        "trial_3.png",
+        "condition_0.png",
+        "condition_1.png",
+    ]
+    for filename in filenames:
+        with Image.open(filename) as image:
+            assert image.size == (320, 240)
+
+
+def test_render_cli(
+    experiment_with_results: Experiment, tmp_path: pathlib.Path
+) -> None:
+    filename = str(tmp_path / "experiment.psydat")
+    experiment_with_results.save_psydat(filename)
+    runner = CliRunner()
+    result = runner.invoke(
+        main, ["render", filename, "--per", "condition", "--size", "160", "120"]
+    )
+    assert result.exit_code == 0
+    assert "Rendered 2 images" in result.output
+    images = sorted(p.name for p in (tmp_path / "experiment_images").iterdir())
+    assert images == ["condition_0.png", "condition_1.png"]
+    result = runner.invoke(main, ["render", filename, "--per", "block"])
+    assert result.exit_code != 0
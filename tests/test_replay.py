@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import copy
+
+import numpy as np
+import pytest
+
+from vstt.experiment import Experiment
+from vstt.headless import HeadlessMotorTask
+from vstt.replay import compare_replay
+from vstt.replay import replay_experiment
+
+
+@pytest.fixture
+def recorded_experiment(experiment_no_results: Experiment) -> Experiment:
+    for trial in experiment_no_results.trial_list:
+        trial["target_order"] = "random"
+        trial["cursor_rotation_degrees"] = 15.0
+        trial["target_duration"] = 0.8
+    assert HeadlessMotorTask(experiment_no_results, seed=7).run() is True
+    return experiment_no_results
+
+
+def test_replay_experiment_no_results(experiment_no_results: Experiment) -> None:
+    with pytest.raises(RuntimeError):
+        replay_experiment(experiment_no_results)
+
+
+def test_replay_experiment_reproduces_results(
+    recorded_experiment: Experiment,
+) -> None:
+    recorded_stats = recorded_experiment.stats
+    replayed = replay_experiment(recorded_experiment)
+    replayed_stats = replayed.stats
+    assert replayed_stats is not None
+    assert len(compare_replay(recorded_stats, replayed_stats)) == 0
+    assert np.all(recorded_stats.target_index == replayed_stats.target_index)
+    for key in ["to_target_mouse_positions", "to_center_mouse_positions"]:
+        for recorded, replayed_positions in zip(
+            recorded_stats[key], replayed_stats[key]
+        ):
+            assert np.allclose(recorded, replayed_positions)
+    # original experiment is unchanged
+    assert recorded_experiment.stats is recorded_stats
+
+
+def test_replay_experiment_rescore(recorded_experiment: Experiment) -> None:
+    recorded_stats = recorded_experiment.stats
+    trial_list = copy.deepcopy(recorded_experiment.trial_list)
+    for trial in trial_list:
+        trial["target_size"] *= 3.0
+    replayed_stats = replay_experiment(recorded_experiment, trial_list).stats
+    differences = compare_replay(recorded_stats, replayed_stats)
+    assert len(differences) > 0
+    # larger targets are reached sooner
+    assert np.all(
+        differences.to_target_time_replayed < differences.to_target_time_recorded
+    )
+    for trial in trial_list:
+        trial["target_size"] = 0.001
+    replayed_stats = replay_experiment(recorded_experiment, trial_list).stats
+    # tiny targets are never reached: the participant times out on every target
+    assert not np.any(replayed_stats.to_target_success.astype(bool))
+    assert np.allclose(replayed_stats.to_target_time, 0.8, atol=0.05)
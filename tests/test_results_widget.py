@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import pathlib
+import time
 from typing import Any
 
 import gui_test_utils as gtu
@@ -9,17 +10,23 @@ import qt_test_utils as qtu
 from PIL import Image
 from psychopy.visual.window import Window
 from pytest import MonkeyPatch
+from qtpy.QtCore import Qt
+from qtpy.QtWidgets import QApplication
 from qtpy.QtWidgets import QFileDialog
 
 from vstt.experiment import Experiment
+from vstt.headless import HeadlessMotorTask
+from vstt.raster import rasterize_thumbnail
+from vstt.results_widget import ResultsModel
 from vstt.results_widget import ResultsWidget
+from vstt.results_widget import ThumbnailLoader
 
 
 def test_results_widget_no_experiment(window: Window) -> None:
     widget = ResultsWidget(parent=None, win=window)
     # initially empty
     assert widget.experiment.trial_handler_with_results is None
-    assert widget._list_trials.count() == 0
+    assert widget._list_trials.model().rowCount() == 0
     assert widget._btn_display_trial.isEnabled() is False
     assert widget._btn_screenshot_trial.isEnabled() is False
     assert widget._btn_display_condition.isEnabled() is False
@@ -33,7 +40,7 @@ def test_results_widget_experiment_no_results(
     # assign experiment without results
     widget.experiment = experiment_no_results
     assert widget.experiment.trial_handler_with_results is None
-    assert widget._list_trials.count() == 0
+    assert widget._list_trials.model().rowCount() == 0
     assert widget._btn_display_trial.isEnabled() is False
     assert widget._btn_screenshot_trial.isEnabled() is False
     assert widget._btn_display_condition.isEnabled() is False
@@ -60,11 +67,11 @@ def test_results_widget_experiment_with_results(
     n_trials = 4
     assert widget.experiment.trial_handler_with_results is not None
     assert widget.experiment.trial_handler_with_results.nTotal == n_trials
-    assert widget._list_trials.count() == n_trials
+    assert widget._list_trials.model().rowCount() == n_trials
     # select first row
     for _ in range(n_trials):
         qtu.press_up_key(widget._list_trials)
-    assert widget._list_trials.currentRow() == 0
+    assert widget._list_trials.currentIndex().row() == 0
     # display trial results
     screenshot = gtu.call_target_and_get_screenshot(
         qtu.click,
@@ -100,16 +107,16 @@ def test_results_widget_experiment_with_results(
     assert np.allclose(saved_image.shape, screenshot.shape)
     # select each row in turn
     for row in range(n_trials):
-        assert widget._list_trials.currentRow() == row
+        assert widget._list_trials.currentIndex().row() == row
         assert widget._btn_display_trial.isEnabled() is True
         assert widget._btn_display_condition.isEnabled() is True
         qtu.press_down_key(widget._list_trials)
-    assert widget._list_trials.currentRow() == n_trials - 1
+    assert widget._list_trials.currentIndex().row() == n_trials - 1
     # assign a new experiment without results
     experiment_with_results.clear_results()
     widget.experiment = experiment_with_results
     assert widget.experiment.trial_handler_with_results is None
-    assert widget._list_trials.count() == 0
+    assert widget._list_trials.model().rowCount() == 0
     assert widget._btn_display_trial.isEnabled() is False
     assert widget._btn_display_condition.isEnabled() is False
 
@@ -123,12 +130,12 @@ def test_results_widget_experiment_invalid_state(
     n_trials = 4
     assert widget.experiment.trial_handler_with_results is not None
     assert widget.experiment.trial_handler_with_results.nTotal == n_trials
-    assert widget._list_trials.count() == n_trials
+    assert widget._list_trials.model().rowCount() == n_trials
     # select first row
     for _ in range(n_trials):
         qtu.press_up_key(widget._list_trials)
-    assert widget._list_trials.count() == n_trials
-    assert widget._list_trials.currentRow() == 0
+    assert widget._list_trials.model().rowCount() == n_trials
+    assert widget._list_trials.currentIndex().row() == 0
     assert widget._btn_display_trial.isEnabled() is True
     assert widget._btn_display_condition.isEnabled() is True
     # externally delete results from experiment without updating the widget
@@ -136,13 +143,13 @@ def test_results_widget_experiment_invalid_state(
     experiment_with_results.clear_results()
     assert widget.experiment.trial_handler_with_results is None
     # widget state is now invalid: still have enabled buttons but no results
-    assert widget._list_trials.count() == n_trials
-    assert widget._list_trials.currentRow() == 0
+    assert widget._list_trials.model().rowCount() == n_trials
+    assert widget._list_trials.currentIndex().row() == 0
     assert widget._btn_display_trial.isEnabled() is True
     assert widget._btn_display_condition.isEnabled() is True
     # click on display_trial button: widget checks for invalid state and updates to match the experiment
     qtu.click(widget._btn_display_trial)
-    assert widget._list_trials.count() == 0
+    assert widget._list_trials.model().rowCount() == 0
     assert widget._btn_display_trial.isEnabled() is False
     assert widget._btn_display_condition.isEnabled() is False
     # repeat for display_condition button
@@ -150,17 +157,140 @@ def test_results_widget_experiment_invalid_state(
     # restore results to experiment
     experiment_with_results.trial_handler_with_results = th_with_results
     widget.experiment = experiment_with_results
-    assert widget._list_trials.count() == n_trials
+    assert widget._list_trials.model().rowCount() == n_trials
     # select first row
     for _ in range(n_trials):
         qtu.press_up_key(widget._list_trials)
-    assert widget._list_trials.currentRow() == 0
+    assert widget._list_trials.currentIndex().row() == 0
     # clear results without updating widget
     experiment_with_results.clear_results()
     assert widget._btn_display_trial.isEnabled() is True
     assert widget._btn_display_condition.isEnabled() is True
     # click on display trial button: widget updates invalid state
     qtu.click(widget._btn_display_condition)
-    assert widget._list_trials.count() == 0
+    assert widget._list_trials.model().rowCount() == 0
     assert widget._btn_display_trial.isEnabled() is False
     assert widget._btn_display_condition.isEnabled() is False
+
+
+def test_results_model(experiment_with_results: Experiment) -> None:
+    session_data = experiment_with_results.session_data
+    model = ResultsModel()
+    assert model.rowCount() == 0
+    model.set_session_data(session_data)
+    assert model.rowCount() == 4
+    assert model.columnCount() == 4
+    assert np.all(model.condition_indices == [0, 0, 0, 1])
+    # success and reaction time are empty until the stats are set
+    assert model.data(model.index(3, 1)) == "1"
+    assert model.data(model.index(3, 2)) == ""
+    model.set_stats(experiment_with_results.stats)
+    assert model.data(model.index(3, 2)).endswith("%")
+    assert model.data(model.index(3, 3)).endswith("s")
+    assert np.all((model.success >= 0) & (model.success <= 100))
+    assert np.all(model.reaction_time > 0)
+    model.set_session_data(None)
+    assert model.rowCount() == 0
+
+
+def test_results_widget_sort_and_filter(
+    experiment_with_results: Experiment, window: Window
+) -> None:
+    widget = ResultsWidget(parent=None, win=window)
+    widget.experiment = experiment_with_results
+    view = widget._list_trials
+    assert view.model().rowCount() == 4
+    assert widget._combo_condition.count() == 3
+    # filter by condition
+    widget._combo_condition.setCurrentIndex(2)
+    assert view.model().rowCount() == 1
+    widget._combo_condition.setCurrentIndex(1)
+    assert view.model().rowCount() == 3
+    widget._combo_condition.setCurrentIndex(0)
+    assert view.model().rowCount() == 4
+    # sort by reaction time
+    view.sortByColumn(3, Qt.DescendingOrder)
+    reaction_times = [view.model().index(row, 3).data(Qt.UserRole) for row in range(4)]
+    assert reaction_times == sorted(reaction_times, reverse=True)
+    # selected trial is mapped to the trial index
+    view.selectRow(0)
+    assert widget._current_trial_index() == int(
+        view.model().index(0, 0).data(Qt.UserRole)
+    )
+    # and displayed in the viewer
+    trial_items = widget._viewer._items
+    assert len(trial_items) > 0
+    widget._chk_view_condition.setChecked(True)
+    assert len(widget._viewer._items) > 0
+    assert widget._viewer._items is not trial_items
+
+
+def _wait_for_thumbnail(thumbnails: ThumbnailLoader, i_trial: int) -> Any:
+    for _ in range(500):
+        pixmap = thumbnails.get(i_trial)
+        if pixmap is not None:
+            return pixmap
+        QApplication.processEvents()
+        time.sleep(0.01)
+    return None
+
+
+def test_thumbnail_loader(
+    experiment_with_results: Experiment, tmp_path: pathlib.Path
+) -> None:
+    session_data = experiment_with_results.session_data
+    thumbnails = ThumbnailLoader()
+    ready = qtu.SignalReceived(thumbnails.thumbnail_ready)
+    # no results: no thumbnails
+    assert thumbnails.get(0) is None
+    thumbnails.set_session_data(session_data, None)
+    # rendered in the background
+    assert thumbnails.get(0) is None
+    pixmap = _wait_for_thumbnail(thumbnails, 0)
+    assert ready
+    assert pixmap.width() == pixmap.height() == 48
+    # cached
+    assert thumbnails.get(0) is pixmap
+    # saved to folder if set
+    folder = tmp_path / "thumbnails"
+    thumbnails.set_session_data(session_data, folder)
+    assert _wait_for_thumbnail(thumbnails, 1) is not None
+    assert (folder / "trial_1.png").is_file()
+    # and loaded from the folder if it exists
+    thumbnails.set_session_data(None, None)
+    thumbnails.set_session_data(session_data, folder)
+    Image.new("RGB", (48, 48), (255, 0, 0)).save(folder / "trial_1.png")
+    pixmap = _wait_for_thumbnail(thumbnails, 1)
+    assert pixmap.toImage().pixelColor(24, 24).red() == 255
+
+
+def test_saved_thumbnails_invalidated(
+    experiment_with_results: Experiment, window: Window, tmp_path: pathlib.Path
+) -> None:
+    filename = tmp_path / "experiment.psydat"
+    thumbnail = tmp_path / "experiment_thumbnails" / "trial_0.png"
+    widget = ResultsWidget(parent=None, win=window)
+    widget.save_thumbnails = True
+    experiment_with_results.save_psydat(str(filename))
+    widget.experiment = experiment_with_results
+    assert _wait_for_thumbnail(widget._thumbnails, 0) is not None
+    with Image.open(thumbnail) as image:
+        first_run = np.asarray(image.convert("RGB"))
+    # re-run the experiment and save the new results to the same file
+    assert HeadlessMotorTask(experiment_with_results, seed=1).run()
+    experiment_with_results.save_psydat(str(filename))
+    widget.experiment = experiment_with_results
+    # the thumbnail of the previous results is not used
+    assert not thumbnail.is_file()
+    assert _wait_for_thumbnail(widget._thumbnails, 0) is not None
+    with Image.open(thumbnail) as image:
+        second_run = np.asarray(image.convert("RGB"))
+    assert not np.array_equal(first_run, second_run)
+    session_data = experiment_with_results.session_data
+    assert session_data is not None
+    assert np.array_equal(
+        second_run, np.asarray(rasterize_thumbnail(session_data, 0, 48))
+    )
+    # the saved thumbnails are used when the unchanged file is opened again
+    widget.experiment = Experiment(str(filename))
+    assert thumbnail.is_file()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import numpy as np
+
+from vstt.experiment import Experiment
+from vstt.geom import points_on_circle
+from vstt.headless import HeadlessMotorTask
+from vstt.schedule import Schedule
+from vstt.trial import default_trial
+from vstt.trial import import_and_validate_trial
+
+
+def test_schedule_from_trial_list() -> None:
+    fixed = default_trial()
+    random = default_trial()
+    random["num_targets"] = 4
+    random["target_order"] = "random"
+    random = import_and_validate_trial(random)
+    random["fixed_target_intervals"] = True
+    random["target_duration"] = 2.0
+    schedule = Schedule.from_trial_list([fixed, random], [0, 1, 1], seed=7)
+    assert len(schedule) == 3
+    assert schedule.seed == 7
+    assert np.all(schedule.condition_indices == [0, 1, 1])
+    assert np.all(schedule.offsets == [0, 8, 12, 16])
+    assert np.all(schedule.target_indices[schedule.trial_rows(0)] == np.arange(8))
+    for i_trial in [1, 2]:
+        rows = schedule.trial_rows(i_trial)
+        assert sorted(schedule.target_indices[rows]) == [0, 1, 2, 3]
+        assert np.allclose(
+            schedule.target_pos[rows],
+            points_on_circle(4, random["target_distance"])[
+                schedule.target_indices[rows]
+            ],
+        )
+        assert np.allclose(schedule.target_display_times[rows], [2.0, 4.0, 6.0, 8.0])
+    assert np.all(np.isnan(schedule.target_display_times[schedule.trial_rows(0)]))
+    # the same seed gives the same schedule
+    same_seed = Schedule.from_trial_list([fixed, random], [0, 1, 1], seed=7)
+    assert np.array_equal(same_seed.target_indices, schedule.target_indices)
+    other_seeds = [
+        Schedule.from_trial_list([random] * 10, [0] * 10).target_indices
+        for _ in range(2)
+    ]
+    assert not np.array_equal(other_seeds[0], other_seeds[1])
+    # fixed target orders, e.g. from recorded results
+    recorded = Schedule.from_trial_list(
+        [fixed, random], [0, 1, 1], target_indices=[None, np.array([3, 2]), None]
+    )
+    assert np.all(recorded.offsets == [0, 8, 10, 14])
+    assert np.all(recorded.target_indices[recorded.trial_rows(1)] == [3, 2])
+    empty = Schedule.from_trial_list([fixed], [])
+    assert len(empty) == 0
+    assert empty.target_pos.shape == (0, 2)
+
+
+def test_create_trialhandler_schedule(experiment_no_results: Experiment) -> None:
+    trial_handler = experiment_no_results.create_trialhandler(seed=3)
+    schedule = Schedule.from_dict(trial_handler.extraInfo["schedule"])
+    assert schedule.seed == 3
+    # one trial of condition 0 followed by two trials of condition 1
+    assert np.all(schedule.condition_indices == [0, 1, 1])
+    assert np.all(np.diff(schedule.offsets) == [4, 3, 3])
+    assert all(
+        isinstance(value, (int, np.ndarray))
+        for value in trial_handler.extraInfo["schedule"].values()
+    )
+    experiment_no_results.trial_list = []
+    assert "schedule" not in experiment_no_results.create_trialhandler().extraInfo
+
+
+def test_headless_motor_task_schedule(experiment_no_results: Experiment) -> None:
+    for trial in experiment_no_results.trial_list:
+        trial["target_order"] = "random"
+    assert HeadlessMotorTask(experiment_no_results, seed=5).run() is True
+    trial_handler = experiment_no_results.trial_handler_with_results
+    assert trial_handler is not None
+    # the task used the stored schedule, which can be regenerated from its seed
+    stored = Schedule.from_dict(trial_handler.extraInfo["schedule"])
+    regenerated = Schedule.from_trial_list(
+        experiment_no_results.trial_list, stored.condition_indices, stored.seed
+    )
+    assert np.array_equal(regenerated.target_indices, stored.target_indices)
+    for i_trial in range(len(stored)):
+        rows = stored.trial_rows(i_trial)
+        assert np.array_equal(
+            trial_handler.data["target_indices"][i_trial, 0],
+            stored.target_indices[rows],
+        )
+        assert np.allclose(
+            trial_handler.data["target_pos"][i_trial, 0], stored.target_pos[rows]
+        )
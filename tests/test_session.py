@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import pickle
+
+import numpy as np
+import pytest
+from psychopy.data import TrialHandlerExt
+
+import vstt
+from vstt.experiment import Experiment
+from vstt.headless import HeadlessMotorTask
+from vstt.session import SessionData
+from vstt.session import Trajectories
+from vstt.session import decode_positions
+from vstt.session import decode_timestamps
+from vstt.session import encode_positions
+from vstt.session import encode_timestamps
+from vstt.session import position_quantum
+from vstt.session import target_columns
+from vstt.session import trajectory_columns
+
+
+def test_trajectories() -> None:
+    timestamps = [[0.0, 0.1, 0.2], [], [0.5]]
+    positions = [[[0, 0], [1, 1], [2, 2]], np.zeros((0, 2)), [[3, 3]]]
+    trajectories = Trajectories.from_lists(timestamps, positions)
+    assert len(trajectories) == 3
+    assert np.all(trajectories.offsets == [0, 3, 3, 4])
+    assert np.all(trajectories.lengths() == [3, 0, 1])
+    times, points = trajectories[0]
+    assert np.allclose(times, timestamps[0])
+    assert np.allclose(points, positions[0])
+    # items are views of the flat arrays
+    assert np.shares_memory(times, trajectories.timestamps)
+    assert trajectories[1][1].shape == (0, 2)
+    assert [t.shape[0] for t in trajectories.timestamps_list()] == [3, 0, 1]
+    assert [p.shape for p in trajectories.positions_list()] == [(3, 2), (0, 2), (1, 2)]
+    empty = Trajectories.from_lists([], [])
+    assert len(empty) == 0
+    assert empty.positions.shape == (0, 2)
+
+
+def test_trajectories_stationary_runs() -> None:
+    timestamps = [np.arange(6) / 60.0, [], np.arange(3) / 60.0, np.arange(2) / 60.0]
+    positions = [
+        [[0, 0], [0, 0], [0, 0], [1, 1], [1, 1], [0, 0]],
+        np.zeros((0, 2)),
+        # a new movement starts a new run even if the position is unchanged
+        [[0, 0], [0, 0], [0, 0]],
+        [[0, 0], [2, 0]],
+    ]
+    trajectories = Trajectories.from_lists(timestamps, positions)
+    assert trajectories.timestamps.shape == (11,)
+    assert trajectories.positions.shape == (6, 2)
+    assert np.all(trajectories.run_offsets == [0, 3, 3, 4, 6])
+    # runs are expanded when a movement is accessed
+    for i, (times, points) in enumerate(
+        zip(trajectories.timestamps_list(), trajectories.positions_list())
+    ):
+        assert np.array_equal(times, timestamps[i])
+        assert np.array_equal(points, np.reshape(positions[i], (-1, 2)))
+    assert np.all(trajectories.first_movement_indices(1e-12) == [3, -1, 2, 1])
+    assert np.all(trajectories.first_movement_indices(1.5) == [5, -1, 2, 1])
+
+
+def test_session_data_from_trial_handler(experiment_with_results: Experiment) -> None:
+    # results from 3 reps of 8-target trial, 1 rep of 4-target trial with automove back to center
+    session_data = SessionData.from_trial_handler(
+        experiment_with_results.trial_handler_with_results
+    )
+    assert len(session_data) == 28
+    for name, dtype in target_columns.items():
+        assert getattr(session_data, name).dtype == dtype
+    assert session_data.target_pos.shape == (28, 2)
+    for name in trajectory_columns:
+        assert len(getattr(session_data, name)) == 28
+    assert np.all(session_data.trial_indices == [0, 1, 2, 3])
+    assert session_data.trial_rows(3) == slice(24, 28)
+    assert session_data.trial_rows(4) == slice(28, 28)
+    assert np.all(session_data.condition_index[session_data.trial_rows(3)] == 1)
+    # no recorded movements back to the center with automove
+    assert np.all(session_data.has_to_center == (session_data.condition_index == 0))
+    assert np.all(session_data.to_center.lengths()[24:] == 0)
+    assert np.all(session_data.to_center_success)
+    # slots: no other attributes can be added
+    with pytest.raises(AttributeError):
+        session_data.other = 1  # type: ignore
+
+
+def test_session_data_no_results(experiment_no_results: Experiment) -> None:
+    assert experiment_no_results.session_data is None
+    session_data = SessionData.from_trial_handler(
+        experiment_no_results.create_trialhandler()
+    )
+    assert len(session_data) == 0
+    assert session_data.trial_indices.shape == (0,)
+    assert session_data.to_dataframe().shape[0] == 0
+
+
+def test_session_data_to_trial_handler(experiment_with_results: Experiment) -> None:
+    session_data = experiment_with_results.session_data
+    assert session_data is not None
+    trial_handler = session_data.to_trial_handler(
+        experiment_with_results.trial_list, {"metadata": {}}
+    )
+    assert trial_handler.finished
+    assert trial_handler.extraInfo == {"metadata": {}}
+    # automove trials have a successful movement back to the center for each target
+    assert len(trial_handler.data["to_center_success"][3, 0]) == 4
+    assert len(trial_handler.data["to_center_timestamps"][3, 0]) == 0
+    round_trip = SessionData.from_trial_handler(trial_handler)
+    for name in target_columns:
+        assert np.array_equal(
+            getattr(round_trip, name), getattr(session_data, name), equal_nan=True
+        )
+    for name in trajectory_columns:
+        for attr in ["timestamps", "positions", "offsets"]:
+            assert np.array_equal(
+                getattr(getattr(round_trip, name), attr),
+                getattr(getattr(session_data, name), attr),
+            )
+    assert vstt.stats.stats_dataframe(trial_handler).equals(
+        vstt.stats.stats_dataframe(session_data)
+    )
+    # the trial list must match the conditions of the results
+    with pytest.raises(ValueError):
+        session_data.to_trial_handler(experiment_with_results.trial_list[::-1])
+
+
+def test_session_data_invalid_columns() -> None:
+    columns = {name: np.zeros(2) for name in target_columns}
+    columns["target_pos"] = np.zeros((2, 2))
+    trajectories = {
+        name: Trajectories.from_lists([[], []], [[], []]) for name in trajectory_columns
+    }
+    assert len(SessionData(columns, **trajectories)) == 2
+    columns["target_radius"] = np.zeros(3)
+    with pytest.raises(ValueError):
+        SessionData(columns, **trajectories)
+
+
+def test_experiment_session_data(experiment_with_results: Experiment) -> None:
+    session_data = experiment_with_results.session_data
+    assert session_data is not None
+    # cached until the trial handler with the results changes
+    assert experiment_with_results.session_data is session_data
+    trial_handler = experiment_with_results.trial_handler_with_results
+    experiment_with_results.clear_results()
+    assert experiment_with_results.session_data is None
+    experiment_with_results.trial_handler_with_results = trial_handler
+    assert experiment_with_results.session_data is not session_data
+
+
+def test_encode_decode() -> None:
+    rng = np.random.default_rng(123)
+    positions = rng.uniform(-1.0, 1.0, (100, 2))
+    timestamps = np.sort(rng.uniform(0.0, 100.0, 100))
+    for storage in ["float64", "float32", "int16"]:
+        stored_positions = encode_positions(positions, storage)
+        stored_timestamps = encode_timestamps(timestamps, storage)
+        assert decode_positions(stored_positions).dtype == np.float64
+        assert decode_timestamps(stored_timestamps).dtype == np.float64
+        assert np.allclose(decode_timestamps(stored_timestamps), timestamps, atol=1e-5)
+    assert np.all(decode_positions(encode_positions(positions, "float64")) == positions)
+    assert np.allclose(
+        decode_positions(encode_positions(positions, "float32")), positions, atol=1e-7
+    )
+    int16_positions = encode_positions(positions, "int16")
+    assert int16_positions.dtype == np.int16
+    assert np.max(np.abs(decode_positions(int16_positions) - positions)) <= (
+        0.5 * position_quantum
+    )
+    # positions outside the int16 range are stored as float32
+    assert encode_positions(10.0 * positions, "int16").dtype == np.float32
+
+
+@pytest.mark.parametrize("storage", ["float32", "int16"])
+def test_trajectory_storage(experiment_no_results: Experiment, storage: str) -> None:
+    # the same simulated movements with the default and with compact storage
+    experiment_no_results.metadata["trajectory_storage"] = "float64"
+    assert HeadlessMotorTask(experiment_no_results, seed=1).run() is True
+    reference = experiment_no_results.session_data
+    reference_trial_handler = experiment_no_results.trial_handler_with_results
+    experiment_no_results.metadata["trajectory_storage"] = storage
+    assert HeadlessMotorTask(experiment_no_results, seed=1).run() is True
+    session_data = experiment_no_results.session_data
+    trial_handler = experiment_no_results.trial_handler_with_results
+    assert reference is not None and session_data is not None
+    timestamps_dtype, positions_dtype = vstt.session.trajectory_storage_dtypes[storage]
+    assert trial_handler.data["to_target_timestamps"][0, 0][0].dtype == timestamps_dtype
+    assert (
+        trial_handler.data["to_target_mouse_positions"][0, 0][0].dtype
+        == positions_dtype
+    )
+    for name in trajectory_columns:
+        trajectories = getattr(session_data, name)
+        assert trajectories.storage == storage
+        assert trajectories.positions.dtype == positions_dtype
+        assert 2 * trajectories.nbytes < getattr(reference, name).nbytes * 1.1
+    assert len(pickle.dumps(trial_handler)) < len(pickle.dumps(reference_trial_handler))
+    # stats are unchanged within the documented tolerance
+    stats = vstt.stats.stats_dataframe(session_data)
+    reference_stats = vstt.stats.stats_dataframe(reference)
+    assert np.all(stats.to_target_success == reference_stats.to_target_success)
+    for stat in ["to_target_time", "to_center_time"]:
+        assert np.allclose(
+            stats[stat], reference_stats[stat], atol=1e-5, equal_nan=True
+        )
+    # the first movement of the simulated cursor can be smaller than the int16 resolution
+    atol = 1e-5 if storage == "float32" else 1.01 / 60.0
+    assert np.allclose(
+        stats.to_target_reaction_time,
+        reference_stats.to_target_reaction_time,
+        atol=atol,
+    )
+    atol = 1e-6 if storage == "float32" else 1e-3
+    for stat in ["to_target_distance", "to_target_rmse", "area"]:
+        assert np.allclose(
+            stats[stat], reference_stats[stat], atol=atol, equal_nan=True
+        )
+    # saved and loaded with the same storage
+    round_trip = session_data.to_trial_handler(
+        experiment_no_results.trial_list, trial_handler.extraInfo
+    )
+    assert SessionData.from_trial_handler(round_trip).to_target.storage == storage
+    assert np.array_equal(
+        SessionData.from_trial_handler(round_trip).to_target.positions,
+        session_data.to_target.positions,
+    )
+
+
+def test_add_trial_data_int16_overflow() -> None:
+    trial_handler = TrialHandlerExt([{}], nReps=1, method="sequential", originPath=-1)
+    next(trial_handler)
+    positions = [np.full((3, 2), 0.1), np.full((3, 2), 10.0), np.full((3, 2), -0.2)]
+    timestamps = [np.array([0.0, 0.1, 0.2])] * 3
+    vstt.session.add_trial_data(
+        trial_handler,
+        {
+            "to_target_timestamps": timestamps,
+            "to_target_mouse_positions": positions,
+            "to_center_timestamps": timestamps[:1],
+            "to_center_mouse_positions": [np.full((3, 2), 0.3)],
+        },
+        "int16",
+    )
+    # all positions of the trial are stored as float32 if any of them are outside the int16 range
+    stored = trial_handler.data["to_target_mouse_positions"][0, 0]
+    assert stored.dtype == np.float32
+    for stored_positions, expected in zip(stored, positions):
+        assert np.allclose(decode_positions(stored_positions), expected)
+    stored = trial_handler.data["to_center_mouse_positions"][0, 0]
+    assert stored.dtype == np.float32
+    assert np.allclose(decode_positions(stored[0]), 0.3)
+    assert trial_handler.data["to_target_timestamps"][0, 0].dtype == np.float32
@@ -47,6 +47,57 @@ def test_stats_df(experiment_with_results: Experiment) -> None:
             assert stat in df.columns
 
 
+def test_stats_df_in_background(experiment_with_results: Experiment) -> None:
+    trial_handler = experiment_with_results.trial_handler_with_results
+    future = vstt.stats.stats_dataframe_in_background(trial_handler)
+    df = future.result(timeout=60)
+    assert df.equals(vstt.stats.stats_dataframe(trial_handler))
+    # the stats property of the experiment waits for the result if needed
+    experiment_with_results.stats = vstt.stats.stats_dataframe_in_background(
+        trial_handler
+    )
+    assert experiment_with_results.stats.equals(df)
+    assert experiment_with_results.stats_ready is True
+
+
+def test_stats_summary(experiment_with_results: Experiment) -> None:
+    df = experiment_with_results.stats
+    # make one target of trial 1 unsuccessful
+    df.loc[df.i_trial == 1, "to_target_success"] = [
+        np.array(i != 2) for i in range((df.i_trial == 1).sum())
+    ]
+    summary = vstt.stats.stats_summary(df)
+    assert summary.shape[0] == 1
+    assert summary.num_trials[0] == 4
+    assert summary.num_targets[0] == df.shape[0]
+    assert np.isclose(summary.to_target_success[0], (df.shape[0] - 1) / df.shape[0])
+    assert np.isclose(summary.to_target_trial_success[0], 0.75)
+    assert np.isclose(
+        summary.to_target_reaction_time[0], df.to_target_reaction_time.mean()
+    )
+    # whether all the targets of each trial were reached
+    all_success = df.to_target_success.astype(bool).groupby(df.i_trial).all()
+    for by in ["i_trial", "condition_index", "target_index"]:
+        summary = vstt.stats.stats_summary(df, by)
+        for value, rows in df.groupby(by):
+            success = rows.to_target_success.astype(bool)
+            trial_success = all_success[rows.i_trial.unique()]
+            assert summary.num_targets[value] == rows.shape[0]
+            assert summary.num_trials[value] == rows.i_trial.nunique()
+            assert np.isclose(summary.to_target_success[value], success.mean())
+            assert np.isclose(
+                summary.to_target_trial_success[value], trial_success.mean()
+            )
+            assert np.isclose(summary.to_target_time[value], rows.to_target_time.mean())
+            assert np.isclose(
+                summary.target_pos_x[value],
+                np.mean([pos[0] for pos in rows.target_pos]),
+            )
+    summary = vstt.stats.stats_summary(df, ["condition_index", "target_index"])
+    assert summary.num_targets.sum() == df.shape[0]
+    assert summary.loc[(1, 2)].num_trials == 1
+
+
 def test_distance() -> None:
     assert np.allclose(vstt.stats._distance(np.array([[0, 0]])), [0])
     assert np.allclose(vstt.stats._distance(np.array([[3, 4]])), [0])
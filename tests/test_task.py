@@ -197,6 +197,9 @@ def test_task_fixed_intervals_no_user_input(window: Window) -> None:
     for irep in [0, 1, 2]:
         for success_name in ["to_target_success", "to_center_success"]:
             assert np.all(data[success_name][irep][0] == expected_success)
+        # no sound played, so no sound onset times recorded
+        for dest in ["target", "center"]:
+            assert np.all(np.isnan(data[f"to_{dest}_sound_onset_timestamps"][irep][0]))
         # For first target of first repetition: to_target timestamps should go from 0 to 2*target_duration
         # All subsequent to_target timestamps should follow sequentially and last target_duration
         # Each rep resets the clock to zero
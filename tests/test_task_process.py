@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from vstt.experiment import Experiment
+from vstt.monitor import ExperimentMonitor
+from vstt.task_process import run_task_in_subprocess
+
+
+def test_run_task_in_subprocess(experiment_no_results: Experiment) -> None:
+    assert experiment_no_results.trial_handler_with_results is None
+    assert run_task_in_subprocess(experiment_no_results, headless=True) is True
+    assert experiment_no_results.has_unsaved_changes is True
+    trial_handler = experiment_no_results.trial_handler_with_results
+    assert trial_handler is not None
+    assert trial_handler.finished
+    # the trial list validated by the task is the trial list of the results
+    assert experiment_no_results.trial_list is trial_handler.trialList
+    stats = experiment_no_results.stats
+    assert stats is not None
+    assert len(stats) == 4 + 3 + 3
+    assert np.all(stats.to_target_success.astype(bool))
+
+
+def test_run_task_in_subprocess_error(experiment_no_results: Experiment) -> None:
+    experiment_no_results.trial_list[0]["use_joystick"] = True
+    with pytest.raises(RuntimeError, match="no joystick found"):
+        run_task_in_subprocess(experiment_no_results, headless=True)
+    assert experiment_no_results.trial_handler_with_results is None
+
+
+def test_run_task_in_subprocess_monitor(experiment_no_results: Experiment) -> None:
+    # the monitor belongs to this process, and the subprocess publishes to its queue
+    monitor = ExperimentMonitor()
+    assert run_task_in_subprocess(experiment_no_results, True, monitor) is True
+    summaries = [monitor.queue.get(timeout=5) for _ in range(4)]
+    assert [summary.get("i_trial") for summary in summaries] == [0, 1, 2, None]
+    assert summaries[-1] == {}
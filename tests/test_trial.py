@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import numpy as np
+import pandas as pd
+import pytest
 from pytest import approx
 
 import vstt
@@ -178,3 +181,121 @@ def test_validate_trial_target_order() -> None:
     vtrial = vstt.trial.import_and_validate_trial(trial)
     assert isinstance(vtrial["target_indices"], str)
     assert vtrial["target_indices"] == "0 7 1 5 7 0"
+
+
+def test_import_and_validate_trials(caplog: pytest.LogCaptureFixture) -> None:
+    trials: list[dict] = []
+    for i in range(20):
+        trial: dict = dict(vstt.trial.default_trial())
+        trial["target_order"] = ["clockwise", "anti-clockwise", "fixed"][i % 3]
+        trial["target_indices"] = "-2 8 1 5"
+        trial["weight"] = 2.0
+        trial["target_duration"] = -1 if i % 2 else 2
+        trial["show_cursor"] = 0
+        trials.append(trial)
+    trials[3].pop("cursor_size")
+    trials[5]["unknown_key"] = 1
+    df = pd.DataFrame(trials)
+    for trials_input, trial_dicts in [(trials, trials), (df, df.to_dict("records"))]:
+        expected = [vstt.trial.import_and_validate_trial(t) for t in trial_dicts]
+        caplog.clear()
+        validated = vstt.trial.import_and_validate_trials(trials_input)
+        assert len(validated) == len(expected)
+        for trial, expected_trial in zip(validated, expected):
+            assert trial.keys() == expected_trial.keys()
+            for key in trial:
+                value, expected_value = trial[key], expected_trial[key]  # type: ignore
+                assert value == expected_value or (
+                    np.isnan(value) and np.isnan(expected_value)
+                )
+                assert type(trial[key]) is type(expected_trial[key])  # type: ignore
+        # one warning per key instead of one per trial
+        log_messages = [r.message for r in caplog.records]
+        assert "Key 'show_cursor' invalid in 20 trials" in log_messages[0]
+        assert log_messages[-1] == "Ignoring unknown key 'unknown_key'"
+        if trials_input is trials:
+            assert len(log_messages) == 3
+            assert log_messages[1] == (
+                "Key 'cursor_size' missing in 1 trials, using default '0.02'"
+            )
+        else:
+            # a missing value in a DataFrame is NaN
+            assert len(log_messages) == 2
+            assert np.isnan(validated[3]["cursor_size"])
+    # random target orders are shuffled separately for each trial
+    for trial in trials:
+        trial["target_order"] = "random"
+    validated = vstt.trial.import_and_validate_trials(trials)
+    target_indices = {trial["target_indices"] for trial in validated}
+    assert len(target_indices) > 1
+    assert all(len(set(t.split(" "))) == 8 for t in target_indices)
+    assert vstt.trial.import_and_validate_trials([]) == []
+
+
+def test_expand_and_find_sweep() -> None:
+    sweep = {
+        "base": {"num_targets": 4, "weight": 2},
+        "factors": [
+            {"cursor_rotation_degrees": [0.0, 30.0, 60.0]},
+            {"target_size": [0.02, 0.04], "central_target_size": [0.01, 0.03]},
+        ],
+    }
+    trials = vstt.trial.expand_sweep(sweep)
+    assert len(trials) == 6
+    assert [t["cursor_rotation_degrees"] for t in trials] == [0, 0, 30, 30, 60, 60]
+    assert [t["target_size"] for t in trials] == [0.02, 0.04] * 3
+    assert [t["central_target_size"] for t in trials] == [0.01, 0.03] * 3
+    for trial in trials:
+        assert trial["num_targets"] == 4
+        assert trial["weight"] == 2
+        assert trial["show_cursor"] == vstt.trial.default_trial()["show_cursor"]
+    found = vstt.trial.find_sweep(trials)
+    assert found is not None
+    assert found["factors"] == sweep["factors"]
+    assert vstt.trial.expand_sweep(found) == trials
+    # random target orders are generated from the number of targets
+    for trial in trials:
+        trial["target_order"] = "random"
+    trials = vstt.trial.import_and_validate_trials(trials)
+    found = vstt.trial.find_sweep(trials)
+    assert found is not None
+    assert found["base"]["target_indices"] == "0 1 2 3"
+    # trial lists that are not a full factorial sweep
+    assert vstt.trial.find_sweep(trials[:5]) is None
+    assert vstt.trial.find_sweep([trials[i] for i in [0, 3, 1, 2]]) is None
+    assert vstt.trial.find_sweep([vstt.trial.default_trial()] * 3) is None
+    assert vstt.trial.find_sweep(trials[:1]) is None
+    assert vstt.trial.find_sweep([]) is None
+    with pytest.raises(ValueError):
+        vstt.trial.expand_sweep(
+            {"base": {}, "factors": [{"num_targets": [2, 3], "weight": [1]}]}
+        )
+
+
+def test_import_and_validate_sweep() -> None:
+    sweep = {
+        "base": {"num_targets": "3", "unknown_key": 1},
+        "factors": [
+            {"cursor_rotation_degrees": [0, "30", 60.0]},
+            {"show_cursor": [1, False], "unknown_key": [1, 2]},
+        ],
+    }
+    validated = vstt.trial.import_and_validate_sweep(sweep)
+    assert validated["base"]["num_targets"] == 3
+    assert validated["base"]["target_indices"] == "0 1 2"
+    assert "unknown_key" not in validated["base"]
+    assert validated["factors"] == [
+        {"cursor_rotation_degrees": [0.0, 30.0, 60.0]},
+        {"show_cursor": [True, False]},
+    ]
+    trials = vstt.trial.expand_sweep(validated)
+    assert len(trials) == 6
+    assert vstt.trial.find_sweep(trials) == validated
+    for invalid_sweep in [
+        {"base": {}},
+        {"base": {}, "factors": [{"weight": 1}]},
+        {"base": {}, "factors": [{"weight": []}]},
+        {"base": {}, "factors": [{"weight": [1, 2], "num_targets": [3]}]},
+    ]:
+        with pytest.raises(ValueError):
+            vstt.trial.import_and_validate_sweep(invalid_sweep)
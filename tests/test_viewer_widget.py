@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import numpy as np
+from qtpy import QtCore
+
+from vstt.experiment import Experiment
+from vstt.viewer_widget import ResultsViewer
+from vstt.viewer_widget import _painter_path
+from vstt.viewer_widget import max_zoom
+from vstt.viewer_widget import min_zoom
+
+
+def _grey_fraction(viewer: ResultsViewer) -> float:
+    image = viewer.grab().toImage()
+    pixels = [
+        image.pixelColor(x, y).getRgb()[:3]
+        for x in range(0, image.width(), 4)
+        for y in range(0, image.height(), 4)
+    ]
+    return float(np.mean([p == (128, 128, 128) for p in pixels]))
+
+
+def test_painter_path() -> None:
+    path = _painter_path(
+        np.array([[0, 0], [1, 0], [np.nan, np.nan], [0, 1], [1, 1]]), False
+    )
+    # two separate lines
+    assert path.elementCount() == 4
+    assert path.elementAt(2).isMoveTo()
+    polygon = _painter_path(np.array([[0, 0], [1, 0], [0, 1]]), True)
+    assert polygon.elementCount() == 4
+
+
+def test_results_viewer(experiment_with_results: Experiment) -> None:
+    viewer = ResultsViewer()
+    viewer.resize(400, 300)
+    # initially empty
+    assert _grey_fraction(viewer) == 1.0
+    viewer.show_results(
+        experiment_with_results.trial_handler_with_results,
+        experiment_with_results.display_options,
+        experiment_with_results.stats,
+        0,
+        False,
+    )
+    items = viewer._items
+    assert len(items) > 0
+    trial_grey_fraction = _grey_fraction(viewer)
+    assert 0.5 < trial_grey_fraction < 1.0
+    # condition has more paths
+    viewer.show_results(
+        experiment_with_results.trial_handler_with_results,
+        experiment_with_results.display_options,
+        experiment_with_results.stats,
+        0,
+        True,
+    )
+    assert _grey_fraction(viewer) < trial_grey_fraction
+    # scenes are cached
+    viewer.show_results(
+        experiment_with_results.trial_handler_with_results,
+        experiment_with_results.display_options,
+        experiment_with_results.stats,
+        0,
+        False,
+    )
+    assert viewer._items is items
+    viewer.clear_cache()
+    viewer.show_results(
+        experiment_with_results.trial_handler_with_results,
+        experiment_with_results.display_options,
+        experiment_with_results.stats,
+        0,
+        False,
+    )
+    assert viewer._items is not items
+    # zoom in around a point keeps that point fixed
+    pos = QtCore.QPointF(300.0, 100.0)
+    before = viewer._transform().inverted()[0].map(pos)
+    viewer.zoom(3.0, pos)
+    after = viewer._transform().inverted()[0].map(pos)
+    assert np.isclose(before.x(), after.x())
+    assert np.isclose(before.y(), after.y())
+    # zoom is limited
+    viewer.zoom(1e6)
+    assert viewer._zoom == max_zoom
+    viewer.zoom(1e-6)
+    assert viewer._zoom == min_zoom
+    viewer.reset_view()
+    assert viewer._zoom == 1.0
+    # message instead of results
+    viewer.clear("Calculating statistics...")
+    assert viewer._items == []
+    assert 0.9 < _grey_fraction(viewer) < 1.0
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import weakref
+from concurrent.futures import Future
+from typing import Any
+
 import gui_test_utils as gtu
 import numpy as np
+import pandas as pd
 import pytest
 from psychopy.visual.window import Window
 from pytest import approx
@@ -350,3 +355,144 @@ def test_display_results_everything(
         )
         # more grey since there are fewer paths and stats to display
         assert gtu.pixel_color_fraction(screenshot, (128, 128, 128)) > grey_pixels
+
+
+def test_batch_paths() -> None:
+    assert vstt.vis.batch_paths([]).shape == (0, 2)
+    assert vstt.vis.batch_paths([np.zeros(0)]).shape == (0, 2)
+    a = np.array([[0.0, 0.0], [0.1, 0.2]])
+    b = np.array([[0.3, 0.4], [0.5, 0.6], [0.7, 0.8]])
+    assert np.array_equal(vstt.vis.batch_paths([a]), a)
+    vertices = vstt.vis.batch_paths([a, np.zeros(0), b])
+    assert vertices.shape == (6, 2)
+    assert np.array_equal(vertices[:2], a)
+    assert np.all(np.isnan(vertices[2]))
+    assert np.array_equal(vertices[3:], b)
+
+
+def test_display_results_cache(
+    experiment_with_results: Experiment, window: Window
+) -> None:
+    vstt.vis.clear_results_cache()
+    trial_handler = experiment_with_results.trial_handler_with_results
+    args = (0, False, False, trial_handler, experiment_with_results.display_options)
+    for i_trial, all_trials_for_this_condition in [(0, False), (1, True)]:
+        vstt.vis.display_results(
+            *args, i_trial, all_trials_for_this_condition, window, None, None, True
+        )
+    assert len(vstt.vis._stats_df_cache) == 1
+    assert len(vstt.vis._drawables_cache) == 2
+    cached_drawables = [value[2] for value in vstt.vis._drawables_cache.values()]
+    # toggling between views re-uses the cached drawables
+    for _ in range(3):
+        for i_trial, all_trials_for_this_condition in [(0, False), (1, True)]:
+            vstt.vis.display_results(
+                *args, i_trial, all_trials_for_this_condition, window, None, None, True
+            )
+    assert len(vstt.vis._drawables_cache) == 2
+    assert [
+        value[2] for value in vstt.vis._drawables_cache.values()
+    ] == cached_drawables
+    # different display options are cached separately
+    experiment_with_results.display_options["to_target_paths"] = False
+    vstt.vis.display_results(*args, 0, False, window, None, None, True)
+    assert len(vstt.vis._drawables_cache) == 3
+    vstt.vis.clear_results_cache()
+    assert len(vstt.vis._stats_df_cache) == 0
+    assert len(vstt.vis._drawables_cache) == 0
+
+
+def test_display_results_with_stats(
+    experiment_with_results: Experiment,
+    window: Window,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    vstt.vis.clear_results_cache()
+    trial_handler = experiment_with_results.trial_handler_with_results
+    stats = experiment_with_results.stats
+    # the final results display of an experiment, before the trial handler is finished
+    monkeypatch.setattr(trial_handler, "finished", False)
+
+    def not_recalculated(*args: Any) -> None:
+        raise AssertionError("stats should not be recalculated")
+
+    monkeypatch.setattr(vstt.stats, "stats_dataframe", not_recalculated)
+    stats_future: Future[pd.DataFrame] = Future()
+    stats_future.set_result(stats)
+    for given_stats in [stats, stats_future]:
+        img = vstt.vis.display_results(
+            0,
+            False,
+            False,
+            trial_handler,
+            experiment_with_results.display_options,
+            1,
+            True,
+            window,
+            None,
+            None,
+            True,
+            stats=given_stats,
+        )
+        assert img is not None
+    assert len(vstt.vis._stats_df_cache) == 0
+
+
+def test_simplified_path_cache() -> None:
+    vstt.vis.clear_results_cache()
+    path = np.stack([np.linspace(0, 1, 100), np.zeros(100)], axis=1)
+    simplified = vstt.vis._simplified_path(path, 0.001)
+    assert np.array_equal(simplified, path[[0, -1]])
+    # cached per path and tolerance
+    assert vstt.vis._simplified_path(path, 0.001) is simplified
+    assert vstt.vis._simplified_path(path.copy(), 0.001) is not simplified
+    assert vstt.vis._simplified_path(path, 0.0).shape == path.shape
+    # original full resolution path is unchanged
+    assert path.shape == (100, 2)
+    # the cache doesn't keep the path alive, and its entry is removed when the path is freed
+    assert len(vstt.vis._simplified_paths_cache) == 1
+    path_ref = weakref.ref(path)
+    del path
+    assert path_ref() is None
+    assert len(vstt.vis._simplified_paths_cache) == 0
+    vstt.vis._simplified_path(simplified, 0.001)
+    assert len(vstt.vis._simplified_paths_cache) == 1
+    vstt.vis.clear_results_cache()
+    assert len(vstt.vis._simplified_paths_cache) == 0
+
+
+def test_preload_fonts(experiment_with_results: Experiment, window: Window) -> None:
+    from psychopy.visual.textbox2.textbox2 import allFonts
+
+    experiment_with_results.trial_list[0]["show_target_labels"] = True
+    experiment_with_results.trial_list[0]["target_labels"] = "A B C D E F G H"
+    trial = experiment_with_results.trial_list[0]
+    metadata = experiment_with_results.metadata
+    future = vstt.vis.preload_fonts_in_background(
+        experiment_with_results.trial_list, metadata, window.size[1]
+    )
+    vstt.vis.wait_for_preloaded_fonts()
+    assert future.done()
+    preloaded_fonts = set(allFonts._glFonts)
+    # the text boxes of the task and the results display use the preloaded fonts
+    vstt.vis._make_textbox_title(metadata["display_title"], window)
+    vstt.vis._make_textbox_main_text(vstt.vis._main_text(metadata), window)
+    vstt.vis._make_textbox_countdown("3", window)
+    vstt.vis._make_textbox_press_enter(window)
+    vstt.vis.make_target_labels(
+        window,
+        trial["num_targets"],
+        trial["target_distance"],
+        trial["target_size"],
+        trial["target_labels"],
+    )
+    vstt.vis._make_stats_drawables(
+        experiment_with_results.trial_handler_with_results,
+        experiment_with_results.display_options,
+        vstt.vis._cached_stats_dataframe(
+            experiment_with_results.trial_handler_with_results
+        ),
+        window,
+        False,
+    )
+    assert set(allFonts._glFonts) == preloaded_fonts
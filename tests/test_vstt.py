@@ -1,7 +1,70 @@
 from __future__ import annotations
 
+import subprocess
+import sys
+
+import pytest
+
 import vstt
 
+gui_modules = ("psychopy.visual", "qtpy", "PyQt5", "PyQt6", "PySide2", "PySide6")
+
+
+def _import_times(module: str) -> dict[str, int]:
+    # import the module in a new python process with -X importtime,
+    # and return the cumulative import time in microseconds of each imported module
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:"):
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                import_times[name.strip()] = int(cumulative)
+    return import_times
+
 
 def test_vstt_import() -> None:
     assert len(vstt.__version__) > 0
+    assert vstt.Experiment is vstt.experiment.Experiment
+    with pytest.raises(AttributeError):
+        vstt.not_a_module  # noqa: B018
+
+
+def test_cli_import_time() -> None:
+    import_times = _import_times("vstt.__main__")
+    assert not [
+        name
+        for name in import_times
+        if name.startswith(("psychopy", "pandas", "shapely", *gui_modules))
+    ]
+    assert import_times["vstt.__main__"] < 500000
+    result = subprocess.run(
+        [sys.executable, "-m", "vstt", "--help"], capture_output=True, text=True
+    )
+    assert result.returncode == 0
+    assert "render" in result.stdout
+
+
+@pytest.mark.parametrize(
+    "module", ["vstt.experiment", "vstt.stats", "vstt.compression", "vstt.render"]
+)
+def test_headless_imports(module: str) -> None:
+    import_times = _import_times(module)
+    assert module in import_times
+    assert not [name for name in import_times if name.startswith(gui_modules)]
+
+
+def test_task_process_imports() -> None:
+    # the task subprocess only imports the stats once all trials are done
+    import_times = _import_times("vstt.task_process, vstt.task, vstt.experiment")
+    assert "vstt.task" in import_times
+    assert not [
+        name
+        for name in import_times
+        if name.startswith(("shapely", "vstt.stats", *gui_modules[1:]))
+    ]